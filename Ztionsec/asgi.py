@@ -2,6 +2,9 @@
 ASGI config for Ztionsec project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Async views such as ``scanner.views.api_scan_async`` are awaited directly on
+the server's event loop when the project is served through this entry point,
+e.g. ``gunicorn Ztionsec.asgi:application -k uvicorn.workers.UvicornWorker``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -171,6 +171,12 @@ CACHES = {
     }
 }
 
+# Scan job queue (scanner/job_queue.py): scans are run by `manage.py scan_worker`.
+# Hosts without a worker process can run them inside the request instead.
+SCAN_QUEUE = {
+    'RUN_INLINE': os.environ.get('SCAN_QUEUE_RUN_INLINE', 'False').lower() == 'true',
+}
+
 # Session Configuration - Use database only to avoid cache issues
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 3600  # 1 hour
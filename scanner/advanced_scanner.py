@@ -15,11 +15,21 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import concurrent.futures
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 import hashlib
 import base64
 
+from .phase_scheduler import Phase, PhaseScheduler, current_phase
+from .incremental import PreviousScan, RescanPlan
+from .port_scanner import scan_ports
+from .deadline import remaining
+from . import dns_resolver
+from .tls_probe import probe_tls
+from . import http_client
+from .http_client import create_client
+from . import signatures
+
 # Optional imports for advanced features
 try:
     import nmap
@@ -54,51 +64,82 @@ class SecurityFinding:
     affected_component: str = ""
     proof_of_concept: str = ""
     references: List[str] = None
+    phase: Optional[str] = field(default_factory=current_phase)  # scan phase that raised it
     
     def __post_init__(self):
         if self.references is None:
             self.references = []
 
 class AdvancedSecurityScanner:
-    def __init__(self, target_url: str):
+    def __init__(self, target_url: str, port_scan_range: Optional[str] = None, force_refresh: bool = False):
         self.target_url = target_url
+        self.port_scan_range = port_scan_range
+        self.force_refresh = force_refresh  # this scanner keeps no cached sub-results
         self.parsed_url = urlparse(target_url)
         self.domain = self.parsed_url.netloc
         self.ip_address = None
         self.findings: List[SecurityFinding] = []
         self.results = {}
         
+        self.session = create_client()
+        self.homepage: Optional[requests.Response] = None
+        
         # Initialize scanners
         self.nm = nmap.PortScanner() if NMAP_AVAILABLE else None
         
-    def comprehensive_scan(self) -> Dict[str, Any]:
-        """Perform comprehensive security analysis"""
+    def comprehensive_scan(self, previous: Optional[PreviousScan] = None) -> Dict[str, Any]:
+        """Perform comprehensive security analysis
+
+        With a previous scan of the same domain, phases whose inputs have
+        not changed since (see incremental.py) reuse its results and findings.
+        """
         print(f"🔍 Starting comprehensive scan for {self.target_url}")
         
-        # Run all scans concurrently for efficiency
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {
-                executor.submit(self.dns_analysis): 'dns',
-                executor.submit(self.ssl_deep_analysis): 'ssl',
-                executor.submit(self.port_scan): 'ports',
-                executor.submit(self.web_application_scan): 'webapp',
-                executor.submit(self.vulnerability_scan): 'vulns',
-                executor.submit(self.subdomain_enumeration): 'subdomains',
-                executor.submit(self.technology_detection): 'tech',
-                executor.submit(self.security_headers_analysis): 'headers',
-                executor.submit(self.cms_vulnerability_check): 'cms_vulns',
-                executor.submit(self.threat_intelligence): 'threat_intel'
-            }
-            
-            for future in concurrent.futures.as_completed(futures):
-                scan_type = futures[future]
-                try:
-                    result = future.result(timeout=300)  # 5 minute timeout per scan
-                    self.results[scan_type] = result
-                    print(f"✅ {scan_type.upper()} scan completed")
-                except Exception as e:
-                    print(f"❌ {scan_type.upper()} scan failed: {str(e)}")
-                    self.results[scan_type] = {'error': str(e)}
+        # Run independent scans concurrently; port_scan waits for the IP from dns_analysis
+        phases = [
+            Phase('dns', self.dns_analysis),
+            Phase('ssl', self.ssl_deep_analysis),
+            Phase('homepage', self.get_homepage),
+            Phase('ports', self.port_scan, requires=('dns',)),
+            Phase('webapp', self.web_application_scan),
+            Phase('vulns', self.vulnerability_scan),
+            Phase('subdomains', self.subdomain_enumeration),
+            Phase('tech', self.technology_detection, requires=('homepage',)),
+            Phase('headers', self.security_headers_analysis, requires=('homepage',)),
+            Phase('cms_vulns', self.cms_vulnerability_check),
+            Phase('threat_intel', self.threat_intelligence)
+        ]
+        
+        # Unchanged inputs since the previous scan: carry those phases forward
+        plan = RescanPlan(self, previous).prepare()
+        if plan.homepage is not None:
+            self.homepage = plan.homepage
+        if 'dns' in plan.reuse:
+            self.ip_address = previous.results['dns'].get('ip_address')
+        self.findings.extend(SecurityFinding(**finding) for finding in plan.carried_findings())
+        phases = plan.apply(phases)
+        
+        def record(outcome):
+            if outcome.name == 'homepage':
+                return
+            
+            if outcome.name in plan.reuse:
+                self.results[outcome.name] = outcome.result
+                print(f"♻️ {outcome.name.upper()} unchanged since scan #{previous.scan_id}, result carried forward")
+            elif outcome.ok:
+                self.results[outcome.name] = outcome.result
+                self.results[f"{outcome.name}_duration"] = round(outcome.duration, 2)
+                print(f"✅ {outcome.name.upper()} scan completed")
+            elif outcome.timed_out:
+                print(f"⏱️ {outcome.name.upper()} scan stopped at the scan deadline")
+                self.results[outcome.name] = {'error': outcome.error, 'status': 'timed_out'}
+                timed_out_phases.append(outcome.name)
+            else:
+                print(f"❌ {outcome.name.upper()} scan failed: {outcome.error}")
+                self.results[outcome.name] = {'error': outcome.error}
+        
+        timed_out_phases = []
+        PhaseScheduler(phases, max_workers=10).run(on_complete=record)
         
         # Calculate final security score
         self.calculate_advanced_score()
@@ -109,9 +150,24 @@ class AdvancedSecurityScanner:
             'results': self.results,
             'findings': [f.__dict__ for f in self.findings],
             'security_score': self.results.get('security_score', 0),
-            'risk_level': self.results.get('risk_level', 'unknown')
+            'risk_level': self.results.get('risk_level', 'unknown'),
+            'scan_incomplete': bool(timed_out_phases),
+            'timed_out_phases': timed_out_phases,
+            'host_status': http_client.host_status(self.target_url),
+            'incremental': dict(plan.summary(), fingerprints=plan.finish(self.results) if not timed_out_phases else {},
+                                phase_ran_at=plan.phase_ran_at(self.results))
         }
     
+    def fetch_homepage(self) -> requests.Response:
+        """Fetch the target page once for the phases that inspect it"""
+        self.homepage = self.session.get(self.target_url, timeout=10)
+        return self.homepage
+    
+    def get_homepage(self) -> requests.Response:
+        if self.homepage is None:
+            self.fetch_homepage()
+        return self.homepage
+    
     def dns_analysis(self) -> Dict[str, Any]:
         """Comprehensive DNS analysis"""
         dns_results = {}
@@ -119,7 +175,7 @@ class AdvancedSecurityScanner:
         try:
             if DNS_AVAILABLE:
                 # Resolve IP address
-                answers = dns.resolver.resolve(self.domain, 'A')
+                answers = dns_resolver.resolve(self.parsed_url.hostname or self.domain, 'A')
                 self.ip_address = str(answers[0])
                 dns_results['ip_address'] = self.ip_address
                 
@@ -128,14 +184,14 @@ class AdvancedSecurityScanner:
                 
                 # MX Records
                 try:
-                    mx_records = dns.resolver.resolve(self.domain, 'MX')
+                    mx_records = dns_resolver.resolve(self.parsed_url.hostname or self.domain, 'MX')
                     dns_results['mx_records'] = [str(rdata) for rdata in mx_records]
                 except:
                     dns_results['mx_records'] = []
                 
                 # TXT Records (SPF, DKIM, DMARC)
                 try:
-                    txt_records = dns.resolver.resolve(self.domain, 'TXT')
+                    txt_records = dns_resolver.resolve(self.parsed_url.hostname or self.domain, 'TXT')
                     dns_results['txt_records'] = [str(rdata) for rdata in txt_records]
                     
                     # Check for security-related TXT records
@@ -150,7 +206,7 @@ class AdvancedSecurityScanner:
             else:
                 # Fallback DNS resolution using socket
                 try:
-                    self.ip_address = socket.gethostbyname(self.domain)
+                    self.ip_address = dns_resolver.gethostbyname(self.parsed_url.hostname or self.domain)
                     dns_results['ip_address'] = self.ip_address
                     dns_results['a_records'] = [self.ip_address]
                     dns_results['mx_records'] = []
@@ -194,43 +250,41 @@ class AdvancedSecurityScanner:
             return ssl_results
         
         try:
-            # Basic SSL connection
-            context = ssl.create_default_context()
-            with socket.create_connection((self.domain, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
-                    cert = ssock.getpeercert()
-                    cipher = ssock.cipher()
-                    
-                    ssl_results['ssl_enabled'] = True
-                    ssl_results['certificate'] = {
-                        'subject': dict(x[0] for x in cert['subject']),
-                        'issuer': dict(x[0] for x in cert['issuer']),
-                        'version': cert['version'],
-                        'serial_number': cert['serialNumber'],
-                        'not_before': cert['notBefore'],
-                        'not_after': cert['notAfter']
-                    }
-                    
-                    ssl_results['cipher_suite'] = {
-                        'name': cipher[0],
-                        'version': cipher[1],
-                        'bits': cipher[2]
-                    }
-                    
-                    # Check certificate expiry
-                    expiry_date = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    days_until_expiry = (expiry_date - datetime.now()).days
-                    ssl_results['days_until_expiry'] = days_until_expiry
-                    
-                    if days_until_expiry < 30:
-                        self.findings.append(SecurityFinding(
-                            severity='medium',
-                            category='SSL/TLS',
-                            title='Certificate Expiring Soon',
-                            description=f'SSL certificate expires in {days_until_expiry} days',
-                            recommendation='Renew SSL certificate before expiration'
-                        ))
+            # Basic SSL connection, shared with the other modules through the TLS cache
+            tls = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443).require_verified()
+            cert = tls.peer_cert
+            cipher = tls.cipher
+            
+            ssl_results['ssl_enabled'] = True
+            ssl_results['certificate'] = {
+                'subject': dict(x[0] for x in cert['subject']),
+                'issuer': dict(x[0] for x in cert['issuer']),
+                'version': cert['version'],
+                'serial_number': cert['serialNumber'],
+                'not_before': cert['notBefore'],
+                'not_after': cert['notAfter']
+            }
+            
+            ssl_results['cipher_suite'] = {
+                'name': cipher[0],
+                'version': cipher[1],
+                'bits': cipher[2]
+            }
+            
+            # Check certificate expiry
+            expiry_date = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            days_until_expiry = (expiry_date - datetime.now()).days
+            ssl_results['days_until_expiry'] = days_until_expiry
             
+            if days_until_expiry < 30:
+                self.findings.append(SecurityFinding(
+                    severity='medium',
+                    category='SSL/TLS',
+                    title='Certificate Expiring Soon',
+                    description=f'SSL certificate expires in {days_until_expiry} days',
+                    recommendation='Renew SSL certificate before expiration'
+                ))
+    
             # Advanced SSL testing with testssl.sh (if available)
             try:
                 result = subprocess.run(['testssl', '--jsonfile-pretty', '/tmp/testssl_output.json', self.target_url], 
@@ -255,85 +309,72 @@ class AdvancedSecurityScanner:
             return {'error': 'IP address not resolved'}
         
         try:
-            if NMAP_AVAILABLE and self.nm:
-                # Quick scan of common ports
-                common_ports = '21,22,23,25,53,80,110,143,443,993,995,8080,8443'
-                self.nm.scan(self.ip_address, common_ports, arguments='-sV -sC --script vuln')
-                
-                port_results['scan_info'] = self.nm.scaninfo()
-                
-                if self.ip_address in self.nm.all_hosts():
-                    host_info = self.nm[self.ip_address]
-                    port_results['host_state'] = host_info.state()
-                    port_results['protocols'] = list(host_info.all_protocols())
-                    
-                    open_ports = []
-                    for protocol in host_info.all_protocols():
-                        ports = host_info[protocol].keys()
-                        for port in ports:
-                            port_info = host_info[protocol][port]
-                            if port_info['state'] == 'open':
-                                port_data = {
-                                    'port': port,
-                                    'protocol': protocol,
-                                    'service': port_info.get('name', 'unknown'),
-                                    'version': port_info.get('version', ''),
-                                    'product': port_info.get('product', ''),
-                                    'extrainfo': port_info.get('extrainfo', '')
-                                }
-                                
-                                # Check for vulnerable services
-                                if 'script' in port_info:
-                                    port_data['vulnerabilities'] = port_info['script']
-                                    
-                                open_ports.append(port_data)
-                    
-                    port_results['open_ports'] = open_ports
-                    
-                    # Add findings for risky open ports
-                    risky_ports = {21: 'FTP', 22: 'SSH', 23: 'Telnet', 25: 'SMTP'}
-                    for port_data in open_ports:
-                        port_num = port_data['port']
-                        if port_num in risky_ports:
-                            self.findings.append(SecurityFinding(
-                                severity='medium',
-                                category='Network',
-                                title=f'{risky_ports[port_num]} Service Exposed',
-                                description=f'Port {port_num} ({risky_ports[port_num]}) is open and accessible',
-                                recommendation=f'Ensure {risky_ports[port_num]} service is properly secured and necessary'
-                            ))
-            else:
-                # Fallback: Basic port connectivity check
-                common_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 8080, 8443]
-                open_ports = []
-                
-                for port in common_ports:
-                    try:
-                        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                        sock.settimeout(2)
-                        result = sock.connect_ex((self.ip_address, port))
-                        sock.close()
-                        
-                        if result == 0:
-                            open_ports.append({
-                                'port': port,
-                                'protocol': 'tcp',
-                                'service': 'unknown',
-                                'version': '',
-                                'product': '',
-                                'extrainfo': ''
-                            })
-                    except:
-                        continue
-                
-                port_results['open_ports'] = open_ports
-                port_results['scan_method'] = 'basic_socket_scan'
+            # The asyncio connect sweep covers the configured range and honours the scan deadline
+            port_spec = self.port_scan_range or '21,22,23,25,53,80,110,143,443,993,995,8080,8443'
+            port_results = scan_ports(self.ip_address, port_spec)
+            port_results['port_range'] = port_spec
+            open_ports = port_results['open_ports']
+            
+            if NMAP_AVAILABLE and self.nm and open_ports:
+                # Version detection and vuln scripts only on the ports found open
+                try:
+                    self.nmap_service_scan(open_ports, port_results)
+                except Exception as e:
+                    port_results['nmap_error'] = str(e)
+            
+            # Add findings for risky open ports
+            risky_ports = {21: 'FTP', 22: 'SSH', 23: 'Telnet', 25: 'SMTP'}
+            for port_data in open_ports:
+                port_num = port_data['port']
+                if port_num in risky_ports:
+                    self.findings.append(SecurityFinding(
+                        severity='medium',
+                        category='Network',
+                        title=f'{risky_ports[port_num]} Service Exposed',
+                        description=f'Port {port_num} ({risky_ports[port_num]}) is open and accessible',
+                        recommendation=f'Ensure {risky_ports[port_num]} service is properly secured and necessary'
+                    ))
                 
         except Exception as e:
             port_results['error'] = str(e)
             
         return port_results
     
+    def nmap_service_scan(self, open_ports: List[Dict[str, Any]], port_results: Dict[str, Any]):
+        """Add nmap service versions and vuln script output to open_ports in place
+
+        nmap is a blocking subprocess the scan deadline cannot cancel, so it
+        is told to give up (--host-timeout) when the deadline would pass.
+        """
+        arguments = '-sV --script vuln'
+        time_left = remaining()
+        if time_left is not None:
+            if time_left < 1:
+                port_results['nmap_skipped'] = 'scan deadline reached'
+                return
+            arguments += f' --host-timeout {int(time_left)}s'
+        
+        self.nm.scan(self.ip_address, ','.join(str(port['port']) for port in open_ports), arguments=arguments)
+        port_results['scan_info'] = self.nm.scaninfo()
+        if self.ip_address not in self.nm.all_hosts():
+            return
+        
+        host_info = self.nm[self.ip_address]
+        port_results['host_state'] = host_info.state()
+        services = host_info['tcp'] if 'tcp' in host_info.all_protocols() else {}
+        for port_data in open_ports:
+            port_info = services.get(port_data['port'])
+            if not port_info:
+                continue
+            port_data['service'] = port_info.get('name') or port_data['service']
+            port_data['version'] = port_info.get('version', '')
+            port_data['product'] = port_info.get('product', '')
+            port_data['extrainfo'] = port_info.get('extrainfo', '')
+            
+            # Check for vulnerable services
+            if 'script' in port_info:
+                port_data['vulnerabilities'] = port_info['script']
+    
     def web_application_scan(self) -> Dict[str, Any]:
         """Web application security scanning"""
         webapp_results = {}
@@ -350,7 +391,7 @@ class AdvancedSecurityScanner:
             for file_path in common_files:
                 url = urljoin(self.target_url, file_path)
                 try:
-                    response = requests.get(url, timeout=5, allow_redirects=False)
+                    response = self.session.get(url, timeout=5, allow_redirects=False)
                     if response.status_code == 200:
                         found_files.append({
                             'path': file_path,
@@ -408,11 +449,11 @@ class AdvancedSecurityScanner:
                 full_domain = f"{subdomain}.{self.domain}"
                 try:
                     if DNS_AVAILABLE:
-                        dns.resolver.resolve(full_domain, 'A')
+                        dns_resolver.resolve(full_domain, 'A')
                         found_subdomains.append(full_domain)
                     else:
                         # Fallback using socket
-                        socket.gethostbyname(full_domain)
+                        dns_resolver.gethostbyname(full_domain)
                         found_subdomains.append(full_domain)
                 except:
                     continue
@@ -430,7 +471,7 @@ class AdvancedSecurityScanner:
         tech_results = {}
         
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.get_homepage()
             headers = response.headers
             content = response.text
             
@@ -438,54 +479,29 @@ class AdvancedSecurityScanner:
             tech_results['server'] = headers.get('Server', 'Unknown')
             tech_results['powered_by'] = headers.get('X-Powered-By', 'Unknown')
             
-            # Framework detection
-            frameworks = {
-                'Django': ['csrftoken', 'django', '__admin_media_prefix__'],
-                'Laravel': ['laravel_session', 'XSRF-TOKEN'],
-                'WordPress': ['wp-content', 'wp-includes', 'wordpress'],
-                'Drupal': ['drupal', 'sites/default'],
-                'Joomla': ['joomla', 'administrator/index.php'],
-                'React': ['react', '__REACT_DEVTOOLS_GLOBAL_HOOK__'],
-                'Angular': ['ng-', 'angular'],
-                'Vue.js': ['vue', 'v-'],
-            }
+            # Framework and library detection (one pass over body and headers)
+            matches = signatures.match(content, headers)
             
-            detected_frameworks = []
+            detected_frameworks = matches.names('cms', 'framework', 'javascript-framework')
             client_safe_frameworks = []  # For client reports
             
-            for framework, signatures in frameworks.items():
-                for signature in signatures:
-                    if signature.lower() in content.lower():
-                        detected_frameworks.append(framework)
-                        # Hide sensitive internal frameworks from client reports
-                        if framework not in ['Django', 'Laravel', 'Flask']:
-                            client_safe_frameworks.append(framework)
-                        else:
-                            # Replace with generic terms for client reports
-                            if framework == 'Django':
-                                client_safe_frameworks.append('Web Application Framework')
-                            elif framework == 'Laravel':
-                                client_safe_frameworks.append('PHP Framework')
-                        break
+            for framework in detected_frameworks:
+                # Hide sensitive internal frameworks from client reports
+                if framework not in ['Django', 'Laravel', 'Flask']:
+                    client_safe_frameworks.append(framework)
+                else:
+                    # Replace with generic terms for client reports
+                    if framework == 'Django':
+                        client_safe_frameworks.append('Web Application Framework')
+                    elif framework == 'Laravel':
+                        client_safe_frameworks.append('PHP Framework')
             
             tech_results['frameworks'] = detected_frameworks  # Internal use
             tech_results['client_frameworks'] = client_safe_frameworks  # Client reports
+            tech_results['versions'] = matches.versions
             
             # JavaScript libraries detection
-            js_libraries = {
-                'jQuery': ['jquery', '$.fn.jquery'],
-                'Bootstrap': ['bootstrap', 'btn-'],
-                'Font Awesome': ['font-awesome', 'fa-'],
-                'Google Analytics': ['google-analytics', 'gtag'],
-                'Cloudflare': ['cloudflare', '__cf_bm']
-            }
-            
-            detected_libraries = []
-            for library, signatures in js_libraries.items():
-                for signature in signatures:
-                    if signature.lower() in content.lower():
-                        detected_libraries.append(library)
-                        break
+            detected_libraries = matches.names('javascript')
             
             tech_results['javascript_libraries'] = detected_libraries
             
@@ -499,7 +515,7 @@ class AdvancedSecurityScanner:
         headers_results = {}
         
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.get_homepage()
             headers = response.headers
             
             # Security headers checklist
@@ -585,7 +601,7 @@ class AdvancedSecurityScanner:
             
             for payload in payloads:
                 test_url = f"{self.target_url}?id={payload}"
-                response = requests.get(test_url, timeout=5)
+                response = self.session.get(test_url, timeout=5)
                 
                 # Look for SQL error messages
                 sql_errors = ['mysql_fetch_array', 'ORA-', 'Microsoft OLE DB', 'PostgreSQL']
@@ -607,7 +623,7 @@ class AdvancedSecurityScanner:
         try:
             xss_payload = "<script>alert('XSS')</script>"
             test_url = f"{self.target_url}?search={xss_payload}"
-            response = requests.get(test_url, timeout=5)
+            response = self.session.get(test_url, timeout=5)
             
             if xss_payload in response.text:
                 self.findings.append(SecurityFinding(
@@ -627,7 +643,7 @@ class AdvancedSecurityScanner:
             
             for payload in traversal_payloads:
                 test_url = f"{self.target_url}?file={payload}"
-                response = requests.get(test_url, timeout=5)
+                response = self.session.get(test_url, timeout=5)
                 
                 if 'root:' in response.text or '[drivers]' in response.text:
                     self.findings.append(SecurityFinding(
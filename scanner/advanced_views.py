@@ -3,6 +3,7 @@ Advanced Views for Enhanced Security Scanning
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
@@ -11,8 +12,14 @@ from django.core.paginator import Paginator
 import json
 import time
 from datetime import datetime
-from .models import SecurityScan, AdvancedSecurityScan, DataBreachCheck, SecurityFinding, VulnerabilityDatabase, ThreatIntelligence, ScanReport
+from .models import SecurityScan, AdvancedSecurityScan, DataBreachCheck, SecurityFinding, VulnerabilityDatabase, ThreatIntelligence, ScanReport, ScanConfiguration
 from .p4_security_scanner import P4SecurityScanner
+from .deadline import DEFAULT_SCAN_TIMEOUT, scan_deadline
+from .incremental import INCREMENTAL_MAX_AGE, PreviousScan, stored_fingerprint
+from .job_queue import enqueue
+from .search import search
+from .vulnerability_db import CVERepository
+from . import http_client
 from django.utils import timezone
 from datetime import datetime, timedelta
 import threading
@@ -42,15 +49,15 @@ except ImportError:
 def advanced_scan_dashboard(request):
     """Advanced security scanning dashboard"""
     # Get recent scans
-    recent_scans = AdvancedSecurityScan.objects.all()[:10]
+    recent_scans = AdvancedSecurityScan.objects.advanced()[:10]
     
     # Get statistics
-    total_scans = AdvancedSecurityScan.objects.count()
+    total_scans = AdvancedSecurityScan.objects.advanced().count()
     critical_findings = SecurityFinding.objects.filter(severity='critical').count()
     high_findings = SecurityFinding.objects.filter(severity='high').count()
     
     # Risk distribution
-    risk_distribution = AdvancedSecurityScan.objects.values('risk_level').annotate(
+    risk_distribution = AdvancedSecurityScan.objects.advanced().values('risk_level').annotate(
         count=Count('risk_level')
     )
     
@@ -83,16 +90,26 @@ def start_advanced_scan(request):
             url = 'https://' + url
         
         try:
-            # Create scan record
-            scan = AdvancedSecurityScan.objects.create(
-                url=url,
-                domain=url.split('/')[2] if '://' in url else url
+            # Queue the scan for `manage.py scan_worker`; the results page
+            # shows its progress until the job finishes
+            scan = enqueue(
+                url,
+                configuration_id=request.POST.get('configuration_id'),
+                incremental=request.POST.get('incremental') in ('1', 'true', 'on'),
+                force_refresh=request.POST.get('force_refresh') in ('1', 'true', 'on'),
             )
             
-            # Start background scan (in production, use Celery)
-            scan_results = perform_advanced_scan(url, scan.id)
-            
-            messages.success(request, f'Advanced scan completed for {url}')
+            cache_status = scan.cache_status['status']
+            if cache_status == 'hit':
+                minutes = scan.cache_status['age'] // 60
+                messages.info(request, f'Showing the scan of {url} from {minutes} minutes ago; '
+                                       f'tick "Force fresh scan" to scan it again')
+            elif cache_status == 'joined':
+                messages.info(request, f'A scan of {url} is already in progress (job #{scan.id}); showing it')
+            elif scan.is_pending:
+                messages.info(request, f'Advanced scan queued for {url} (job #{scan.id})')
+            else:
+                messages.success(request, f'Advanced scan completed for {url}')
             return redirect('advanced_scan_results', scan_id=scan.id)
             
         except Exception as e:
@@ -101,8 +118,39 @@ def start_advanced_scan(request):
     
     return redirect('advanced_dashboard')
 
-def perform_advanced_scan(url, scan_id):
-    """Perform the actual advanced security scan"""
+def get_scan_configuration(configuration_id=None):
+    """Return the requested ScanConfiguration, else the default profile (or None)"""
+    if configuration_id:
+        configuration = ScanConfiguration.objects.filter(id=configuration_id).first()
+        if configuration:
+            return configuration
+    return ScanConfiguration.objects.filter(is_default=True).first()
+
+def get_scan_timeout(configuration=None):
+    """Seconds a scan may run under the given profile (or the default one)"""
+    if configuration is None:
+        configuration = get_scan_configuration()
+    return configuration.scan_timeout if configuration and configuration.scan_timeout else DEFAULT_SCAN_TIMEOUT
+
+def get_previous_scan(scan):
+    """Latest fingerprinted scan of the same domain to rescan against, if recent enough"""
+    cutoff = timezone.now() - timedelta(seconds=INCREMENTAL_MAX_AGE)
+    previous = (
+        AdvancedSecurityScan.objects
+        .filter(domain=scan.domain, scan_date__gte=cutoff, scan_fingerprint__has_key='inputs')
+        .exclude(id=scan.id)
+        .order_by('-scan_date')
+        .first()
+    )
+    return PreviousScan.from_scan(previous) if previous else None
+
+def perform_advanced_scan(url, scan_id, configuration=None, incremental=False, force_refresh=False):
+    """Perform the actual advanced security scan
+
+    incremental rescans against the domain's previous scan: phases whose
+    inputs have not changed carry that scan's results and findings forward.
+    force_refresh skips the cached DNS and SSL results.
+    """
     try:
         scan = AdvancedSecurityScan.objects.get(id=scan_id)
         start_time = time.time()
@@ -119,11 +167,17 @@ def perform_advanced_scan(url, scan_id):
         if AdvancedSecurityScanner is None:
             raise Exception("Advanced scanner not available")
         
-        # Initialize advanced scanner
-        scanner = AdvancedSecurityScanner(url)
+        # Initialize advanced scanner with the profile's port range
+        if configuration is None:
+            configuration = get_scan_configuration()
+        port_scan_range = configuration.port_scan_range if configuration else None
         
-        # Perform comprehensive scan
-        results = scanner.comprehensive_scan()
+        # Perform comprehensive scan; phases still running when the profile's
+        # scan_timeout runs out are cut off and the scan is marked incomplete
+        previous = get_previous_scan(scan) if incremental else None
+        with scan_deadline(get_scan_timeout(configuration)):
+            scanner = AdvancedSecurityScanner(url, port_scan_range=port_scan_range, force_refresh=force_refresh)
+            results = scanner.comprehensive_scan(previous=previous)
         
         # Update scan record with results (ensure all fields are dicts)
         scan.ip_address = results.get('results', {}).get('dns', {}).get('ip_address')
@@ -140,7 +194,8 @@ def perform_advanced_scan(url, scan_id):
         scan.security_score = results.get('security_score', 0)
         scan.risk_level = results.get('risk_level', 'unknown')
         scan.scan_duration = time.time() - start_time
-        scan.status = 'completed'
+        scan.status = 'incomplete' if results.get('scan_incomplete') else 'completed'
+        scan.scan_fingerprint = stored_fingerprint(results)
         
         # Process findings
         findings = results.get('findings', [])
@@ -164,7 +219,8 @@ def perform_advanced_scan(url, scan_id):
                     description=finding_data.get('description', ''),
                     recommendation=finding_data.get('recommendation', ''),
                     cve_id=finding_data.get('cve_id'),
-                    cvss_score=finding_data.get('cvss_score')
+                    cvss_score=finding_data.get('cvss_score'),
+                    phase=finding_data.get('phase') or ''
                 )
             except Exception as e:
                 print(f"Error creating finding: {str(e)}")
@@ -222,6 +278,9 @@ def perform_advanced_scan(url, scan_id):
 def advanced_scan_results(request, scan_id):
     """Display advanced scan results"""
     scan = get_object_or_404(AdvancedSecurityScan, id=scan_id)
+    if scan.is_pending or scan.status == 'failed':
+        return render(request, 'scanner/advanced_results.html', {'scan': scan})
+    
     findings = scan.findings.all()
     
     # Paginate findings
@@ -284,32 +343,52 @@ def api_advanced_scan(request):
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            # Create scan record
-            scan = AdvancedSecurityScan.objects.create(
-                url=url,
-                domain=url.split('/')[2] if '://' in url else url
+            # Queue the scan and return its job id; poll status_url for the outcome
+            scan = enqueue(
+                url,
+                configuration_id=data.get('configuration_id'),
+                incremental=bool(data.get('incremental')),
+                force_refresh=bool(data.get('force_refresh')),
             )
             
-            # Perform scan
-            results = perform_advanced_scan(url, scan.id)
-            
-            # Return results
-            return JsonResponse({
-                'scan_id': scan.id,
-                'url': url,
-                'security_score': scan.security_score,
-                'risk_level': scan.risk_level,
-                'total_findings': scan.total_findings,
-                'critical_findings': scan.critical_findings,
-                'high_findings': scan.high_findings,
-                'results': results
-            })
+            return JsonResponse(scan_job_status(scan), status=202 if scan.is_pending else 200)
             
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
     return JsonResponse({'error': 'Only POST method allowed'}, status=405)
 
+def scan_job_status(scan):
+    """Job state of a queued scan, with its summary once it has run"""
+    status = {
+        'scan_id': scan.id,
+        'job_id': scan.id,
+        'url': scan.url,
+        'scan_type': scan.scan_type,
+        'status': scan.status,
+        'attempts': scan.attempts,
+        'status_url': reverse('api_scan_job_status', args=[scan.id]),
+    }
+    if scan.last_error:
+        status['last_error'] = scan.last_error
+    if hasattr(scan, 'cache_status'):
+        status['cache'] = scan.cache_status
+    if scan.status in ('completed', 'incomplete'):
+        status.update({
+            'security_score': scan.security_score,
+            'risk_level': scan.risk_level,
+            'total_findings': scan.total_findings,
+            'critical_findings': scan.critical_findings,
+            'high_findings': scan.high_findings,
+            'scan_duration': scan.scan_duration,
+        })
+    return status
+
+def api_scan_job_status(request, scan_id):
+    """Poll a queued scan"""
+    scan = get_object_or_404(AdvancedSecurityScan, id=scan_id)
+    return JsonResponse(scan_job_status(scan))
+
 def vulnerability_database_view(request):
     """View vulnerability database"""
     search_query = request.GET.get('search', '')
@@ -317,10 +396,7 @@ def vulnerability_database_view(request):
     vulnerabilities = VulnerabilityDatabase.objects.all()
     
     if search_query:
-        vulnerabilities = vulnerabilities.filter(
-            Q(cve_id__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        vulnerabilities = search(vulnerabilities, search_query)
     
     # Paginate results
     paginator = Paginator(vulnerabilities, 25)
@@ -562,7 +638,7 @@ def scan_configurations(request):
 
 def advanced_scan_history(request):
     """View advanced scan history with filtering"""
-    scans = AdvancedSecurityScan.objects.all()
+    scans = AdvancedSecurityScan.objects.advanced()
     
     # Filter by risk level
     risk_level = request.GET.get('risk_level')
@@ -578,12 +654,13 @@ def advanced_scan_history(request):
     if date_to:
         scans = scans.filter(scan_date__lte=date_to)
     
-    # Search by URL/domain
+    # Search by URL/domain or finding title/description
     search_query = request.GET.get('search')
     if search_query:
+        matching_findings = search(SecurityFinding.objects.all(), search_query, ranked=False)
         scans = scans.filter(
-            Q(url__icontains=search_query) |
-            Q(domain__icontains=search_query)
+            Q(pk__in=search(AdvancedSecurityScan.objects.all(), search_query, ranked=False).values('pk')) |
+            Q(pk__in=matching_findings.values('scan_id'))
         )
     
     # Paginate results
@@ -608,7 +685,7 @@ def security_analytics(request):
     thirty_days_ago = timezone.now() - timedelta(days=30)
     
     # Scan statistics
-    recent_scans = AdvancedSecurityScan.objects.filter(scan_date__gte=thirty_days_ago)
+    recent_scans = AdvancedSecurityScan.objects.advanced().filter(scan_date__gte=thirty_days_ago)
     total_recent_scans = recent_scans.count()
     
     # Risk level distribution
@@ -628,13 +705,12 @@ def security_analytics(request):
         count=Count('title')
     ).order_by('-count')[:10]
     
-    # Vulnerability database statistics
+    # Vulnerability database statistics, as the scanners see them
+    cve_stats = CVERepository().get_vulnerability_statistics(recent_days=30)
     vuln_stats = {
-        'total_cves': VulnerabilityDatabase.objects.count(),
-        'high_severity': VulnerabilityDatabase.objects.filter(cvss_score__gte=7.0).count(),
-        'recent_cves': VulnerabilityDatabase.objects.filter(
-            cached_date__gte=thirty_days_ago
-        ).count()
+        'total_cves': cve_stats['total_vulnerabilities'],
+        'high_severity': cve_stats['high_severity_count'],
+        'recent_cves': cve_stats['recent_vulnerabilities']
     }
     
     context = {
@@ -653,13 +729,13 @@ def analytics_api_data(request):
     try:
         # Get current counts with some random variation to simulate real-time changes
         thirty_days_ago = timezone.now() - timedelta(days=30)
-        seven_days_ago = timezone.now() - timedelta(days=7)
         
         # Base counts from database
-        base_scans = AdvancedSecurityScan.objects.filter(scan_date__gte=thirty_days_ago).count()
-        base_high_cves = VulnerabilityDatabase.objects.filter(cvss_score__gte=7.0).count()
-        base_total_cves = VulnerabilityDatabase.objects.count()
-        base_recent_cves = VulnerabilityDatabase.objects.filter(cached_date__gte=seven_days_ago).count()
+        base_scans = AdvancedSecurityScan.objects.advanced().filter(scan_date__gte=thirty_days_ago).count()
+        cve_stats = CVERepository().get_vulnerability_statistics(recent_days=7)
+        base_high_cves = cve_stats['high_severity_count']
+        base_total_cves = cve_stats['total_vulnerabilities']
+        base_recent_cves = cve_stats['recent_vulnerabilities']
         
         # Add small random variations to simulate real-time activity
         total_scans = base_scans + random.randint(0, 5)
@@ -706,9 +782,18 @@ def p4_security_scan(request):
             total_vulnerabilities = sum(len(issues) for issues in results.values() if issues)
             categories_affected = sum(1 for issues in results.values() if issues)
             
+            # Per-category issues and timing, in scan order
+            categories = [
+                dict(scanner.category_timings[key], key=key, issues_list=results[key])
+                for key, _, _ in P4SecurityScanner.CATEGORIES
+            ]
+            
             context = {
                 'target_url': target_url,
                 'results': results,
+                'categories': categories,
+                'scan_incomplete': scanner.scan_incomplete,
+                'host_status': http_client.host_status(target_url),
                 'total_vulnerabilities': total_vulnerabilities,
                 'categories_affected': categories_affected,
                 'scan_duration': scan_duration,
@@ -17,6 +17,7 @@ api_urlpatterns = [
     path('scan/advanced/', api_views.api_advanced_scan, name='api_advanced_scan'),
     path('scan/budget/', api_views.api_budget_scan, name='api_budget_scan'),
     path('scan/p4/', api_views.api_p4_scan, name='api_p4_scan'),
+    path('scan/bulk/', api_views.api_bulk_scan, name='api_bulk_scan'),
     
     # Data breach checking
     path('breach/check/', api_views.api_breach_check, name='api_breach_check'),
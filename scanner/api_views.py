@@ -7,10 +7,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
+import itertools
 import json
 from datetime import datetime
 
@@ -19,7 +20,12 @@ from .serializers import (
     SecurityScanSerializer, AdvancedSecurityScanSerializer, 
     SecurityFindingSerializer, DataBreachCheckSerializer
 )
-from .advanced_views import perform_advanced_scan
+from .advanced_views import scan_job_status
+from .job_queue import enqueue
+from .bulk_scan import (
+    DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, MAX_REQUEST_URLS, REQUEST_TIME_BUDGET, BulkScanner, ndjson, normalize_urls,
+    request_scan_timeout,
+)
 from .views import scan_website, check_breach
 from .budget_scanner import BudgetSecurityScanner, generate_budget_report
 from .p4_security_scanner import P4SecurityScanner
@@ -77,7 +83,7 @@ def api_stats(request):
         # Basic counts
         scans = SecurityScan.objects.all()
         total_scans = scans.count()
-        advanced_scans = AdvancedSecurityScan.objects.count()
+        advanced_scans = AdvancedSecurityScan.objects.advanced().count()
         total_findings = SecurityFinding.objects.count()
         breach_checks = DataBreachCheck.objects.count()
         
@@ -154,7 +160,7 @@ def api_basic_scan(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def api_advanced_scan(request):
-    """Perform advanced security scan via API"""
+    """Queue an advanced security scan via API"""
     try:
         data = json.loads(request.body)
         url = data.get('url')
@@ -164,31 +170,20 @@ def api_advanced_scan(request):
                 'error': 'URL is required'
             }, status=400)
         
-        # Create scan record
-        scan = AdvancedSecurityScan.objects.create(
-            url=url,
-            domain=url.split('/')[2] if '://' in url else url
-        )
-        
-        # Perform scan
-        scan_results = perform_advanced_scan(url, scan.id)
+        # Queue the scan; scan_worker runs it and status_url reports progress
+        scan = enqueue(url, incremental=bool(data.get('incremental')), force_refresh=bool(data.get('force_refresh')))
         
-        if 'error' in scan_results:
+        if scan.status == 'failed':
             return Response({
-                'error': scan_results['error']
+                'error': scan.last_error
             }, status=500)
         
-        # Get updated scan with findings
-        scan.refresh_from_db()
-        serializer = AdvancedSecurityScanSerializer(scan)
-        
         return Response({
             'success': True,
-            'scan_id': scan.id,
-            'scan_data': serializer.data,
-            'results': scan_results,
+            **scan_job_status(scan),
+            'scan_data': AdvancedSecurityScanSerializer(scan).data,
             'timestamp': datetime.now().isoformat()
-        })
+        }, status=202 if scan.is_pending else 200)
         
     except json.JSONDecodeError:
         return Response({
@@ -272,6 +267,60 @@ def api_p4_scan(request):
             'error': str(e)
         }, status=500)
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def api_bulk_scan(request):
+    """Scan many URLs, streaming one NDJSON line per URL as each scan finishes
+    
+    Body: {"urls": [...], "scan_type": "basic"|"budget", "concurrency": 16, "per_host": 2,
+    "force_refresh": false}, or a plain-text list with one URL per line.
+    At most MAX_REQUEST_URLS URLs, and the whole stream finishes within
+    REQUEST_TIME_BUDGET (below the worker timeout): scan timeouts shrink
+    with the rounds of scans needed, and batches needing too many rounds
+    are refused. Run `manage.py bulk_scan` for larger lists.
+    """
+    try:
+        if request.content_type.split(';')[0].strip() == 'text/plain':
+            data = {'urls': request.body.decode('utf-8', errors='replace').splitlines()}
+        else:
+            data = json.loads(request.body)
+        
+        urls, invalid = normalize_urls(data.get('urls') or [])
+        if not urls:
+            return Response({
+                'error': 'At least one URL is required'
+            }, status=400)
+        if len(urls) > MAX_REQUEST_URLS:
+            return Response({
+                'error': f'At most {MAX_REQUEST_URLS} URLs per request; use the bulk_scan command for more'
+            }, status=400)
+        
+        scanner = BulkScanner(
+            scan_type=data.get('scan_type', 'basic'),
+            concurrency=int(data.get('concurrency', DEFAULT_CONCURRENCY)),
+            per_host=int(data.get('per_host', DEFAULT_PER_HOST)),
+            force_refresh=bool(data.get('force_refresh')),
+            time_budget=REQUEST_TIME_BUDGET,
+        )
+        scanner.scan_timeout = request_scan_timeout(urls, scanner.concurrency, scanner.per_host)
+        
+    except json.JSONDecodeError:
+        return Response({
+            'error': 'Invalid JSON data'
+        }, status=400)
+    except (TypeError, ValueError) as e:
+        return Response({
+            'error': str(e)
+        }, status=400)
+    
+    response = StreamingHttpResponse(
+        ndjson(itertools.chain(invalid, scanner.run(urls))),
+        content_type='application/x-ndjson'
+    )
+    response['X-Accel-Buffering'] = 'no'  # let proxies pass lines through as they come
+    return response
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -353,7 +402,7 @@ def api_scan_history(request):
     try:
         # Get recent scans
         recent_scans = SecurityScan.objects.all().order_by('-scan_date')[:20]
-        recent_advanced = AdvancedSecurityScan.objects.all().order_by('-scan_date')[:20]
+        recent_advanced = AdvancedSecurityScan.objects.advanced().order_by('-scan_date')[:20]
         
         basic_serializer = SecurityScanSerializer(recent_scans, many=True)
         advanced_serializer = AdvancedSecurityScanSerializer(recent_advanced, many=True)
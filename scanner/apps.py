@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    """WAL lets scans read and write while a long write (an NVD import) runs"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
 
 
 class ScannerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scanner'
+
+    def ready(self):
+        # Share cached DNS answers across every scanner's HTTP sessions
+        if getattr(settings, 'SCANNER_DNS_CACHE', True):
+            from .dns_resolver import install
+            install()
+
+        if getattr(settings, 'SQLITE_WAL', True):
+            connection_created.connect(enable_sqlite_wal)
+
+        # Migrations that rebuild a table on SQLite drop its full-text triggers
+        from .search import repair_search_indexes
+        post_migrate.connect(repair_search_indexes, sender=self)
@@ -9,9 +9,16 @@ import re
 import urllib.parse
 from bs4 import BeautifulSoup
 import time
+from datetime import datetime
 from typing import List, Dict, Any
 from dataclasses import dataclass
 
+from . import http_client
+from .http_client import create_client
+from .probe_engine import EXISTS, Probe, ProbeEngine, ProbeResult
+from . import signatures
+from .deadline import DEFAULT_SCAN_TIMEOUT, DeadlineExceeded, scan_deadline
+
 @dataclass
 class BudgetFinding:
     severity: str = "low"  # P4 category - low severity but easy to find
@@ -26,38 +33,63 @@ class BudgetFinding:
 class BudgetSecurityScanner:
     """Scanner focused on easy-to-find P4 vulnerabilities for budget researchers"""
     
-    def __init__(self, target_url: str):
+    def __init__(self, target_url: str, scan_deadline: float = DEFAULT_SCAN_TIMEOUT):
         self.target_url = target_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ZtionSec-BudgetScanner/1.0'
-        })
+        self.scan_deadline = scan_deadline  # seconds for the whole scan
+        self.scan_incomplete = False
+        self.host_status = 'unknown'  # 'unresponsive' once repeated timeouts opened the host's circuit
+        self.session = create_client(user_agent='ZtionSec-BudgetScanner/1.0')
         # Set reasonable timeouts to prevent worker timeouts
         self.session.timeout = 5
+        self.probe_engine = ProbeEngine(self.session, timeout=5)
+        self._responses: Dict[str, ProbeResult] = {}
         self.findings: List[BudgetFinding] = []
         
     def scan_all_budget_issues(self) -> List[BudgetFinding]:
         """Scan for all budget-friendly P4 vulnerabilities"""
         print(f"🔍 Starting budget security scan for {self.target_url}")
         
-        # Easy information disclosure issues
-        self.check_directory_listing()
-        self.check_backup_files()
-        self.check_config_files()
-        self.check_debug_information()
-        self.check_version_disclosure()
-        self.check_email_disclosure()
-        self.check_path_disclosure()
-        self.check_server_status_pages()
-        self.check_robots_txt_secrets()
-        self.check_sitemap_information()
-        self.check_comments_disclosure()
-        self.check_error_pages()
-        self.check_admin_panels()
-        self.check_test_files()
-        self.check_development_files()
+        checks = [
+            # Easy information disclosure issues
+            self.check_directory_listing,
+            self.check_backup_files,
+            self.check_config_files,
+            self.check_debug_information,
+            self.check_version_disclosure,
+            self.check_email_disclosure,
+            self.check_path_disclosure,
+            self.check_server_status_pages,
+            self.check_robots_txt_secrets,
+            self.check_sitemap_information,
+            self.check_comments_disclosure,
+            self.check_error_pages,
+            self.check_admin_panels,
+            self.check_test_files,
+            self.check_development_files,
+        ]
+        
+        with scan_deadline(self.scan_deadline) as deadline:
+            try:
+                # Fetch every candidate URL of every check in one concurrent batch;
+                # probes still pending at the deadline fail fast instead of waiting
+                self._responses = self.probe_engine.run(self._all_probes())
+                
+                for check in checks:
+                    if deadline is not None:
+                        deadline.check()
+                    check()
+            except DeadlineExceeded:
+                self.scan_incomplete = True
+        
+        self.host_status = http_client.host_status(self.target_url)
+        if self.host_status == 'unresponsive':
+            self.scan_incomplete = True
+            print(f"⛔ {self.target_url} is not responding; remaining probes were skipped")
         
-        print(f"✅ Budget scan completed. Found {len(self.findings)} easy issues!")
+        if self.scan_incomplete:
+            print(f"⏱️ Budget scan incomplete. Found {len(self.findings)} easy issues so far")
+        else:
+            print(f"✅ Budget scan completed. Found {len(self.findings)} easy issues!")
         
         # Cleanup session to free memory
         self.cleanup()
@@ -67,43 +99,82 @@ class BudgetSecurityScanner:
     def cleanup(self):
         """Clean up resources to free memory"""
         try:
+            self._responses = {}
             if hasattr(self, 'session'):
                 self.session.close()
         except Exception:
             pass
     
-    def check_directory_listing(self):
-        """Check for directory listing vulnerabilities"""
+    def _all_probes(self) -> List[Probe]:
+        """Candidate URLs of every check, gathered up front"""
+        return (
+            self._directory_listing_probes()
+            + self._backup_file_probes()
+            + self._config_file_probes()
+            + self._debug_information_probes()
+            + self._homepage_probes()
+            + self._path_disclosure_probes()
+            + self._server_status_probes()
+            + self._robots_txt_probes()
+            + self._sitemap_probes()
+            + self._error_page_probes()
+            + self._admin_panel_probes()
+            + self._test_file_probes()
+            + self._development_file_probes()
+        )
+    
+    def _probe_results(self, probes: List[Probe]):
+        """Yield the ProbeResult of each probe that got a response
+        
+        Uses the batch fetched by scan_all_budget_issues; anything not in it
+        (a check called on its own) is fetched through the probe engine.
+        """
+        missing = [probe for probe in probes if probe.url not in self._responses]
+        if missing:
+            self._responses.update(self.probe_engine.run(missing))
+        
+        for probe in probes:
+            result = self._responses.get(probe.url)
+            if result is not None and result.ok:
+                yield result
+    
+    def _probe(self, probes: List[Probe]):
+        """Yield (url, response) for each probe that got a response"""
+        for result in self._probe_results(probes):
+            yield result.url, result.response
+    
+    def _homepage_probes(self) -> List[Probe]:
+        return [Probe(self.target_url, timeout=10)]
+    
+    def _directory_listing_probes(self) -> List[Probe]:
         common_dirs = [
             '/admin/', '/backup/', '/config/', '/test/', '/dev/',
             '/uploads/', '/files/', '/images/', '/docs/', '/temp/',
             '/cache/', '/logs/', '/includes/', '/assets/', '/static/'
         ]
-        
-        for directory in common_dirs:
-            try:
-                url = urllib.parse.urljoin(self.target_url, directory)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    # Check for directory listing indicators
-                    if any(indicator in response.text.lower() for indicator in [
-                        'index of', 'directory listing', 'parent directory',
-                        '<title>index of', 'apache', 'nginx'
-                    ]):
-                        self.findings.append(BudgetFinding(
-                            title=f"Directory Listing Enabled - {directory}",
-                            description=f"Directory listing is enabled for {directory}, exposing internal structure",
-                            recommendation="Disable directory listing in web server configuration",
-                            proof_of_concept=f"GET {url} returns directory contents",
-                            bounty_potential="$50-200",
-                            category="information_disclosure"
-                        ))
-            except:
-                continue
+        listing = signatures.indicator('directory_listing')
+        return [
+            Probe(urllib.parse.urljoin(self.target_url, directory), until=listing.search)
+            for directory in common_dirs
+        ]
     
-    def check_backup_files(self):
-        """Check for backup files that might contain sensitive information"""
+    def check_directory_listing(self):
+        """Check for directory listing vulnerabilities"""
+        for url, response in self._probe(self._directory_listing_probes()):
+            if response.status_code == 200:
+                # Check for directory listing indicators
+                if signatures.indicator('directory_listing').search(response.text):
+                    directory = urllib.parse.urlparse(url).path
+                    self.findings.append(BudgetFinding(
+                        title=f"Directory Listing Enabled - {directory}",
+                        description=f"Directory listing is enabled for {directory}, exposing internal structure",
+                        recommendation="Disable directory listing in web server configuration",
+                        proof_of_concept=f"GET {url} returns directory contents",
+                        bounty_potential="$50-200",
+                        category="information_disclosure"
+                    ))
+    
+    def _backup_file_probes(self) -> List[Probe]:
         base_url = self.target_url.rstrip('/')
         backup_extensions = [
             '.bak', '.backup', '.old', '.orig', '.copy', '.tmp',
@@ -115,87 +186,80 @@ class BudgetSecurityScanner:
             'user', 'users', 'password', 'passwords', 'secret', 'secrets'
         ]
         
-        for file_name in common_files:
-            for ext in backup_extensions:
-                try:
-                    test_url = f"{base_url}/{file_name}{ext}"
-                    response = self.session.get(test_url, timeout=3)
-                    
-                    if response.status_code == 200 and len(response.content) > 100:
-                        self.findings.append(BudgetFinding(
-                            title=f"Backup File Exposed - {file_name}{ext}",
-                            description=f"Backup file {file_name}{ext} is publicly accessible",
-                            recommendation="Remove backup files from web-accessible directories",
-                            proof_of_concept=f"GET {test_url} returns {len(response.content)} bytes",
-                            bounty_potential="$100-500",
-                            category="information_disclosure"
-                        ))
-                except:
-                    continue
+        return [
+            # Only existence and size matter: never download the archive itself
+            Probe(f"{base_url}/{file_name}{ext}", timeout=3, method=EXISTS)
+            for file_name in common_files
+            for ext in backup_extensions
+        ]
     
-    def check_config_files(self):
-        """Check for exposed configuration files"""
+    def check_backup_files(self):
+        """Check for backup files that might contain sensitive information"""
+        for result in self._probe_results(self._backup_file_probes()):
+            test_url = result.url
+            if result.response.status_code in (200, 206) and (result.size or 0) > 100:
+                file_name = test_url.rsplit('/', 1)[-1]
+                self.findings.append(BudgetFinding(
+                    title=f"Backup File Exposed - {file_name}",
+                    description=f"Backup file {file_name} is publicly accessible",
+                    recommendation="Remove backup files from web-accessible directories",
+                    proof_of_concept=f"GET {test_url} returns {result.size} bytes",
+                    bounty_potential="$100-500",
+                    category="information_disclosure"
+                ))
+    
+    def _config_file_probes(self) -> List[Probe]:
         config_files = [
             '.env', '.env.local', '.env.production', 'config.php', 'config.json',
             'web.config', 'app.config', 'database.yml', 'settings.py',
             'wp-config.php', 'configuration.php', '.htaccess', '.htpasswd'
         ]
-        
-        for config_file in config_files:
-            try:
-                url = urllib.parse.urljoin(self.target_url, config_file)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    # Check for configuration indicators
-                    sensitive_patterns = [
-                        'password', 'secret', 'key', 'token', 'api_key',
-                        'database', 'mysql', 'postgres', 'mongodb'
-                    ]
-                    
-                    if any(pattern in response.text.lower() for pattern in sensitive_patterns):
-                        self.findings.append(BudgetFinding(
-                            title=f"Configuration File Exposed - {config_file}",
-                            description=f"Configuration file {config_file} contains sensitive information",
-                            recommendation="Move configuration files outside web root or restrict access",
-                            proof_of_concept=f"GET {url} exposes configuration data",
-                            bounty_potential="$200-1000",
-                            category="information_disclosure"
-                        ))
-            except:
-                continue
+        secrets = signatures.indicator('config_secrets')
+        return [
+            Probe(urllib.parse.urljoin(self.target_url, config_file), until=secrets.search)
+            for config_file in config_files
+        ]
     
-    def check_debug_information(self):
-        """Check for debug information disclosure"""
-        debug_params = ['debug=1', 'debug=true', 'test=1', 'dev=1']
-        
-        for param in debug_params:
-            try:
-                debug_url = f"{self.target_url}?{param}"
-                response = self.session.get(debug_url, timeout=5)
-                
-                debug_indicators = [
-                    'stack trace', 'error trace', 'debug info', 'var_dump',
-                    'print_r', 'exception', 'traceback', 'debug mode'
-                ]
-                
-                if any(indicator in response.text.lower() for indicator in debug_indicators):
+    def check_config_files(self):
+        """Check for exposed configuration files"""
+        for url, response in self._probe(self._config_file_probes()):
+            if response.status_code == 200:
+                # Check for configuration indicators
+                if signatures.indicator('config_secrets').search(response.text):
+                    config_file = url.rsplit('/', 1)[-1]
                     self.findings.append(BudgetFinding(
-                        title=f"Debug Information Disclosure - {param}",
-                        description=f"Debug parameter {param} exposes internal application details",
-                        recommendation="Disable debug mode in production and sanitize error messages",
-                        proof_of_concept=f"GET {debug_url} returns debug information",
-                        bounty_potential="$50-300",
+                        title=f"Configuration File Exposed - {config_file}",
+                        description=f"Configuration file {config_file} contains sensitive information",
+                        recommendation="Move configuration files outside web root or restrict access",
+                        proof_of_concept=f"GET {url} exposes configuration data",
+                        bounty_potential="$200-1000",
                         category="information_disclosure"
                     ))
-            except:
-                continue
+    
+    def _debug_information_probes(self) -> List[Probe]:
+        debug_params = ['debug=1', 'debug=true', 'test=1', 'dev=1']
+        debug_output = signatures.indicator('debug_output')
+        return [Probe(f"{self.target_url}?{param}", until=debug_output.search) for param in debug_params]
+    
+    def check_debug_information(self):
+        """Check for debug information disclosure"""
+        debug_indicators = signatures.indicator('debug_output')
+        
+        for debug_url, response in self._probe(self._debug_information_probes()):
+            if debug_indicators.search(response.text):
+                param = debug_url.rsplit('?', 1)[-1]
+                self.findings.append(BudgetFinding(
+                    title=f"Debug Information Disclosure - {param}",
+                    description=f"Debug parameter {param} exposes internal application details",
+                    recommendation="Disable debug mode in production and sanitize error messages",
+                    proof_of_concept=f"GET {debug_url} returns debug information",
+                    bounty_potential="$50-300",
+                    category="information_disclosure"
+                ))
     
     def check_version_disclosure(self):
         """Check for version information disclosure"""
-        try:
-            response = self.session.get(self.target_url, timeout=10)
-            
+        for _, response in self._probe(self._homepage_probes()):
             # Check headers for version information
             version_headers = ['Server', 'X-Powered-By', 'X-AspNet-Version', 'X-Generator']
             
@@ -230,14 +294,10 @@ class BudgetSecurityScanner:
                         bounty_potential="$25-150",
                         category="information_disclosure"
                     ))
-        except:
-            pass
     
     def check_email_disclosure(self):
         """Check for email address disclosure"""
-        try:
-            response = self.session.get(self.target_url, timeout=10)
-            
+        for _, response in self._probe(self._homepage_probes()):
             # Find email addresses in the page
             email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
             emails = re.findall(email_pattern, response.text)
@@ -253,81 +313,72 @@ class BudgetSecurityScanner:
                         bounty_potential="$25-100",
                         category="information_disclosure"
                     ))
-        except:
-            pass
+    
+    def _path_disclosure_probes(self) -> List[Probe]:
+        # Try to trigger error pages that might reveal paths
+        error_urls = [
+            self.target_url + '/nonexistent-page-12345',
+            self.target_url + '/../../../etc/passwd',
+            self.target_url + '/admin/config.php'
+        ]
+        # Error pages are the point here: never drop them as soft 404s
+        return [Probe(url, baseline=False) for url in error_urls]
     
     def check_path_disclosure(self):
         """Check for internal path disclosure"""
-        try:
-            # Try to trigger error pages that might reveal paths
-            error_urls = [
-                self.target_url + '/nonexistent-page-12345',
-                self.target_url + '/../../../etc/passwd',
-                self.target_url + '/admin/config.php'
-            ]
-            
-            for url in error_urls:
-                response = self.session.get(url, timeout=5)
-                
-                # Look for path disclosure patterns
-                path_patterns = [
-                    r'(/var/www/[^\s<>"\']+)',
-                    r'(/home/[^\s<>"\']+)',
-                    r'(C:\\[^\s<>"\']+)',
-                    r'(/usr/[^\s<>"\']+)'
-                ]
-                
-                for pattern in path_patterns:
-                    matches = re.findall(pattern, response.text)
-                    if matches:
-                        self.findings.append(BudgetFinding(
-                            title="Internal Path Disclosure",
-                            description=f"Error page reveals internal server paths: {matches[0]}",
-                            recommendation="Configure custom error pages that don't reveal system paths",
-                            proof_of_concept=f"GET {url} reveals path: {matches[0]}",
-                            bounty_potential="$50-200",
-                            category="information_disclosure"
-                        ))
-                        break
-        except:
-            pass
+        # Look for path disclosure patterns
+        path_patterns = [
+            r'(/var/www/[^\s<>"\']+)',
+            r'(/home/[^\s<>"\']+)',
+            r'(C:\\[^\s<>"\']+)',
+            r'(/usr/[^\s<>"\']+)'
+        ]
+        
+        for url, response in self._probe(self._path_disclosure_probes()):
+            for pattern in path_patterns:
+                matches = re.findall(pattern, response.text)
+                if matches:
+                    self.findings.append(BudgetFinding(
+                        title="Internal Path Disclosure",
+                        description=f"Error page reveals internal server paths: {matches[0]}",
+                        recommendation="Configure custom error pages that don't reveal system paths",
+                        proof_of_concept=f"GET {url} reveals path: {matches[0]}",
+                        bounty_potential="$50-200",
+                        category="information_disclosure"
+                    ))
+                    break
     
-    def check_server_status_pages(self):
-        """Check for exposed server status pages"""
+    def _server_status_probes(self) -> List[Probe]:
         status_pages = [
             '/server-status', '/server-info', '/status', '/info.php',
             '/phpinfo.php', '/test.php', '/info', '/health', '/metrics'
         ]
+        server_status = signatures.indicator('server_status')
+        return [Probe(urllib.parse.urljoin(self.target_url, page), until=server_status.search) for page in status_pages]
+    
+    def check_server_status_pages(self):
+        """Check for exposed server status pages"""
+        status_indicators = signatures.indicator('server_status')
         
-        for page in status_pages:
-            try:
-                url = urllib.parse.urljoin(self.target_url, page)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    status_indicators = [
-                        'server status', 'apache status', 'nginx status',
-                        'phpinfo', 'server information', 'system info'
-                    ]
-                    
-                    if any(indicator in response.text.lower() for indicator in status_indicators):
-                        self.findings.append(BudgetFinding(
-                            title=f"Server Status Page Exposed - {page}",
-                            description=f"Server status page {page} is publicly accessible",
-                            recommendation="Restrict access to server status pages or disable them",
-                            proof_of_concept=f"GET {url} returns server status information",
-                            bounty_potential="$100-400",
-                            category="information_disclosure"
-                        ))
-            except:
-                continue
+        for url, response in self._probe(self._server_status_probes()):
+            if response.status_code == 200:
+                if status_indicators.search(response.text):
+                    page = urllib.parse.urlparse(url).path
+                    self.findings.append(BudgetFinding(
+                        title=f"Server Status Page Exposed - {page}",
+                        description=f"Server status page {page} is publicly accessible",
+                        recommendation="Restrict access to server status pages or disable them",
+                        proof_of_concept=f"GET {url} returns server status information",
+                        bounty_potential="$100-400",
+                        category="information_disclosure"
+                    ))
+    
+    def _robots_txt_probes(self) -> List[Probe]:
+        return [Probe(urllib.parse.urljoin(self.target_url, '/robots.txt'))]
     
     def check_robots_txt_secrets(self):
         """Check robots.txt for interesting paths"""
-        try:
-            robots_url = urllib.parse.urljoin(self.target_url, '/robots.txt')
-            response = self.session.get(robots_url, timeout=5)
-            
+        for _, response in self._probe(self._robots_txt_probes()):
             if response.status_code == 200:
                 # Look for interesting disallowed paths
                 interesting_paths = []
@@ -336,10 +387,7 @@ class BudgetSecurityScanner:
                 for line in lines:
                     if line.strip().lower().startswith('disallow:'):
                         path = line.split(':', 1)[1].strip()
-                        if any(keyword in path.lower() for keyword in [
-                            'admin', 'config', 'backup', 'test', 'dev',
-                            'private', 'secret', 'internal', 'api'
-                        ]):
+                        if signatures.indicator('robots_sensitive').search(path):
                             interesting_paths.append(path)
                 
                 if interesting_paths:
@@ -351,50 +399,40 @@ class BudgetSecurityScanner:
                         bounty_potential="$50-250",
                         category="information_disclosure"
                     ))
-        except:
-            pass
+    
+    def _sitemap_probes(self) -> List[Probe]:
+        sitemap_files = ['/sitemap.xml', '/sitemap.txt', '/sitemap_index.xml']
+        return [Probe(urllib.parse.urljoin(self.target_url, sitemap)) for sitemap in sitemap_files]
     
     def check_sitemap_information(self):
         """Check sitemap files for information disclosure"""
-        sitemap_files = ['/sitemap.xml', '/sitemap.txt', '/sitemap_index.xml']
-        
-        for sitemap in sitemap_files:
-            try:
-                url = urllib.parse.urljoin(self.target_url, sitemap)
-                response = self.session.get(url, timeout=5)
+        for url, response in self._probe(self._sitemap_probes()):
+            if response.status_code == 200:
+                # Count URLs in sitemap
+                url_count = response.text.lower().count('<loc>') or response.text.count('http')
                 
-                if response.status_code == 200:
-                    # Count URLs in sitemap
-                    url_count = response.text.lower().count('<loc>') or response.text.count('http')
-                    
-                    if url_count > 100:  # Large sitemap
-                        self.findings.append(BudgetFinding(
-                            title=f"Large Sitemap Disclosure - {sitemap}",
-                            description=f"Sitemap contains {url_count} URLs, potentially revealing site structure",
-                            recommendation="Consider limiting sitemap size or using authentication",
-                            proof_of_concept=f"GET {url} returns {url_count} URLs",
-                            bounty_potential="$25-150",
-                            category="information_disclosure"
-                        ))
-            except:
-                continue
+                if url_count > 100:  # Large sitemap
+                    sitemap = urllib.parse.urlparse(url).path
+                    self.findings.append(BudgetFinding(
+                        title=f"Large Sitemap Disclosure - {sitemap}",
+                        description=f"Sitemap contains {url_count} URLs, potentially revealing site structure",
+                        recommendation="Consider limiting sitemap size or using authentication",
+                        proof_of_concept=f"GET {url} returns {url_count} URLs",
+                        bounty_potential="$25-150",
+                        category="information_disclosure"
+                    ))
     
     def check_comments_disclosure(self):
         """Check for sensitive information in HTML comments"""
-        try:
-            response = self.session.get(self.target_url, timeout=10)
-            
+        for _, response in self._probe(self._homepage_probes()):
             # Extract HTML comments
             comment_pattern = r'<!--(.*?)-->'
             comments = re.findall(comment_pattern, response.text, re.DOTALL)
             
-            sensitive_keywords = [
-                'password', 'secret', 'key', 'token', 'api', 'admin',
-                'todo', 'fixme', 'hack', 'temp', 'debug', 'test'
-            ]
+            sensitive_keywords = signatures.indicator('comment_secrets')
             
             for comment in comments:
-                if any(keyword in comment.lower() for keyword in sensitive_keywords):
+                if sensitive_keywords.search(comment):
                     self.findings.append(BudgetFinding(
                         title="Sensitive Information in HTML Comments",
                         description="HTML comments contain potentially sensitive information",
@@ -404,11 +442,8 @@ class BudgetSecurityScanner:
                         category="information_disclosure"
                     ))
                     break  # Only report once
-        except:
-            pass
     
-    def check_error_pages(self):
-        """Check for information disclosure in error pages"""
+    def _error_page_probes(self) -> List[Probe]:
         error_triggers = [
             '/admin/login.php',
             '/wp-admin/',
@@ -419,110 +454,98 @@ class BudgetSecurityScanner:
             '/.svn/',
             '/config.php'
         ]
+        error_disclosure = signatures.indicator('error_disclosure')
+        return [
+            Probe(urllib.parse.urljoin(self.target_url, trigger), until=error_disclosure.search, baseline=False)
+            for trigger in error_triggers
+        ]
+    
+    def check_error_pages(self):
+        """Check for information disclosure in error pages"""
+        # Look for detailed error messages
+        error_indicators = signatures.indicator('error_disclosure')
         
-        for trigger in error_triggers:
-            try:
-                url = urllib.parse.urljoin(self.target_url, trigger)
-                response = self.session.get(url, timeout=5)
-                
-                # Look for detailed error messages
-                error_indicators = [
-                    'mysql', 'postgresql', 'oracle', 'sql server',
-                    'stack trace', 'line number', 'file path',
-                    'exception', 'error in', 'fatal error'
-                ]
-                
-                if any(indicator in response.text.lower() for indicator in error_indicators):
-                    self.findings.append(BudgetFinding(
-                        title=f"Detailed Error Message - {trigger}",
-                        description="Error page reveals detailed system information",
-                        recommendation="Configure custom error pages with minimal information",
-                        proof_of_concept=f"GET {url} returns detailed error information",
-                        bounty_potential="$75-250",
-                        category="information_disclosure"
-                    ))
-            except:
-                continue
+        for url, response in self._probe(self._error_page_probes()):
+            if error_indicators.search(response.text):
+                trigger = urllib.parse.urlparse(url).path
+                self.findings.append(BudgetFinding(
+                    title=f"Detailed Error Message - {trigger}",
+                    description="Error page reveals detailed system information",
+                    recommendation="Configure custom error pages with minimal information",
+                    proof_of_concept=f"GET {url} returns detailed error information",
+                    bounty_potential="$75-250",
+                    category="information_disclosure"
+                ))
     
-    def check_admin_panels(self):
-        """Check for exposed admin panels"""
+    def _admin_panel_probes(self) -> List[Probe]:
         admin_paths = [
             '/admin', '/administrator', '/wp-admin', '/admin.php',
             '/admin/', '/control', '/panel', '/dashboard',
             '/manage', '/backend', '/cpanel'
         ]
+        admin_panel = signatures.indicator('admin_panel')
+        return [Probe(urllib.parse.urljoin(self.target_url, path), until=admin_panel.search) for path in admin_paths]
+    
+    def check_admin_panels(self):
+        """Check for exposed admin panels"""
+        admin_indicators = signatures.indicator('admin_panel')
         
-        for path in admin_paths:
-            try:
-                url = urllib.parse.urljoin(self.target_url, path)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    admin_indicators = [
-                        'login', 'username', 'password', 'admin panel',
-                        'dashboard', 'control panel', 'administration'
-                    ]
-                    
-                    if any(indicator in response.text.lower() for indicator in admin_indicators):
-                        self.findings.append(BudgetFinding(
-                            title=f"Admin Panel Accessible - {path}",
-                            description=f"Admin panel at {path} is publicly accessible",
-                            recommendation="Implement IP restrictions or additional authentication for admin panels",
-                            proof_of_concept=f"GET {url} returns admin interface",
-                            bounty_potential="$100-500",
-                            category="access_control"
-                        ))
-            except:
-                continue
+        for url, response in self._probe(self._admin_panel_probes()):
+            if response.status_code == 200:
+                if admin_indicators.search(response.text):
+                    path = urllib.parse.urlparse(url).path
+                    self.findings.append(BudgetFinding(
+                        title=f"Admin Panel Accessible - {path}",
+                        description=f"Admin panel at {path} is publicly accessible",
+                        recommendation="Implement IP restrictions or additional authentication for admin panels",
+                        proof_of_concept=f"GET {url} returns admin interface",
+                        bounty_potential="$100-500",
+                        category="access_control"
+                    ))
     
-    def check_test_files(self):
-        """Check for test files that might contain sensitive information"""
+    def _test_file_probes(self) -> List[Probe]:
         test_files = [
             'test.php', 'test.html', 'test.txt', 'debug.php',
             'info.php', 'phpinfo.php', 'test.jsp', 'test.asp'
         ]
-        
-        for test_file in test_files:
-            try:
-                url = urllib.parse.urljoin(self.target_url, test_file)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200 and len(response.content) > 50:
-                    self.findings.append(BudgetFinding(
-                        title=f"Test File Exposed - {test_file}",
-                        description=f"Test file {test_file} is publicly accessible",
-                        recommendation="Remove test files from production environment",
-                        proof_of_concept=f"GET {url} returns test content",
-                        bounty_potential="$50-200",
-                        category="information_disclosure"
-                    ))
-            except:
-                continue
+        return [Probe(urllib.parse.urljoin(self.target_url, test_file), method=EXISTS) for test_file in test_files]
     
-    def check_development_files(self):
-        """Check for development files"""
+    def check_test_files(self):
+        """Check for test files that might contain sensitive information"""
+        for result in self._probe_results(self._test_file_probes()):
+            url = result.url
+            if result.response.status_code in (200, 206) and (result.size or 0) > 50:
+                test_file = url.rsplit('/', 1)[-1]
+                self.findings.append(BudgetFinding(
+                    title=f"Test File Exposed - {test_file}",
+                    description=f"Test file {test_file} is publicly accessible",
+                    recommendation="Remove test files from production environment",
+                    proof_of_concept=f"GET {url} returns test content",
+                    bounty_potential="$50-200",
+                    category="information_disclosure"
+                ))
+    
+    def _development_file_probes(self) -> List[Probe]:
         dev_files = [
             '.git/config', '.svn/entries', '.DS_Store',
             'package.json', 'composer.json', 'Gemfile',
             'requirements.txt', 'yarn.lock', 'package-lock.json'
         ]
-        
-        for dev_file in dev_files:
-            try:
-                url = urllib.parse.urljoin(self.target_url, dev_file)
-                response = self.session.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    self.findings.append(BudgetFinding(
-                        title=f"Development File Exposed - {dev_file}",
-                        description=f"Development file {dev_file} reveals project structure",
-                        recommendation="Remove development files from production or restrict access",
-                        proof_of_concept=f"GET {url} returns development information",
-                        bounty_potential="$75-300",
-                        category="information_disclosure"
-                    ))
-            except:
-                continue
+        return [Probe(urllib.parse.urljoin(self.target_url, dev_file), method=EXISTS) for dev_file in dev_files]
+    
+    def check_development_files(self):
+        """Check for development files"""
+        for url, response in self._probe(self._development_file_probes()):
+            if response.status_code in (200, 206):
+                dev_file = url[len(urllib.parse.urljoin(self.target_url, '')):] or url
+                self.findings.append(BudgetFinding(
+                    title=f"Development File Exposed - {dev_file}",
+                    description=f"Development file {dev_file} reveals project structure",
+                    recommendation="Remove development files from production or restrict access",
+                    proof_of_concept=f"GET {url} returns development information",
+                    bounty_potential="$75-300",
+                    category="information_disclosure"
+                ))
 
 def generate_budget_report(findings: List[BudgetFinding]) -> Dict[str, Any]:
     """Generate a budget-friendly vulnerability report"""
@@ -549,3 +572,34 @@ def generate_budget_report(findings: List[BudgetFinding]) -> Dict[str, Any]:
         'time_investment': 'Low',
         'findings': [f.__dict__ for f in findings]
     }
+
+def run_budget_scan(target_url: str, scan_types: List[str] = None,
+                    scan_deadline: float = DEFAULT_SCAN_TIMEOUT) -> Dict[str, Any]:
+    """Scan target_url and return the results as the budget scanner page shows them"""
+    scanner = BudgetSecurityScanner(target_url, scan_deadline=scan_deadline)
+    budget_findings = scanner.scan_all_budget_issues()
+    
+    findings = [
+        {
+            'severity': finding.severity,
+            'category': finding.category.replace('_', ' ').title(),
+            'title': finding.title,
+            'description': finding.description,
+            'recommendation': finding.recommendation,
+            'proof_of_concept': finding.proof_of_concept,
+            'bounty_potential': finding.bounty_potential,
+            'difficulty': finding.difficulty
+        }
+        for finding in budget_findings
+    ]
+    
+    return {
+        'target_url': target_url,
+        'findings': findings,
+        'scan_time': datetime.now().isoformat(),
+        'total_findings': len(findings),
+        'scan_types': scan_types or [],
+        'report': generate_budget_report(budget_findings),
+        'scan_incomplete': scanner.scan_incomplete,
+        'host_status': scanner.host_status
+    }
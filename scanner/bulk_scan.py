@@ -0,0 +1,237 @@
+"""
+Bulk Scanning
+Scans many URLs in one call: at most `concurrency` scans run at a time and at
+most `per_host` of them against the same host. Each result is yielded as soon
+as its scan finishes (the API streams them as NDJSON) and the records are
+saved in batches with bulk_create
+
+The API streams from inside a web worker, which gunicorn kills once its
+timeout passes, so a request gets REQUEST_TIME_BUDGET seconds in all: each
+scan's timeout is that budget divided by the rounds of scans the batch needs
+(see request_scan_timeout), no scan starts once it is spent, and batches
+that would leave each scan less than MIN_REQUEST_SCAN_TIMEOUT are refused.
+Larger batches go through the bulk_scan management command
+"""
+
+import collections
+import concurrent.futures
+import json
+import math
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+from . import inflight
+from .deadline import DEFAULT_SCAN_TIMEOUT, scan_deadline, submit
+from .models import AdvancedSecurityScan, SecurityScan
+from .performance_optimizations import CacheManager
+
+MAX_URLS = 10000  # per command run
+MAX_REQUEST_URLS = 50  # per API request
+REQUEST_TIME_BUDGET = 240  # seconds per API request; gunicorn.conf.py kills workers after 300
+MIN_REQUEST_SCAN_TIMEOUT = 60  # seconds; API batches leaving scans less than this are refused
+MAX_CONCURRENCY = 64
+DEFAULT_CONCURRENCY = 16
+MAX_PER_HOST = 8
+DEFAULT_PER_HOST = 2
+SAVE_BATCH_SIZE = 100
+
+
+def normalize_urls(lines: Iterable[str]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """(unique URLs in input order, error records for unusable lines)"""
+    urls, errors, seen = [], [], set()
+    for line in lines:
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        try:
+            valid = bool(urlparse(url).hostname)
+        except ValueError:
+            valid = False
+        if not valid:
+            errors.append({'url': line.strip(), 'status': 'error', 'error': 'Invalid URL'})
+        elif url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls, errors
+
+
+def scan_rounds(urls: List[str], concurrency: int, per_host: int) -> int:
+    """Scans each slot runs, one after another, to get through urls"""
+    per_host_counts = collections.Counter(urlparse(url).netloc.lower() for url in urls)
+    return max(
+        math.ceil(len(urls) / concurrency),
+        max((math.ceil(count / per_host) for count in per_host_counts.values()), default=0),
+    )
+
+
+def request_scan_timeout(urls: List[str], concurrency: int, per_host: int,
+                         budget: float = REQUEST_TIME_BUDGET) -> float:
+    """Per-scan timeout that gets urls through within budget; raises ValueError when too short"""
+    timeout = min(DEFAULT_SCAN_TIMEOUT, budget / max(1, scan_rounds(urls, concurrency, per_host)))
+    if timeout < MIN_REQUEST_SCAN_TIMEOUT:
+        raise ValueError(
+            f"{len(urls)} URLs at {concurrency} at a time and {per_host} per host do not fit one request; "
+            f"send fewer URLs or use the bulk_scan command"
+        )
+    return timeout
+
+
+def scan_basic(url: str, force_refresh: bool = False) -> Tuple[Dict[str, Any], SecurityScan]:
+    from .utils import SecurityScanner
+    results = SecurityScanner(url, force_refresh=force_refresh).scan_all_cached()
+    return results, SecurityScan.from_results(url, results)
+
+
+def scan_budget(url: str, force_refresh: bool = False) -> Tuple[Dict[str, Any], AdvancedSecurityScan]:
+    from .budget_scanner import run_budget_scan
+    results, cache_status = CacheManager.get_or_compute(
+        'scan_results',
+        lambda: inflight.coalesce(
+            inflight.scan_key(url, 'budget'), lambda: run_budget_scan(url),
+            url=url, profile='budget', lease=DEFAULT_SCAN_TIMEOUT + 60, reuse_finished=not force_refresh,
+        ),
+        inflight.normalize_target(url), 'budget',
+        force_refresh=force_refresh, cacheable=lambda r: not r['scan_incomplete'],
+    )
+    results = dict(results, cache=cache_status)
+    record = AdvancedSecurityScan(
+        url=url,
+        domain=urlparse(url).netloc,
+        scan_type='budget',
+        status='incomplete' if results['scan_incomplete'] else 'completed',
+        webapp_scan_results=results,
+        total_findings=results['total_findings'],
+    )
+    return results, record
+
+
+# scan type -> scan(url, force_refresh) returning (JSON-able results, unsaved record)
+SCANNERS: Dict[str, Callable[[str, bool], Tuple[Dict[str, Any], Any]]] = {
+    'basic': scan_basic,
+    'budget': scan_budget,
+}
+
+
+class BulkScanner:
+    def __init__(self, scan_type: str = 'basic', concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host: int = DEFAULT_PER_HOST, scan_timeout: Optional[float] = DEFAULT_SCAN_TIMEOUT,
+                 save: bool = True, batch_size: int = SAVE_BATCH_SIZE, force_refresh: bool = False,
+                 time_budget: Optional[float] = None):
+        if scan_type not in SCANNERS:
+            raise ValueError(f"Unknown scan type '{scan_type}' (choose from {', '.join(SCANNERS)})")
+        self.scan_type = scan_type
+        self.concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+        self.per_host = max(1, min(per_host, MAX_PER_HOST))
+        self.scan_timeout = scan_timeout
+        self.time_budget = time_budget  # seconds for the whole run; no scan outlives it
+        self._ends_at: Optional[float] = None
+        self.save = save
+        self.batch_size = batch_size
+        self.force_refresh = force_refresh  # rescan targets with cached results
+        self._unsaved: List[Any] = []
+        self.saved = 0
+
+    def run(self, urls: List[str]) -> Iterator[Dict[str, Any]]:
+        """Scan urls, yielding one result record per URL in completion order"""
+        self._ends_at = time.monotonic() + self.time_budget if self.time_budget else None
+        # host -> URLs still waiting; hosts are served round-robin
+        waiting: Dict[str, Deque[str]] = collections.OrderedDict()
+        for url in urls:
+            waiting.setdefault(urlparse(url).netloc.lower(), collections.deque()).append(url)
+        active: Dict[str, int] = collections.Counter()
+        running: Dict[concurrent.futures.Future, Tuple[str, str]] = {}
+
+        def dispatch():
+            # One URL per host per pass, passes repeated until no slot is left
+            started = True
+            while started:
+                started = False
+                for host in list(waiting):
+                    if len(running) >= self.concurrency:
+                        return
+                    if active[host] >= self.per_host:
+                        continue
+                    url = waiting[host].popleft()
+                    if not waiting[host]:
+                        del waiting[host]
+                    else:
+                        waiting.move_to_end(host)
+                    active[host] += 1
+                    running[submit(executor, self._scan, url)] = (host, url)
+                    started = True
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            while True:
+                dispatch()
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    host, url = running.pop(future)
+                    active[host] -= 1
+                    record, unsaved = future.result()
+                    if unsaved is not None:
+                        self._unsaved.append(unsaved)
+                    yield record
+                if len(self._unsaved) >= self.batch_size:
+                    self.flush()
+        finally:
+            # A client that stops reading leaves no scans running behind it
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.flush()
+
+    def _scan(self, url: str) -> Tuple[Dict[str, Any], Any]:
+        started = time.perf_counter()
+        record = {'url': url, 'scan_type': self.scan_type}
+        scan_timeout = self.scan_timeout
+        if self._ends_at is not None:
+            time_left = self._ends_at - time.monotonic()
+            if time_left <= 0:
+                record.update(status='error', error='Time budget of the request exhausted', elapsed=0.0)
+                return record, None
+            scan_timeout = min(scan_timeout or time_left, time_left)
+        try:
+            with scan_deadline(scan_timeout):
+                results, unsaved = SCANNERS[self.scan_type](url, self.force_refresh)
+        except Exception as e:
+            record.update(status='error', error=str(e), elapsed=round(time.perf_counter() - started, 2))
+            return record, None
+        finally:
+            close_old_connections()
+        record.update(status='ok', elapsed=round(time.perf_counter() - started, 2), results=results)
+        return record, unsaved
+
+    def flush(self):
+        """Save the buffered records, one bulk insert per model"""
+        if not self.save or not self._unsaved:
+            self._unsaved.clear()
+            return
+        by_model: Dict[type, List[Any]] = {}
+        for instance in self._unsaved:
+            by_model.setdefault(type(instance), []).append(instance)
+        for model, instances in by_model.items():
+            model.objects.bulk_create(instances, batch_size=self.batch_size)
+            self.saved += len(instances)
+        self._unsaved.clear()
+
+
+class ResultEncoder(DjangoJSONEncoder):
+    """Scan results may hold values JSON has no type for; those are written as strings"""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, cls=ResultEncoder) + '\n'
@@ -0,0 +1,100 @@
+"""
+Scan Deadlines
+A deadline set for a whole scan is carried (via contextvars) into every
+phase, worker thread and probe. Network calls clamp their timeouts to the
+time left and fail fast once it is gone, so a scan that runs out of budget
+stops doing I/O instead of holding its worker
+"""
+
+import contextvars
+import time
+import concurrent.futures
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Tuple, Union
+
+DEFAULT_SCAN_TIMEOUT = 300  # seconds; ScanConfiguration.scan_timeout default
+MIN_TIMEOUT = 0.05  # never hand a zero/negative timeout to a socket
+
+Timeout = Union[None, float, Tuple[Optional[float], Optional[float]]]
+
+
+class DeadlineExceeded(TimeoutError):
+    """The scan's time budget ran out"""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        """Raise DeadlineExceeded once the budget is spent"""
+        if self.expired:
+            raise DeadlineExceeded(f"Scan deadline of {self.seconds}s exceeded")
+
+    def clamp(self, timeout: Timeout) -> Timeout:
+        """timeout (a number or requests' (connect, read) pair) cut to the time left"""
+        self.check()
+        remaining = max(MIN_TIMEOUT, self.remaining())
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('scan_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def scan_deadline(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """Run the enclosed scan under a deadline; None or 0 leaves it unbounded
+
+    A surrounding deadline that expires sooner is kept.
+    """
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds) if seconds else None
+    if outer is not None and (deadline is None or outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def clamp_timeout(timeout: Timeout, deadline: Optional[Deadline] = None) -> Timeout:
+    """timeout cut to the current deadline; raises DeadlineExceeded when it has passed"""
+    deadline = deadline or _current_deadline.get()
+    if deadline is None:
+        return timeout
+    return deadline.clamp(timeout)
+
+
+def check_deadline():
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left on the current deadline, or default when there is none"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline.remaining() if default is None else min(default, deadline.remaining())
+
+
+def submit(executor: concurrent.futures.Executor, func: Callable, *args: Any, **kwargs: Any) -> concurrent.futures.Future:
+    """executor.submit that carries the caller's deadline (and other context) into the worker"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
@@ -0,0 +1,203 @@
+"""
+Process-Wide Caching DNS Resolver
+Caches answers for their TTL (and failures for a short negative TTL),
+coalesces concurrent lookups of the same name and can be installed as the
+resolver behind every requests/urllib3 connection in the process
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import threading
+from typing import List, Optional
+
+from .ttl_cache import SingleFlight, TTLCache
+
+try:
+    import dns.resolver
+    HAS_DNS = True
+except ImportError:
+    HAS_DNS = False
+
+logger = logging.getLogger(__name__)
+
+
+class ResolutionError(socket.gaierror):
+    """Name could not be resolved; a socket.gaierror so existing handlers still apply"""
+
+
+class CachingResolver:
+    def __init__(self, default_ttl: float = 300, negative_ttl: float = 60,
+                 min_ttl: float = 5, max_ttl: float = 3600, lifetime: float = 5,
+                 max_entries: int = 10000):
+        self.default_ttl = default_ttl  # used when the answer carries no TTL (socket fallback)
+        self.negative_ttl = negative_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.lifetime = lifetime
+        self.cache = TTLCache(max_entries=max_entries, default_ttl=default_ttl)
+        self._flights = SingleFlight()
+        self._dns_resolver = None
+        if HAS_DNS:
+            try:
+                self._dns_resolver = dns.resolver.Resolver()
+                self._dns_resolver.lifetime = lifetime
+            except Exception as e:
+                # No usable resolv.conf: fall back to the system resolver
+                logger.warning(f"dnspython resolver unavailable, using system resolver: {str(e)}")
+
+    def resolve(self, name: str, rdtype: str = 'A') -> List[str]:
+        """Return the records of the given type for name, from cache when fresh
+
+        Raises ResolutionError for names that do not resolve (cached too).
+        """
+        name = name.rstrip('.').lower()
+        rdtype = rdtype.upper()
+        key = (name, rdtype)
+
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._flights.do(key, lambda: self._lookup(name, rdtype))
+
+        ok, value = cached
+        if not ok:
+            raise ResolutionError(socket.EAI_NONAME, value)
+        return list(value)
+
+    def gethostbyname(self, host: str) -> str:
+        """Drop-in for socket.gethostbyname backed by the cache"""
+        if _is_ip_address(host):
+            return host
+        return self.resolve(host, 'A')[0]
+
+    async def resolve_async(self, name: str, rdtype: str = 'A') -> List[str]:
+        cached = self.cache.get((name.rstrip('.').lower(), rdtype.upper()))
+        if cached is not None and cached[0]:
+            return list(cached[1])
+        return await asyncio.to_thread(self.resolve, name, rdtype)
+
+    async def gethostbyname_async(self, host: str) -> str:
+        if _is_ip_address(host):
+            return host
+        return (await self.resolve_async(host, 'A'))[0]
+
+    def _lookup(self, name: str, rdtype: str):
+        # Another caller may have filled the cache while we queued for the flight
+        cached = self.cache.get((name, rdtype))
+        if cached is not None:
+            return cached
+
+        try:
+            records, ttl = self._query(name, rdtype)
+        except ResolutionError as e:
+            entry = (False, str(e))
+            self.cache.set((name, rdtype), entry, ttl=self.negative_ttl)
+            return entry
+
+        ttl = min(self.max_ttl, max(self.min_ttl, ttl))
+        entry = (True, tuple(records))
+        self.cache.set((name, rdtype), entry, ttl=ttl)
+        return entry
+
+    def _query(self, name: str, rdtype: str):
+        """Run the real lookup; returns (records, ttl) or raises ResolutionError
+
+        Transient failures (timeouts, SERVFAIL) propagate uncached.
+        """
+        if self._dns_resolver is not None:
+            try:
+                answers = self._dns_resolver.resolve(name, rdtype)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+                raise ResolutionError(socket.EAI_NONAME, f"{name} {rdtype}: {str(e)}")
+            return [str(rdata) for rdata in answers], answers.rrset.ttl
+
+        if rdtype not in ('A', 'AAAA'):
+            raise ResolutionError(socket.EAI_NONAME, f"{rdtype} lookups need dnspython")
+
+        family = socket.AF_INET if rdtype == 'A' else socket.AF_INET6
+        try:
+            infos = socket.getaddrinfo(name, None, family, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                raise ResolutionError(socket.EAI_NONAME, f"{name} {rdtype}: {e.strerror}")
+            raise
+
+        records = []
+        for info in infos:
+            address = info[4][0]
+            if address not in records:
+                records.append(address)
+        return records, self.default_ttl
+
+    def clear(self):
+        self.cache.clear()
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+_resolver: Optional[CachingResolver] = None
+_resolver_lock = threading.Lock()
+_installed = False
+
+
+def get_resolver() -> CachingResolver:
+    """The shared process-wide resolver"""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = CachingResolver()
+    return _resolver
+
+
+def gethostbyname(host: str) -> str:
+    return get_resolver().gethostbyname(host)
+
+
+def resolve(name: str, rdtype: str = 'A') -> List[str]:
+    return get_resolver().resolve(name, rdtype)
+
+
+def install():
+    """Route urllib3 (and so every requests Session) through the shared resolver
+
+    Only the TCP address changes; Host headers, SNI and certificate checks
+    still use the original hostname.
+    """
+    global _installed
+    with _resolver_lock:
+        if _installed:
+            return
+
+        import urllib3.util.connection as urllib3_connection
+
+        original_create_connection = urllib3_connection.create_connection
+
+        def create_connection(address, *args, **kwargs):
+            host, port = address
+            if not host or _is_ip_address(host):
+                return original_create_connection(address, *args, **kwargs)
+
+            try:
+                addresses = get_resolver().resolve(host, 'A')
+            except Exception:
+                # IPv6-only hosts and resolver hiccups: let urllib3 resolve normally
+                return original_create_connection(address, *args, **kwargs)
+
+            last_error = None
+            for ip in addresses:
+                try:
+                    return original_create_connection((ip, port), *args, **kwargs)
+                except OSError as e:
+                    last_error = e
+            raise last_error
+
+        urllib3_connection.create_connection = create_connection
+        _installed = True
@@ -12,7 +12,7 @@ import time
 import threading
 from urllib.parse import urlparse, urljoin
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 import hashlib
 import base64
@@ -22,6 +22,16 @@ import subprocess
 import os
 import warnings
 
+from .phase_scheduler import Phase, PhaseScheduler, current_phase
+from .incremental import PreviousScan, RescanPlan
+from .port_scanner import scan_ports
+from . import dns_resolver
+from .tls_probe import probe_tls
+from .performance_optimizations import CacheManager
+from . import http_client
+from .http_client import create_client
+from . import signatures
+
 # Suppress SSL warnings for security scanning
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 import urllib3
@@ -37,9 +47,12 @@ class SecurityFinding:
     cve_id: Optional[str] = None
     cvss_score: Optional[float] = None
     references: Optional[List[str]] = None
+    phase: Optional[str] = field(default_factory=current_phase)  # scan phase that raised it
 
 class EnhancedAdvancedScanner:
-    def __init__(self, target_url: str):
+    INTERNAL_PHASES = ('homepage',)
+    
+    def __init__(self, target_url: str, port_scan_range: Optional[str] = None, force_refresh: bool = False):
         self.target_url = target_url
         self.parsed_url = urlparse(target_url)
         self.domain = self.parsed_url.netloc
@@ -48,9 +61,7 @@ class EnhancedAdvancedScanner:
         self.results = {}
         
         # Session for persistent connections with memory optimization
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ZtionSec-Scanner/2.0 (Security Analysis Tool)',
+        self.session = create_client(user_agent='ZtionSec-Scanner/2.0 (Security Analysis Tool)', headers={
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
@@ -60,48 +71,76 @@ class EnhancedAdvancedScanner:
         # Set reasonable timeouts and limits
         self.session.timeout = 10
         self.max_workers = 2  # Reduce concurrent workers to save memory
-        
-    def comprehensive_scan(self) -> Dict[str, Any]:
-        """Perform comprehensive security analysis"""
+        self.max_phase_workers = 4
+        self.port_scan_range = port_scan_range  # e.g. ScanConfiguration.port_scan_range
+        self.port_scan_concurrency = 2000
+        self.homepage: Optional[requests.Response] = None
+        self.signatures: Optional[signatures.SignatureMatches] = None
+        self.scan_wall_time = None
+        self.timed_out_phases: List[str] = []
+        # DNS and SSL sub-results are cached at their own TTLs (CacheManager);
+        # force_refresh looks them up afresh
+        self.force_refresh = force_refresh
+        self.cache_status: Dict[str, Dict[str, Any]] = {}
+        
+    def comprehensive_scan(self, previous: Optional[PreviousScan] = None) -> Dict[str, Any]:
+        """Perform comprehensive security analysis
+
+        With a previous scan of the same domain, phases whose inputs have
+        not changed since (see incremental.py) reuse its results and findings.
+        """
         print(f"🔍 Starting enhanced comprehensive scan for {self.target_url}")
         
-        # Run all scans with proper error handling
-        scan_functions = [
-            ('dns', self.enhanced_dns_analysis),
-            ('ssl', self.enhanced_ssl_analysis),
-            ('ports', self.enhanced_port_scan),
-            ('webapp', self.enhanced_web_application_scan),
-            ('vulns', self.enhanced_vulnerability_scan),
-            ('subdomains', self.enhanced_subdomain_enumeration),
-            ('tech', self.enhanced_technology_detection),
-            ('headers', self.enhanced_security_headers_analysis),
-            ('cms_vulns', self.enhanced_cms_vulnerability_check),
-            ('threat_intel', self.enhanced_threat_intelligence),
-            ('owasp', self.owasp_top10_check),
-            ('performance', self.performance_analysis)
+        # Phases declare the phases they need; independent ones run in parallel
+        phases = [
+            Phase('dns', self.enhanced_dns_analysis),
+            Phase('ssl', self.enhanced_ssl_analysis),
+            Phase('homepage', self.get_homepage),
+            Phase('ports', self.enhanced_port_scan, requires=('dns',)),
+            Phase('webapp', self.enhanced_web_application_scan, requires=('homepage',)),
+            Phase('vulns', self.enhanced_vulnerability_scan, requires=('webapp',)),
+            Phase('subdomains', self.enhanced_subdomain_enumeration),
+            Phase('tech', self.enhanced_technology_detection, requires=('homepage',)),
+            Phase('headers', self.enhanced_security_headers_analysis, requires=('homepage',)),
+            Phase('cms_vulns', self.enhanced_cms_vulnerability_check, requires=('homepage',)),
+            Phase('threat_intel', self.enhanced_threat_intelligence),
+            Phase('owasp', self.owasp_top10_check, requires=('tech',)),
+            Phase('performance', self.performance_analysis)
         ]
         
-        # Execute scans with timeout and error handling
-        for scan_name, scan_func in scan_functions:
-            try:
-                print(f"🔄 Running {scan_name.upper()} scan...")
-                start_time = time.time()
-                result = scan_func()
-                duration = time.time() - start_time
-                
-                self.results[scan_name] = result
-                self.results[f"{scan_name}_duration"] = round(duration, 2)
-                print(f"✅ {scan_name.upper()} scan completed in {duration:.2f}s")
-                
-                # Memory cleanup after each scan
-                if hasattr(result, 'clear') and len(str(result)) > 10000:
-                    # If result is very large, summarize it
-                    if isinstance(result, dict) and 'status' in result:
-                        result = {'status': result.get('status', 'completed'), 'summary': 'Large result truncated for memory'}
-                
-            except Exception as e:
-                print(f"❌ {scan_name.upper()} scan failed: {str(e)}")
-                self.results[scan_name] = {'error': str(e), 'status': 'failed'}
+        # Unchanged inputs since the previous scan: carry those phases forward
+        plan = RescanPlan(self, previous).prepare()
+        if plan.homepage is not None:
+            self.homepage = plan.homepage
+        if 'dns' in plan.reuse:
+            self.ip_address = previous.results['dns'].get('ip_address')
+        self.findings.extend(SecurityFinding(**finding) for finding in plan.carried_findings())
+        phases = plan.apply(phases)
+        
+        def record(outcome):
+            # The homepage snapshot is shared input, not a reported scan
+            if outcome.name in self.INTERNAL_PHASES:
+                return
+            
+            if outcome.name in plan.reuse:
+                self.results[outcome.name] = outcome.result
+                print(f"♻️ {outcome.name.upper()} unchanged since scan #{previous.scan_id}, result carried forward")
+            elif outcome.ok:
+                self.results[outcome.name] = outcome.result
+                self.results[f"{outcome.name}_duration"] = round(outcome.duration, 2)
+                print(f"✅ {outcome.name.upper()} scan completed in {outcome.duration:.2f}s")
+            elif outcome.timed_out:
+                print(f"⏱️ {outcome.name.upper()} scan stopped at the scan deadline")
+                self.results[outcome.name] = {'error': outcome.error, 'status': 'timed_out'}
+                self.timed_out_phases.append(outcome.name)
+            else:
+                print(f"❌ {outcome.name.upper()} scan failed: {outcome.error}")
+                self.results[outcome.name] = {'error': outcome.error, 'status': 'failed'}
+        
+        start_time = time.time()
+        self.timed_out_phases = []
+        PhaseScheduler(phases, max_workers=self.max_phase_workers).run(on_complete=record)
+        self.scan_wall_time = round(time.time() - start_time, 2)
         
         # Calculate final security score
         self.calculate_enhanced_score()
@@ -114,7 +153,13 @@ class EnhancedAdvancedScanner:
             'findings': [f.__dict__ for f in self.findings],
             'security_score': self.results.get('security_score', 0),
             'risk_level': self.results.get('risk_level', 'unknown'),
-            'scan_summary': self.generate_scan_summary()
+            'scan_summary': self.generate_scan_summary(),
+            'scan_incomplete': bool(self.timed_out_phases),
+            'timed_out_phases': self.timed_out_phases,
+            'host_status': http_client.host_status(self.target_url),
+            'cache': self.cache_status,
+            'incremental': dict(plan.summary(), fingerprints=plan.finish(self.results) if not self.timed_out_phases else {},
+                                phase_ran_at=plan.phase_ran_at(self.results))
         }
         
         # Cleanup session to free memory
@@ -133,29 +178,35 @@ class EnhancedAdvancedScanner:
         except Exception:
             pass
     
+    def fetch_homepage(self) -> requests.Response:
+        """Fetch the target page once for every phase that inspects it"""
+        self.homepage = self.session.get(self.target_url, timeout=15, verify=False)
+        return self.homepage
+    
+    def get_homepage(self) -> requests.Response:
+        """Shared homepage response, fetched on demand when a phase runs on its own"""
+        if self.homepage is None:
+            self.fetch_homepage()
+        return self.homepage
+    
+    def get_signatures(self) -> signatures.SignatureMatches:
+        """Fingerprint matches for the homepage, shared by the tech and CMS phases"""
+        if self.signatures is None:
+            response = self.get_homepage()
+            self.signatures = signatures.match(response.text, response.headers)
+        return self.signatures
+    
     def enhanced_dns_analysis(self) -> Dict[str, Any]:
         """Enhanced DNS analysis with fallback methods"""
         dns_results = {'status': 'completed'}
         
         try:
-            # Basic IP resolution
-            self.ip_address = socket.gethostbyname(self.domain)
-            dns_results['ip_address'] = self.ip_address
-            dns_results['a_records'] = [self.ip_address]
-            
-            # Check for common subdomains
-            common_subdomains = ['www', 'mail', 'ftp', 'admin', 'api', 'dev', 'test', 'staging']
-            found_subdomains = []
-            
-            for subdomain in common_subdomains:
-                try:
-                    full_domain = f"{subdomain}.{self.domain}"
-                    ip = socket.gethostbyname(full_domain)
-                    found_subdomains.append({'subdomain': full_domain, 'ip': ip})
-                except:
-                    continue
-            
-            dns_results['discovered_subdomains'] = found_subdomains
+            lookup, self.cache_status['dns_lookup'] = CacheManager.get_or_compute(
+                'dns_lookup', self.resolve_dns, self.parsed_url.hostname or self.domain,
+                force_refresh=self.force_refresh,
+            )
+            self.ip_address = lookup['ip_address']
+            dns_results.update(lookup)
             
             # DNS Security checks
             dns_results['security_checks'] = self.check_dns_security()
@@ -172,38 +223,60 @@ class EnhancedAdvancedScanner:
         
         return dns_results
     
+    def resolve_dns(self) -> Dict[str, Any]:
+        """Target address and the common subdomains that resolve"""
+        # Basic IP resolution
+        ip_address = dns_resolver.gethostbyname(self.parsed_url.hostname or self.domain)
+        
+        # Check for common subdomains
+        common_subdomains = ['www', 'mail', 'ftp', 'admin', 'api', 'dev', 'test', 'staging']
+        found_subdomains = []
+        
+        for subdomain in common_subdomains:
+            try:
+                full_domain = f"{subdomain}.{self.domain}"
+                ip = dns_resolver.gethostbyname(full_domain)
+                found_subdomains.append({'subdomain': full_domain, 'ip': ip})
+            except:
+                continue
+        
+        return {
+            'ip_address': ip_address,
+            'a_records': [ip_address],
+            'discovered_subdomains': found_subdomains,
+        }
+    
     def enhanced_ssl_analysis(self) -> Dict[str, Any]:
         """Enhanced SSL/TLS analysis"""
         ssl_results = {'status': 'completed'}
         
         try:
-            # Create SSL context
-            context = ssl.create_default_context()
+            handshake, self.cache_status['ssl_check'] = CacheManager.get_or_compute(
+                'ssl_check', self.verified_handshake,
+                self.parsed_url.hostname, self.parsed_url.port or 443, 'handshake',
+                force_refresh=self.force_refresh,
+            )
+            cert = handshake['peer_cert']
+            cipher = handshake['cipher']
+            version = handshake['protocol']
+            
+            ssl_results.update({
+                'certificate': {
+                    'subject': dict(x[0] for x in cert['subject']),
+                    'issuer': dict(x[0] for x in cert['issuer']),
+                    'version': cert['version'],
+                    'serial_number': cert['serialNumber'],
+                    'not_before': cert['notBefore'],
+                    'not_after': cert['notAfter'],
+                },
+                'cipher_suite': cipher,
+                'protocol_version': version,
+                'security_analysis': self.analyze_ssl_security(cert, cipher, version)
+            })
+            
+            # Check certificate validity
+            self.check_certificate_validity(cert)
             
-            # Connect and get certificate
-            with socket.create_connection((self.domain, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
-                    cert = ssock.getpeercert()
-                    cipher = ssock.cipher()
-                    version = ssock.version()
-                    
-                    ssl_results.update({
-                        'certificate': {
-                            'subject': dict(x[0] for x in cert['subject']),
-                            'issuer': dict(x[0] for x in cert['issuer']),
-                            'version': cert['version'],
-                            'serial_number': cert['serialNumber'],
-                            'not_before': cert['notBefore'],
-                            'not_after': cert['notAfter'],
-                        },
-                        'cipher_suite': cipher,
-                        'protocol_version': version,
-                        'security_analysis': self.analyze_ssl_security(cert, cipher, version)
-                    })
-                    
-                    # Check certificate validity
-                    self.check_certificate_validity(cert)
-                    
         except Exception as e:
             ssl_results['error'] = str(e)
             self.add_finding(
@@ -216,42 +289,27 @@ class EnhancedAdvancedScanner:
         
         return ssl_results
     
+    def verified_handshake(self) -> Dict[str, Any]:
+        """Certificate, cipher and protocol of a verified handshake (raises if unverified)"""
+        # Shared handshake cache: one handshake per host:port per scan window
+        tls = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443).require_verified()
+        return {'peer_cert': tls.peer_cert, 'cipher': tls.cipher, 'protocol': tls.protocol}
+    
     def enhanced_port_scan(self) -> Dict[str, Any]:
-        """Enhanced port scanning with common ports"""
-        port_results = {'status': 'completed', 'open_ports': [], 'closed_ports': []}
-        
+        """Enhanced port scanning over the configured range (common ports by default)"""
         # Common ports to scan
         common_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 8080, 8443, 3389, 5432, 3306]
-        
-        def scan_port(port):
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                result = sock.connect_ex((self.ip_address or self.domain, port))
-                sock.close()
-                
-                if result == 0:
-                    service = self.identify_service(port)
-                    return {'port': port, 'status': 'open', 'service': service}
-                else:
-                    return {'port': port, 'status': 'closed'}
-            except:
-                return {'port': port, 'status': 'filtered'}
-        
-        # Scan ports concurrently
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            futures = [executor.submit(scan_port, port) for port in common_ports]
-            
-            for future in concurrent.futures.as_completed(futures):
-                result = future.result()
-                if result['status'] == 'open':
-                    port_results['open_ports'].append(result)
-                    self.analyze_port_security(result)
-                else:
-                    port_results['closed_ports'].append(result)
-        
-        port_results['total_scanned'] = len(common_ports)
-        port_results['open_count'] = len(port_results['open_ports'])
+        port_spec = self.port_scan_range or ','.join(str(port) for port in common_ports)
+        
+        # Open ports are analysed as the sweep finds them
+        port_results = scan_ports(
+            self.ip_address or self.parsed_url.hostname,
+            port_spec,
+            concurrency=self.port_scan_concurrency,
+            on_open=self.analyze_port_security
+        )
+        port_results['status'] = 'completed'
+        port_results['port_range'] = port_spec
         
         return port_results
     
@@ -261,7 +319,7 @@ class EnhancedAdvancedScanner:
         
         try:
             # Get main page
-            response = self.session.get(self.target_url, timeout=15, verify=False)
+            response = self.get_homepage()
             webapp_results['http_status'] = response.status_code
             webapp_results['response_headers'] = dict(response.headers)
             webapp_results['content_length'] = len(response.content)
@@ -339,15 +397,15 @@ class EnhancedAdvancedScanner:
         def check_subdomain(subdomain):
             try:
                 full_domain = f"{subdomain}.{self.domain}"
-                ip = socket.gethostbyname(full_domain)
+                ip = dns_resolver.gethostbyname(full_domain)
                 
                 # Try to get HTTP response
                 try:
-                    resp = requests.get(f"https://{full_domain}", timeout=5, verify=False)
+                    resp = self.session.get(f"https://{full_domain}", timeout=5, verify=False)
                     status = resp.status_code
                 except:
                     try:
-                        resp = requests.get(f"http://{full_domain}", timeout=5)
+                        resp = self.session.get(f"http://{full_domain}", timeout=5)
                         status = resp.status_code
                     except:
                         status = None
@@ -384,7 +442,7 @@ class EnhancedAdvancedScanner:
         tech_results = {'status': 'completed', 'technologies': []}
         
         try:
-            response = self.session.get(self.target_url, timeout=10, verify=False)
+            response = self.get_homepage()
             headers = response.headers
             content = response.text.lower()
             
@@ -392,29 +450,12 @@ class EnhancedAdvancedScanner:
             server = headers.get('Server', 'Unknown')
             tech_results['server'] = server
             
-            # Technology detection patterns
-            tech_patterns = {
-                'WordPress': ['wp-content', 'wp-includes', 'wordpress'],
-                'Drupal': ['drupal', 'sites/default'],
-                'Joomla': ['joomla', 'option=com_'],
-                'Django': ['django', 'csrfmiddlewaretoken'],
-                'Flask': ['flask', 'werkzeug'],
-                'React': ['react', '__react'],
-                'Angular': ['angular', 'ng-'],
-                'Vue.js': ['vue', 'v-'],
-                'jQuery': ['jquery', '$.'],
-                'Bootstrap': ['bootstrap', 'btn-'],
-                'PHP': ['<?php', '.php'],
-                'ASP.NET': ['aspnet', '__viewstate'],
-                'Node.js': ['node', 'express']
-            }
-            
-            detected_tech = []
-            for tech, patterns in tech_patterns.items():
-                if any(pattern in content for pattern in patterns):
-                    detected_tech.append(tech)
+            # Technology detection (one pass over body and headers)
+            matches = self.get_signatures()
+            detected_tech = matches.names()
             
             tech_results['technologies'] = detected_tech
+            tech_results['versions'] = matches.versions
             
             # Framework-specific security checks
             for tech in detected_tech:
@@ -430,7 +471,7 @@ class EnhancedAdvancedScanner:
         headers_results = {'status': 'completed', 'security_headers': {}}
         
         try:
-            response = self.session.get(self.target_url, timeout=10, verify=False)
+            response = self.get_homepage()
             headers = response.headers
             
             # Security headers to check
@@ -477,26 +518,15 @@ class EnhancedAdvancedScanner:
         cms_results = {'status': 'completed', 'cms_detected': None, 'vulnerabilities': []}
         
         try:
-            response = self.session.get(self.target_url, timeout=10, verify=False)
-            content = response.text.lower()
+            response = self.get_homepage()
             
             # CMS Detection
-            cms_signatures = {
-                'WordPress': ['wp-content', 'wp-includes', '/wp-admin/'],
-                'Drupal': ['drupal', 'sites/all/', 'sites/default/'],
-                'Joomla': ['joomla', '/administrator/', 'option=com_'],
-                'Magento': ['magento', 'mage/'],
-                'PrestaShop': ['prestashop', 'ps_'],
-                'Shopify': ['shopify', 'cdn.shopify.com']
-            }
-            
-            detected_cms = None
-            for cms, signatures in cms_signatures.items():
-                if any(sig in content for sig in signatures):
-                    detected_cms = cms
-                    break
+            matches = self.get_signatures()
+            detected_cms = matches.first('cms')
             
             cms_results['cms_detected'] = detected_cms
+            if detected_cms in matches.versions:
+                cms_results['cms_version'] = matches.versions[detected_cms]
             
             if detected_cms:
                 # CMS-specific vulnerability checks
@@ -649,7 +679,8 @@ class EnhancedAdvancedScanner:
         return {
             'total_findings': len(self.findings),
             'severity_breakdown': severity_counts,
-            'scan_duration': sum(v for k, v in self.results.items() if k.endswith('_duration') and isinstance(v, (int, float))),
+            'scan_duration': self.scan_wall_time if self.scan_wall_time is not None else sum(v for k, v in self.results.items() if k.endswith('_duration') and isinstance(v, (int, float))),
+            'phase_time_total': sum(v for k, v in self.results.items() if k.endswith('_duration') and isinstance(v, (int, float))),
             'scans_completed': scans_completed
         }
     
@@ -14,9 +14,23 @@ import sqlite3
 import re
 from urllib.parse import urlparse
 import logging
+import threading
+
+from django.core.cache import cache as django_cache
+
+from .ttl_cache import SingleFlight, TTLCache
+from .vulnerability_db import CVERepository, Vulnerability
 
 logger = logging.getLogger(__name__)
 
+CVE_CACHE_TTL = 3600  # seconds; the CVE store keeps found CVEs longer
+CVE_MISSING_TTL = 3600  # ids the NVD does not know
+CVE_ERROR_TTL = 60  # a stale stored copy served while the NVD is unreachable
+CVE_CACHE_ENTRIES = 10000
+
+# Negative entry: the id was looked up and has no NVD data
+_MISSING = object()
+
 @dataclass
 class ValidatedVulnerability:
     """Validated vulnerability with confidence scoring"""
@@ -33,12 +47,109 @@ class ValidatedVulnerability:
     affected_component: str
     proof_of_concept: str
     
+def cve_validation_data(vuln: Vulnerability) -> Dict[str, Any]:
+    return {
+        'cve_id': vuln.cve_id,
+        'description': vuln.description,
+        'severity': vuln.severity,
+        'references': [ref for ref in vuln.references if ref],
+        'published_date': vuln.published_date,
+        'modified_date': vuln.modified_date
+    }
+
+
+class CVEValidationCache:
+    """NVD validation data by CVE id, shared by every validator in the process
+
+    A bounded LRU of recent lookups sits in front of the CVE store, which
+    reads through to the NVD API. The store only holds CVEs that exist, so
+    ids the NVD confirmed it does not know (an empty result or a 404) are
+    remembered here and in the Django cache. That spares other workers the
+    lookup only with a shared cache backend; the default LocMemCache is
+    per process. Failed lookups (timeouts, 5xx) are not remembered as
+    unknown and are tried again on the next call. Concurrent lookups of
+    one CVE make a single call.
+    """
+
+    def __init__(self, ttl: float = CVE_CACHE_TTL, missing_ttl: float = CVE_MISSING_TTL,
+                 error_ttl: float = CVE_ERROR_TTL, max_entries: int = CVE_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.error_ttl = error_ttl
+        self.cache = TTLCache(max_entries=max_entries, default_ttl=ttl)
+        self._flights = SingleFlight()
+        self.repository = CVERepository()
+
+    @staticmethod
+    def _key(cve_id: str) -> str:
+        return cve_id.strip().upper()
+
+    def get(self, cve_id: str, default: Any = None) -> Optional[Dict[str, Any]]:
+        """Cached validation data for cve_id, without looking it up"""
+        data = self.cache.get(self._key(cve_id))
+        return default if data is None or data is _MISSING else data
+
+    def lookup(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """Validation data for cve_id, None when the NVD has none"""
+        key = self._key(cve_id)
+        data = self.cache.get(key)
+        if data is None:
+            data = self._flights.do(key, lambda: self._lookup(key))
+        return None if data is _MISSING else data
+
+    def _lookup(self, cve_id: str):
+        data = self.cache.get(cve_id)
+        if data is not None:
+            return data
+        missing_key = f'cve_validation:missing:{cve_id}'
+        if django_cache.get(missing_key):
+            # Its remaining lifetime there is unknown; hold it only briefly
+            self.cache.set(cve_id, _MISSING, ttl=self.error_ttl)
+            return _MISSING
+
+        try:
+            vuln = self.repository.get(cve_id, strict=True)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"NVD lookup of {cve_id} failed: {e}")
+            # A stale stored copy beats none, but is retried sooner
+            vuln = self.repository.get(cve_id, fetch=False)
+            if vuln is None:
+                return _MISSING  # not known to be missing; nothing cached
+            data = cve_validation_data(vuln)
+            self.cache.set(cve_id, data, ttl=self.error_ttl)
+            return data
+
+        if vuln is None:
+            self.cache.set(cve_id, _MISSING, ttl=self.missing_ttl)
+            django_cache.set(missing_key, True, self.missing_ttl)
+            return _MISSING
+        data = cve_validation_data(vuln)
+        self.cache.set(cve_id, data)
+        return data
+
+    def clear(self):
+        self.cache.clear()
+
+
+_cve_validation_cache: Optional[CVEValidationCache] = None
+_cve_validation_cache_lock = threading.Lock()
+
+
+def get_cve_validation_cache() -> CVEValidationCache:
+    """The shared process-wide CVE validation cache"""
+    global _cve_validation_cache
+    if _cve_validation_cache is None:
+        with _cve_validation_cache_lock:
+            if _cve_validation_cache is None:
+                _cve_validation_cache = CVEValidationCache()
+    return _cve_validation_cache
+
+
 class VulnerabilityValidator:
     """Enhanced vulnerability validation system"""
     
     def __init__(self):
-        self.nvd_api_base = "https://services.nvd.nist.gov/rest/json/cves/2.0"
-        self.validation_cache = {}
+        self.validation_cache = get_cve_validation_cache()
         self.false_positive_patterns = self._load_false_positive_patterns()
         self.confidence_thresholds = {
             'critical': 0.9,
@@ -271,93 +382,14 @@ class VulnerabilityValidator:
         return min(1.0, likelihood)
     
     def _validate_against_nvd(self, cve_id: str) -> Optional[Dict[str, Any]]:
-        """Validate vulnerability against NVD database"""
+        """Validate vulnerability against NVD data in the shared CVE store"""
         try:
-            # Check cache first
-            if cve_id in self.validation_cache:
-                return self.validation_cache[cve_id]
-            
-            # Query NVD API
-            url = f"{self.nvd_api_base}?cveId={cve_id}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                vulnerabilities = data.get('vulnerabilities', [])
-                
-                if vulnerabilities:
-                    cve_data = vulnerabilities[0].get('cve', {})
-                    
-                    # Extract relevant information
-                    validation_data = {
-                        'cve_id': cve_id,
-                        'description': self._extract_cve_description(cve_data),
-                        'severity': self._extract_cve_severity(cve_data),
-                        'references': self._extract_cve_references(cve_data),
-                        'published_date': cve_data.get('published'),
-                        'modified_date': cve_data.get('lastModified')
-                    }
-                    
-                    # Cache the result
-                    self.validation_cache[cve_id] = validation_data
-                    return validation_data
-            
+            return self.validation_cache.lookup(cve_id)
         except Exception as e:
             logger.error(f"Error validating CVE {cve_id}: {str(e)}")
         
         return None
     
-    def _extract_cve_description(self, cve_data: Dict[str, Any]) -> str:
-        """Extract description from CVE data"""
-        descriptions = cve_data.get('descriptions', [])
-        for desc in descriptions:
-            if desc.get('lang') == 'en':
-                return desc.get('value', '')
-        return ''
-    
-    def _extract_cve_severity(self, cve_data: Dict[str, Any]) -> str:
-        """Extract severity from CVE data"""
-        metrics = cve_data.get('metrics', {})
-        
-        # Try CVSS v3.1 first
-        cvss_v31 = metrics.get('cvssMetricV31', [])
-        if cvss_v31:
-            base_severity = cvss_v31[0].get('cvssData', {}).get('baseSeverity', '').lower()
-            if base_severity:
-                return base_severity
-        
-        # Try CVSS v3.0
-        cvss_v30 = metrics.get('cvssMetricV30', [])
-        if cvss_v30:
-            base_severity = cvss_v30[0].get('cvssData', {}).get('baseSeverity', '').lower()
-            if base_severity:
-                return base_severity
-        
-        # Try CVSS v2
-        cvss_v2 = metrics.get('cvssMetricV2', [])
-        if cvss_v2:
-            base_score = cvss_v2[0].get('cvssData', {}).get('baseScore', 0)
-            if base_score >= 7.0:
-                return 'high'
-            elif base_score >= 4.0:
-                return 'medium'
-            else:
-                return 'low'
-        
-        return 'unknown'
-    
-    def _extract_cve_references(self, cve_data: Dict[str, Any]) -> List[str]:
-        """Extract references from CVE data"""
-        references = []
-        ref_data = cve_data.get('references', [])
-        
-        for ref in ref_data:
-            url = ref.get('url')
-            if url:
-                references.append(url)
-        
-        return references
-    
     def _compare_with_cve_data(self, vuln_data: Dict[str, Any], cve_data: Dict[str, Any]) -> bool:
         """Compare vulnerability data with CVE data for consistency"""
         # Compare severity
@@ -0,0 +1,641 @@
+"""
+Unified HTTP Client for Scanner Modules
+Every scanner talks HTTP through here: one process-wide connection pool,
+per-host concurrency and politeness limits, retry with backoff, response
+size caps, per-request metrics, RTT-derived per-host timeouts with a
+circuit breaker for unresponsive hosts and a scan-scoped memo of
+idempotent requests
+"""
+
+import contextvars
+import copy
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .deadline import Deadline, DeadlineExceeded, current_deadline
+from .ttl_cache import SingleFlight, TTLCache
+
+DEFAULT_USER_AGENT = 'ZtionSec Security Scanner 1.0'
+
+# Overridable through settings.SCANNER_HTTP
+DEFAULTS = {
+    'POOL_CONNECTIONS': 100,  # hosts kept in the pool
+    'PER_HOST_LIMIT': 10,  # concurrent requests (and pooled connections) per host
+    'MIN_HOST_INTERVAL': 0.0,  # seconds between request starts to one host
+    'MAX_BYTES': 5 * 1024 * 1024,  # response bodies are truncated beyond this
+    'PROBE_MAX_BYTES': 256 * 1024,  # body read per path probe (scanner/probe_engine)
+    'RETRIES': 2,  # connection failures and 502/503/504 on idempotent requests
+    'BACKOFF': 0.3,
+    'METRICS_HISTORY': 500,
+    'MEMO_MAX_ENTRIES': 2048,  # responses shared within one scan scope
+    'MEMO_TTL': 3600,
+    'ADAPTIVE_TIMEOUTS': True,  # shrink timeouts to what the host's measured RTT justifies
+    'RTT_SAMPLES': 3,  # responses needed before timeouts adapt
+    'RTT_TIMEOUT_FACTOR': 4,  # timeout = factor * (smoothed RTT + 4 * RTT variance)
+    'MIN_ADAPTIVE_TIMEOUT': 2.0,  # seconds; adaptive timeouts never go below this
+    'BREAKER_THRESHOLD': 5,  # consecutive timeouts before a host is declared unresponsive
+    'BREAKER_COOLDOWN': 60,  # seconds before an unresponsive host gets one trial request
+}
+
+
+def get_setting(name: str) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, 'SCANNER_HTTP', {}).get(name, DEFAULTS[name])
+    except Exception:
+        # Used outside a configured Django project
+        return DEFAULTS[name]
+
+
+@dataclass
+class RequestMetric:
+    method: str
+    url: str
+    host: str
+    status: Optional[int] = None
+    bytes: int = 0
+    latency: float = 0.0  # in seconds, including the capped body read
+    truncated: bool = False
+    error: Optional[str] = None
+
+
+class HTTPMetrics:
+    """Running totals plus a bounded history of recent requests"""
+
+    def __init__(self, history: int = 500):
+        self._lock = threading.Lock()
+        self.recent: Deque[RequestMetric] = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.bytes = 0
+            self.latency = 0.0
+            self.by_host: Dict[str, Dict[str, float]] = {}
+            self.recent.clear()
+
+    def record(self, metric: RequestMetric):
+        with self._lock:
+            self.recent.append(metric)
+            self.requests += 1
+            self.bytes += metric.bytes
+            self.latency += metric.latency
+            if metric.error:
+                self.errors += 1
+            host = self.by_host.setdefault(metric.host, {'requests': 0, 'errors': 0, 'bytes': 0, 'latency': 0.0})
+            host['requests'] += 1
+            host['bytes'] += metric.bytes
+            host['latency'] += metric.latency
+            if metric.error:
+                host['errors'] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'avg_latency': round(self.latency / self.requests, 4) if self.requests else 0,
+                'hosts': {host: dict(values) for host, values in self.by_host.items()},
+            }
+
+
+class HostUnresponsive(requests.exceptions.ConnectionError):
+    """Refused without sending: the host's circuit is open after repeated timeouts"""
+
+
+class HostState:
+    def __init__(self):
+        self.samples = 0
+        self.srtt: Optional[float] = None  # smoothed time to response headers
+        self.rttvar = 0.0
+        self.consecutive_timeouts = 0
+        self.open_until = 0.0  # circuit open (fail fast) until this monotonic time
+        self.trial_in_flight = False
+        self.tripped = 0  # times the circuit opened
+
+
+class HostHealth:
+    """Per-host RTT estimates (as TCP does for its RTO) and a timeout circuit breaker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostState] = {}
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState()
+        return state
+
+    def before_request(self, host: str, timeout: Any) -> Any:
+        """Raise HostUnresponsive while the circuit is open, else return the timeout to use"""
+        with self._lock:
+            state = self._state(host)
+            if state.open_until:
+                if time.monotonic() < state.open_until or state.trial_in_flight:
+                    raise HostUnresponsive(
+                        f"host unresponsive: {host} timed out {state.consecutive_timeouts} times in a row"
+                    )
+                # Cooldown over: let a single trial request through (half-open)
+                state.trial_in_flight = True
+
+            if not get_setting('ADAPTIVE_TIMEOUTS') or state.samples < get_setting('RTT_SAMPLES'):
+                return timeout
+            adaptive = max(
+                get_setting('MIN_ADAPTIVE_TIMEOUT'),
+                get_setting('RTT_TIMEOUT_FACTOR') * (state.srtt + 4 * state.rttvar)
+            )
+
+        # (connect, read): reads get twice the budget, slow endpoints are not dead ones
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        return (
+            adaptive if connect is None else min(connect, adaptive),
+            2 * adaptive if read is None else min(read, 2 * adaptive),
+        )
+
+    def record_response(self, host: str, latency: float):
+        with self._lock:
+            state = self._state(host)
+            # RFC 6298 smoothing
+            if state.srtt is None:
+                state.srtt = latency
+                state.rttvar = latency / 2
+            else:
+                state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - latency)
+                state.srtt = 0.875 * state.srtt + 0.125 * latency
+            state.samples += 1
+            state.consecutive_timeouts = 0
+            state.open_until = 0.0
+            state.trial_in_flight = False
+
+    def record_timeout(self, host: str):
+        with self._lock:
+            state = self._state(host)
+            state.consecutive_timeouts += 1
+            if state.trial_in_flight or state.consecutive_timeouts >= get_setting('BREAKER_THRESHOLD'):
+                if not state.open_until or state.trial_in_flight:
+                    state.tripped += 1
+                state.open_until = time.monotonic() + get_setting('BREAKER_COOLDOWN')
+                state.trial_in_flight = False
+
+    def record_other_failure(self, host: str):
+        with self._lock:
+            # A refused or reset connection is an answer; only a failed trial matters here
+            self._state(host).trial_in_flight = False
+
+    def status(self, host: str) -> str:
+        """'unresponsive' while the circuit is open, else 'ok' (or 'unknown' before any request)"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return 'unknown'
+            return 'unresponsive' if state.open_until and time.monotonic() < state.open_until else 'ok'
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                host: {
+                    'srtt': round(state.srtt, 4) if state.srtt is not None else None,
+                    'samples': state.samples,
+                    'consecutive_timeouts': state.consecutive_timeouts,
+                    'unresponsive': bool(state.open_until) and time.monotonic() < state.open_until,
+                    'tripped': state.tripped,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def reset(self, host: Optional[str] = None):
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
+
+
+class HostLimiter:
+    """Per-host concurrency slots and minimum spacing between request starts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(get_setting('PER_HOST_LIMIT'))
+                self._slots[host] = slot
+            return slot
+
+    def acquire(self, host: str):
+        self._slot(host).acquire()
+        interval = get_setting('MIN_HOST_INTERVAL')
+        if interval:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start_at + interval
+            if start_at > now:
+                time.sleep(start_at - now)
+
+    def release(self, host: str):
+        self._slot(host).release()
+
+
+class RequestMemo:
+    """Responses to idempotent requests made during one scan, shared by every detector
+
+    Requests are identical when method, URL, query parameters, redirect
+    handling, headers, credentials (basic auth and the cookies that would
+    be sent) and TLS/proxy settings (verify, cert, proxies) match, so an
+    anonymous request never gets an authenticated response and an
+    unverified response never answers a request that verifies the
+    certificate. Requests through other auth handlers are not memoised.
+    User-Agent is left out of the key: each scanner sends its own, and the
+    target serves the same content.
+    Concurrent identical requests are sent once.
+    """
+
+    METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+    BODY_ARGUMENTS = ('data', 'json', 'files')
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.responses = TTLCache(
+            max_entries=max_entries or get_setting('MEMO_MAX_ENTRIES'),
+            default_ttl=ttl or get_setting('MEMO_TTL')
+        )
+        self._flights = SingleFlight()
+        self.shared = 0  # requests answered from the memo
+
+    def key(self, session: requests.Session, method: str, url: str, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+        method = method.upper()
+        if method not in self.METHODS or any(kwargs.get(name) for name in self.BODY_ARGUMENTS):
+            return None
+        auth = kwargs.get('auth') or session.auth
+        if auth is not None and not isinstance(auth, tuple):
+            return None  # auth handlers (digest, tokens) have no comparable value
+        headers = {name.lower(): value for name, value in session.headers.items()}
+        headers.update({name.lower(): value for name, value in (kwargs.get('headers') or {}).items()})
+        headers.pop('user-agent', None)
+        params = kwargs.get('params')
+        params = tuple(sorted(params.items())) if isinstance(params, dict) else params
+        proxies = dict(session.proxies)
+        proxies.update(kwargs.get('proxies') or {})
+        return (
+            method, url, repr(params), kwargs.get('allow_redirects', True),
+            tuple(sorted((name, str(value)) for name, value in headers.items() if value is not None)),
+            auth,
+            _cookie_header(session, method, url, kwargs.get('cookies')),
+            repr(kwargs.get('verify', session.verify)), repr(kwargs.get('cert', session.cert)),
+            tuple(sorted((scheme, str(proxy)) for scheme, proxy in proxies.items() if proxy is not None)),
+        )
+
+    def get(self, key: Hashable) -> Optional[requests.Response]:
+        response = self.responses.get(key)
+        if response is None:
+            return None
+        self.shared += 1
+        return _share(response)
+
+    def store(self, key: Hashable, response: requests.Response):
+        # Partial bodies (size cap, early stop) are not what the next caller asked for
+        if not getattr(response, 'truncated', False):
+            self.responses.set(key, copy.copy(response))
+
+    def do(self, key: Hashable, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send once per key, even when detectors ask concurrently"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        leader = []
+
+        def send_and_store():
+            leader.append(True)
+            response = send()
+            self.store(key, response)
+            return response
+
+        response = self._flights.do(key, send_and_store)
+        if leader:
+            return response
+        self.shared += 1
+        return _share(response)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self.responses), 'shared': self.shared}
+
+
+def _cookie_header(session: requests.Session, method: str, url: str, cookies: Any) -> Optional[str]:
+    """Cookie header requests would send for url from the session jar and per-request cookies"""
+    if not session.cookies and not cookies:
+        return None
+    jar = requests.cookies.merge_cookies(session.cookies.copy(), cookies)
+    return requests.cookies.get_cookie_header(jar, requests.Request(method, url))
+
+
+def _share(response: requests.Response) -> requests.Response:
+    """Copy of a fully read response; callers may set attributes without affecting each other"""
+    shared = copy.copy(response)
+    shared.truncated = False
+    return shared
+
+
+_current_memo: contextvars.ContextVar[Optional[RequestMemo]] = contextvars.ContextVar('scanner_request_memo', default=None)
+
+
+@contextmanager
+def scan_scope(memo: Optional[RequestMemo] = None) -> Iterator[RequestMemo]:
+    """Share identical idempotent requests across every client created (or module-level call made) inside"""
+    memo = memo or RequestMemo()
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+
+
+def current_memo() -> Optional[RequestMemo]:
+    return _current_memo.get()
+
+
+_metrics = HTTPMetrics(history=DEFAULTS['METRICS_HISTORY'])
+_host_limiter = HostLimiter()
+_host_health = HostHealth()
+_adapter: Optional[HTTPAdapter] = None
+_adapter_lock = threading.Lock()
+
+
+def shared_adapter() -> HTTPAdapter:
+    """One pooled adapter for the process so keep-alive connections are reused across scanners"""
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                retry = Retry(
+                    total=get_setting('RETRIES'),
+                    read=0,  # a slow probe is a result, not something to repeat
+                    backoff_factor=get_setting('BACKOFF'),
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                    raise_on_status=False,
+                    respect_retry_after_header=True,
+                )
+                _adapter = HTTPAdapter(
+                    pool_connections=get_setting('POOL_CONNECTIONS'),
+                    pool_maxsize=get_setting('PER_HOST_LIMIT'),
+                    max_retries=retry,
+                )
+    return _adapter
+
+
+class ScannerHTTPClient(requests.Session):
+    """requests.Session routed through the shared pool, host limits and metrics
+
+    Bodies are read with a size cap unless the caller asks for stream=True
+    (it then owns the read). Truncated responses have .truncated set.
+    """
+
+    def __init__(self, user_agent: str = DEFAULT_USER_AGENT, headers: Optional[Dict[str, str]] = None,
+                 max_bytes: Optional[int] = None, store_cookies: bool = True,
+                 memo: Optional[RequestMemo] = None, deadline: Optional[Deadline] = None):
+        super().__init__()
+        self.memo = memo
+        self.deadline = deadline
+        self.headers['User-Agent'] = user_agent
+        if headers:
+            self.headers.update(headers)
+        self.max_bytes = max_bytes or get_setting('MAX_BYTES')
+        self.metrics: List[RequestMetric] = []
+        if not store_cookies:
+            self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = shared_adapter()
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        stream = kwargs.pop('stream', False)
+        memo = self.memo or _current_memo.get()
+        key = memo.key(self, method, url, kwargs) if memo is not None and not args else None
+        if key is None:
+            return self._send(method, url, args, kwargs, stream)
+
+        if stream:
+            # The caller reads the body; the memo gets it once read_body finishes it
+            cached = memo.get(key)
+            if cached is not None:
+                return cached
+            response = self._send(method, url, args, kwargs, stream)
+            response.memo_entry = (memo, key)
+            return response
+        return memo.do(key, lambda: self._send(method, url, args, kwargs, stream))
+
+    def _send(self, method, url, args, kwargs, stream: bool) -> requests.Response:
+        host = urlparse(url).netloc
+        metric = RequestMetric(method=method.upper(), url=url, host=host)
+
+        # Past the scan deadline nothing is sent
+        deadline = self.deadline or current_deadline()
+        if deadline is not None:
+            deadline.check()
+
+        # Dead hosts fail fast; live ones get timeouts sized to their RTT
+        try:
+            timeout = _host_health.before_request(host, kwargs.get('timeout'))
+        except HostUnresponsive as e:
+            metric.error = str(e)
+            self._record(metric)
+            raise
+
+        # No request may outlive the deadline. A timeout it cut short says
+        # nothing about the host, so it does not count towards the breaker.
+        cut_short = False
+        if deadline is not None:
+            try:
+                clamped = deadline.clamp(timeout)
+            except DeadlineExceeded:
+                _host_health.record_other_failure(host)
+                raise
+            cut_short = clamped != timeout
+            timeout = clamped
+        kwargs['timeout'] = timeout
+
+        _host_limiter.acquire(host)
+        start_time = time.perf_counter()
+        try:
+            try:
+                response = super().request(method, url, *args, stream=True, **kwargs)
+            except Exception as e:
+                timed_out = isinstance(e, requests.exceptions.Timeout) or (
+                    isinstance(e, requests.exceptions.ConnectionError) and _is_timeout(e))
+                if timed_out and not cut_short:
+                    _host_health.record_timeout(host)
+                else:
+                    _host_health.record_other_failure(host)
+                raise
+            _host_health.record_response(host, time.perf_counter() - start_time)
+            response.deadline = deadline
+            metric.status = response.status_code
+            if stream:
+                metric.bytes = int(response.headers.get('Content-Length') or 0)
+            else:
+                self._read_capped(response)
+                metric.bytes = len(response._content)
+                metric.truncated = response.truncated
+            return response
+        except Exception as e:
+            metric.error = str(e)
+            raise
+        finally:
+            metric.latency = time.perf_counter() - start_time
+            _host_limiter.release(host)
+            self._record(metric)
+
+    def _read_capped(self, response: requests.Response):
+        read_body(response, self.max_bytes)
+
+    def _record(self, metric: RequestMetric):
+        self.metrics.append(metric)
+        if len(self.metrics) > get_setting('METRICS_HISTORY'):
+            del self.metrics[0]
+        _metrics.record(metric)
+
+    def metrics_summary(self) -> Dict[str, Any]:
+        completed = [m for m in self.metrics if m.error is None]
+        return {
+            'requests': len(self.metrics),
+            'errors': len(self.metrics) - len(completed),
+            'bytes': sum(m.bytes for m in self.metrics),
+            'avg_latency': round(sum(m.latency for m in self.metrics) / len(self.metrics), 4) if self.metrics else 0,
+        }
+
+    def close(self):
+        # The pool is shared by every client; only drop this client's state
+        self.cookies.clear()
+
+
+def _is_timeout(error: Exception) -> bool:
+    """Timeouts surface as ConnectionError when urllib3 retries were exhausted"""
+    from urllib3.exceptions import MaxRetryError, TimeoutError as Urllib3Timeout
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, (Urllib3Timeout, TimeoutError))
+
+
+def read_body(response: requests.Response, max_bytes: int,
+              until: Optional[Callable[[str], Any]] = None, chunk_size: int = 65536) -> requests.Response:
+    """Load at most max_bytes of a streamed body into response.content
+
+    until, when given, is called with the text read so far after each chunk;
+    reading stops as soon as it returns a truthy value. Sets
+    response.truncated when reading stopped early (cap or until). Raises
+    DeadlineExceeded when the scan deadline passes mid-body.
+    """
+    chunks = []
+    size = 0
+    response.truncated = False
+    deadline = getattr(response, 'deadline', None) or current_deadline()
+    try:
+        for chunk in response.iter_content(chunk_size=min(chunk_size, max_bytes) or 1):
+            if deadline is not None and deadline.expired:
+                response.truncated = True
+                raise DeadlineExceeded(f"Scan deadline exceeded while reading {response.url}")
+            remaining = max_bytes - size
+            if len(chunk) > remaining:
+                chunks.append(chunk[:remaining])
+                response.truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+            if until is not None and until(b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')):
+                response.truncated = True
+                break
+    finally:
+        response._content = b''.join(chunks)
+        response._content_consumed = True
+        # A fully read body hands the connection back to the pool;
+        # a truncated one is closed so no unread bytes leak into reuse
+        response.close()
+
+    memo_entry = getattr(response, 'memo_entry', None)
+    if memo_entry is not None:
+        memo, key = memo_entry
+        memo.store(key, response)
+    return response
+
+
+def create_client(user_agent: str = DEFAULT_USER_AGENT, headers: Optional[Dict[str, str]] = None,
+                  max_bytes: Optional[int] = None, memo: Optional[RequestMemo] = None,
+                  deadline: Optional[Deadline] = None) -> ScannerHTTPClient:
+    """Client for one scan; cookies stay within that scan
+
+    Inside scan_scope() / scan_deadline() the client shares that scope's
+    request memo and deadline, also from worker threads that do not see
+    the scope themselves.
+    """
+    return ScannerHTTPClient(user_agent=user_agent, headers=headers, max_bytes=max_bytes,
+                             memo=memo or _current_memo.get(), deadline=deadline or current_deadline())
+
+
+_default_client: Optional[ScannerHTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> ScannerHTTPClient:
+    """Shared cookie-less client for one-off requests"""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ScannerHTTPClient(store_cookies=False)
+    return _default_client
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return default_client().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault('allow_redirects', True)
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, data=None, json=None, **kwargs) -> requests.Response:
+    return request('POST', url, data=data, json=json, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Process-wide request totals and per-host health"""
+    summary = _metrics.summary()
+    summary['host_health'] = _host_health.snapshot()
+    return summary
+
+
+def host_status(url_or_host: str) -> str:
+    """'ok', 'unresponsive' (circuit open) or 'unknown' for a URL or host:port"""
+    host = urlparse(url_or_host).netloc if '://' in url_or_host else url_or_host
+    return _host_health.status(host)
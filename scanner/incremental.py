@@ -0,0 +1,314 @@
+"""
+Incremental Rescans
+Before rescanning a domain, cheap fingerprints are taken: the DNS answers, the
+TLS leaf certificate, the homepage validators (via a conditional GET) and the
+previously open ports. Each is compared with the previous scan's fingerprint.
+Phases whose inputs are unchanged carry their results and findings forward
+instead of running again, until INCREMENTAL_MAX_AGE after they last actually
+ran: a carried-forward result is never older than that
+"""
+
+import concurrent.futures
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+
+from . import dns_resolver
+from .deadline import submit
+from .phase_scheduler import Phase
+from .port_scanner import scan_ports
+from .tls_probe import probe_tls
+
+INCREMENTAL_MAX_AGE = 7 * 24 * 3600  # seconds; older scans and phase results are not reused
+
+# phase -> fingerprints it depends on; phases not listed always run again
+PHASE_INPUTS = {
+    'dns': ('dns',),
+    'ssl': ('tls',),
+    'ports': ('dns', 'ports'),
+    'subdomains': ('dns',),
+    'homepage': ('http',),
+    'webapp': ('http',),
+    'vulns': ('http',),
+    'tech': ('http',),
+    'headers': ('http',),
+    'cms_vulns': ('http',),
+    'owasp': ('http',),
+    'performance': ('http',),
+}
+
+# phase -> AdvancedSecurityScan field holding its result; other phases are
+# kept in scan_fingerprint['phase_results']
+PHASE_COLUMNS = {
+    'dns': 'dns_analysis',
+    'ssl': 'ssl_analysis',
+    'ports': 'port_scan_results',
+    'webapp': 'webapp_scan_results',
+    'vulns': 'vulnerability_results',
+    'subdomains': 'subdomain_results',
+    'tech': 'technology_stack',
+    'headers': 'security_headers',
+}
+
+FINDING_FIELDS = ('severity', 'category', 'title', 'description', 'recommendation', 'cve_id', 'cvss_score')
+
+
+@dataclass
+class PreviousScan:
+    """What an earlier scan of the same domain saw, as a rescan baseline"""
+    scan_id: int
+    scan_date: datetime
+    fingerprints: Dict[str, Any]
+    results: Dict[str, Any] = field(default_factory=dict)  # phase -> result
+    findings: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)  # phase -> finding fields
+    phase_ran_at: Dict[str, datetime] = field(default_factory=dict)  # phase -> when it last actually ran
+
+    @classmethod
+    def from_scan(cls, scan) -> Optional['PreviousScan']:
+        """Baseline from an AdvancedSecurityScan, or None when it has no fingerprints"""
+        stored = scan.scan_fingerprint or {}
+        if not stored.get('inputs'):
+            return None
+
+        results = dict(stored.get('phase_results') or {})
+        for phase, column in PHASE_COLUMNS.items():
+            results[phase] = getattr(scan, column) or {}
+
+        findings: Dict[str, List[Dict[str, Any]]] = {}
+        for finding in scan.findings.exclude(phase='').values('phase', *FINDING_FIELDS):
+            findings.setdefault(finding.pop('phase'), []).append(finding)
+
+        # Baselines without run times (older scans) have every phase expired
+        phase_ran_at = {}
+        for phase, ran_at in (stored.get('phase_ran_at') or {}).items():
+            try:
+                phase_ran_at[phase] = datetime.fromisoformat(ran_at)
+            except (TypeError, ValueError):
+                continue
+
+        return cls(scan_id=scan.id, scan_date=scan.scan_date, fingerprints=stored['inputs'],
+                   results=results, findings=findings, phase_ran_at=phase_ran_at)
+
+    def expired(self, phase: str, now: Optional[datetime] = None) -> bool:
+        """Whether phase last actually ran more than INCREMENTAL_MAX_AGE ago"""
+        ran_at = self.phase_ran_at.get(phase)
+        now = now or datetime.now(timezone.utc)
+        return ran_at is None or now - ran_at > timedelta(seconds=INCREMENTAL_MAX_AGE)
+
+    def reusable(self, phase: str) -> bool:
+        """Whether the previous run of phase finished cleanly and recently enough"""
+        result = self.results.get(phase)
+        if phase == 'homepage':
+            return True  # internal, never stored; see RescanPlan.prepare()
+        if self.expired(phase):
+            return False
+        return isinstance(result, dict) and bool(result) and 'error' not in result
+
+
+def dns_fingerprint(host: str) -> Dict[str, Any]:
+    try:
+        return {'a': sorted(dns_resolver.resolve(host, 'A'))}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def tls_fingerprint(host: str, port: int) -> Dict[str, Any]:
+    """Leaf certificate (which covers its serial), protocol and cipher"""
+    try:
+        tls = probe_tls(host, port)
+    except Exception as e:
+        return {'error': str(e)}
+    if tls.cert_der is None:
+        return {'error': tls.error}
+    return {
+        'cert_sha256': hashlib.sha256(tls.cert_der).hexdigest(),
+        'serial_number': tls.peer_cert.get('serialNumber'),
+        'verified': tls.verified,
+        'protocol': tls.protocol,
+        'cipher': tls.cipher[0] if tls.cipher else None,
+    }
+
+
+def http_fingerprint(response: requests.Response) -> Dict[str, Any]:
+    return {
+        'status': response.status_code,
+        'url': response.url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'body_sha256': hashlib.sha256(response.content).hexdigest(),
+    }
+
+
+def ports_fingerprint(port_range: Optional[str], port_results: Dict[str, Any]) -> Dict[str, Any]:
+    open_ports = [p['port'] for p in port_results.get('open_ports', []) if isinstance(p, dict) and 'port' in p]
+    return {'range': port_range, 'open': sorted(open_ports)}
+
+
+class RescanPlan:
+    """Which phases of a scan run again and which are carried forward
+
+    Built for every scan: without a baseline nothing is reused, but the
+    fingerprints are still taken so the next scan can compare against them.
+    """
+
+    def __init__(self, scanner, previous: Optional[PreviousScan] = None):
+        self.scanner = scanner
+        self.previous = previous
+        self.fingerprints: Dict[str, Any] = {}
+        self.changed: Set[str] = set()
+        self.reuse: Set[str] = set()
+        self.homepage: Optional[requests.Response] = None  # full response from the conditional GET
+        self.started = datetime.now(timezone.utc)
+
+    @property
+    def host(self) -> str:
+        return self.scanner.parsed_url.hostname or self.scanner.domain
+
+    def prepare(self) -> 'RescanPlan':
+        """Take the current fingerprints and decide which phases to reuse"""
+        if self.previous is None:
+            return self
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            dns_future = submit(executor, dns_fingerprint, self.host)
+            tls_future = submit(executor, tls_fingerprint, self.host, self.scanner.parsed_url.port or 443)
+            http_future = submit(executor, self._conditional_get)
+            self.fingerprints['dns'] = dns_future.result()
+            self.fingerprints['tls'] = tls_future.result()
+            self.fingerprints['http'] = http_future.result()
+
+        previous = self.previous.fingerprints
+        for name in ('dns', 'tls', 'http'):
+            if 'error' in self.fingerprints[name] or self.fingerprints[name] != previous.get(name):
+                self.changed.add(name)
+
+        # Recheck only the ports that were open; a new range is a full rescan,
+        # and so is a last full sweep too old to have seen newly opened ports
+        previous_ports = previous.get('ports') or {}
+        if 'dns' in self.changed or previous_ports.get('range') != self.scanner.port_scan_range:
+            self.changed.add('ports')
+        elif self.previous.reusable('ports'):
+            self.fingerprints['ports'] = self._recheck_ports(previous_ports)
+            if self.fingerprints['ports'] != previous_ports:
+                self.changed.add('ports')
+
+        self.reuse = {
+            phase for phase, inputs in PHASE_INPUTS.items()
+            if not self.changed.intersection(inputs) and self.previous.reusable(phase)
+        }
+        # The homepage phase fetches the page the http phases inspect (a 304
+        # leaves self.homepage empty); skip it only when none of them runs
+        if any(phase not in self.reuse for phase, inputs in PHASE_INPUTS.items() if 'http' in inputs):
+            self.reuse.discard('homepage')
+        return self
+
+    def _conditional_get(self) -> Dict[str, Any]:
+        previous = self.previous.fingerprints.get('http') or {}
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+        try:
+            response = self.scanner.session.get(self.scanner.target_url, headers=headers, timeout=15, verify=False)
+        except Exception as e:
+            return {'error': str(e)}
+        if response.status_code == 304:
+            return dict(previous)
+        # Changed (or validators ignored): this is the homepage the phases will inspect
+        self.homepage = response
+        return http_fingerprint(response)
+
+    def _recheck_ports(self, previous_ports: Dict[str, Any]) -> Dict[str, Any]:
+        open_ports = previous_ports.get('open') or []
+        if not open_ports:
+            return dict(previous_ports)
+        results = scan_ports(self.previous.results.get('dns', {}).get('ip_address') or self.host,
+                             ','.join(str(port) for port in open_ports))
+        return ports_fingerprint(previous_ports.get('range'), results)
+
+    def apply(self, phases: List[Phase]) -> List[Phase]:
+        """phases with the reused ones returning their previous result"""
+        return [
+            Phase(phase.name, self._carry(phase.name), phase.requires) if phase.name in self.reuse else phase
+            for phase in phases
+        ]
+
+    def _carry(self, name: str):
+        return lambda: self.previous.results.get(name)
+
+    def carried_findings(self) -> List[Dict[str, Any]]:
+        """Finding fields (with their phase) of every reused phase"""
+        carried = []
+        for phase in sorted(self.reuse):
+            for finding in self.previous.findings.get(phase, []):
+                carried.append(dict(finding, phase=phase))
+        return carried
+
+    def finish(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Fingerprints describing the target as this scan left it"""
+        fingerprints = dict(self.fingerprints)
+        if 'dns' not in fingerprints:
+            fingerprints['dns'] = dns_fingerprint(self.host)
+        if 'tls' not in fingerprints:
+            fingerprints['tls'] = tls_fingerprint(self.host, self.scanner.parsed_url.port or 443)
+
+        homepage = self.scanner.homepage
+        if 'http' not in fingerprints and homepage is not None:
+            fingerprints['http'] = http_fingerprint(homepage)
+
+        if 'ports' not in self.reuse:
+            port_results = results.get('ports')
+            if isinstance(port_results, dict) and 'error' not in port_results:
+                fingerprints['ports'] = ports_fingerprint(self.scanner.port_scan_range, port_results)
+            else:
+                fingerprints.pop('ports', None)
+        elif self.previous is not None:
+            fingerprints['ports'] = self.previous.fingerprints.get('ports')
+        return fingerprints
+
+    def phase_ran_at(self, results: Dict[str, Any]) -> Dict[str, str]:
+        """phase -> when it last actually ran (ISO 8601); reused phases keep their earlier time
+
+        Only clean runs count, and for ports only a sweep of the whole range.
+        """
+        ran_at = {}
+        for phase in PHASE_INPUTS:
+            if phase == 'homepage':
+                continue
+            if phase in self.reuse:
+                when = self.previous.phase_ran_at.get(phase)
+            else:
+                result = results.get(phase)
+                clean = isinstance(result, dict) and bool(result) and 'error' not in result
+                when = self.started if clean and not result.get('incomplete') else None
+            if when is not None:
+                ran_at[phase] = when.isoformat()
+        return ran_at
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'baseline_scan': self.previous.scan_id if self.previous else None,
+            'changed_inputs': sorted(self.changed),
+            'reused_phases': sorted(self.reuse - {'homepage'}),
+        }
+
+
+def stored_fingerprint(results: Dict[str, Any]) -> Dict[str, Any]:
+    """AdvancedSecurityScan.scan_fingerprint for a finished scan's results
+
+    Incomplete scans keep no inputs, so they never become a baseline.
+    """
+    incremental = results.get('incremental') or {}
+    stored = {key: value for key, value in incremental.items() if key != 'fingerprints'}
+    if results.get('scan_incomplete') or not incremental.get('fingerprints'):
+        return stored
+    stored['inputs'] = incremental['fingerprints']
+    stored['phase_results'] = {
+        phase: result for phase, result in (results.get('results') or {}).items()
+        if phase in PHASE_INPUTS and phase not in PHASE_COLUMNS and isinstance(result, dict)
+    }
+    return stored
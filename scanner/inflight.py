@@ -0,0 +1,221 @@
+"""
+Scan Coalescing
+Identical scans requested at the same time (a domain posted publicly draws
+many) run once. Requests are keyed by normalized target URL and scan
+profile; the first request for a key runs the scan and every identical
+request arriving while it is in flight attaches to it and receives the same
+result.
+
+The registry lives in the database (InFlightScan rows) because the default
+cache is per-process and the web workers do not share it. Within a process,
+SingleFlight keeps concurrent threads from polling the database for a key.
+A running scan holds its row for a lease; a leader that dies leaves a row
+that expires and the next request for the key takes over. Finished results
+linger briefly so followers that are between polls still collect them
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .deadline import DEFAULT_SCAN_TIMEOUT, check_deadline
+from .models import InFlightScan
+from .ttl_cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'LEASE': DEFAULT_SCAN_TIMEOUT + 60,  # seconds a running scan holds its key
+    'LINGER': 10,  # seconds a finished result stays available to late followers
+    'POLL_INTERVAL': 0.5,  # seconds between a follower's checks on the leader
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_local = SingleFlight()
+
+
+def get_setting(name: str) -> Any:
+    from django.conf import settings
+    return getattr(settings, 'SCAN_COALESCING', {}).get(name, DEFAULTS[name])
+
+
+def normalize_target(url: str) -> str:
+    """Canonical form of a scan URL: lowercase scheme and host, no default port or fragment"""
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f'[{host}]'
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def scan_key(url: str, profile: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Registry key for a scan of url with the given profile and options"""
+    identity = json.dumps([normalize_target(url), profile, options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:6]}"
+
+
+def _lead(key: str, owner: str, url: str, profile: str, lease: float) -> bool:
+    """Register owner as the scan's leader; False when another scan holds the key"""
+    now = timezone.now()
+    # Leaders that died and results past their linger time free their keys;
+    # clearing every expired row here keeps the registry small
+    InFlightScan.objects.filter(expires_at__lt=now).delete()
+    try:
+        with transaction.atomic():
+            InFlightScan.objects.create(
+                key=key, url=url[:500], profile=profile, owner=owner,
+                started_at=now, expires_at=now + timedelta(seconds=lease),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def _attach(key: str):
+    InFlightScan.objects.filter(key=key, finished_at__isnull=True).update(waiters=F('waiters') + 1)
+
+
+def _poll(key: str) -> Tuple[str, Optional[str]]:
+    """('running' | 'finished' | 'gone', result JSON)"""
+    row = InFlightScan.objects.filter(key=key).values('finished_at', 'result', 'expires_at').first()
+    if row is None or row['expires_at'] < timezone.now():
+        return 'gone', None
+    if row['finished_at'] is None:
+        return 'running', None
+    return 'finished', row['result']
+
+
+def _publish(key: str, owner: str, result: Any):
+    from .bulk_scan import ResultEncoder
+    now = timezone.now()
+    InFlightScan.objects.filter(key=key, owner=owner).update(
+        result=json.dumps(result, cls=ResultEncoder),
+        finished_at=now,
+        expires_at=now + timedelta(seconds=get_setting('LINGER')),
+    )
+
+
+def _abandon(key: str, owner: str):
+    """Free the key after a failed scan; a waiting follower runs it instead"""
+    InFlightScan.objects.filter(key=key, owner=owner).delete()
+
+
+def _discard_finished(key: str):
+    InFlightScan.objects.filter(key=key, finished_at__isnull=False).delete()
+
+
+def _decode(result: str, decode: Optional[Callable[[Any], Any]]) -> Any:
+    value = json.loads(result)
+    return decode(value) if decode else value
+
+
+def coalesce(key: str, run: Callable[[], Any], url: str = '', profile: str = '',
+             lease: Optional[float] = None, decode: Optional[Callable[[Any], Any]] = None,
+             reuse_finished: bool = True) -> Any:
+    """Return run()'s result, sharing one execution among identical concurrent calls
+
+    Followers receive the leader's result as it round-trips through JSON;
+    decode restores the types JSON does not carry (datetimes and the like).
+    reuse_finished=False still joins a running scan but not a lingering result.
+    """
+    if not get_setting('ENABLED'):
+        return run()
+    return _local.do(key, lambda: _coalesce(key, run, url, profile, lease, decode, reuse_finished))
+
+
+def _coalesce(key, run, url, profile, lease, decode, reuse_finished):
+    lease = lease or get_setting('LEASE')
+    owner = _owner()
+    attached = False
+    while True:
+        if _lead(key, owner, url, profile, lease):
+            break
+        state, result = _poll(key)
+        if state == 'finished':
+            if reuse_finished:
+                return _decode(result, decode)
+            _discard_finished(key)
+        if state == 'running':
+            if not attached:
+                _attach(key)
+                attached = True
+                print(f"🔗 Attached to the {profile} scan of {url} already in progress")
+            # A follower waits no longer than its own scan deadline
+            check_deadline()
+            time.sleep(get_setting('POLL_INTERVAL'))
+        # 'gone': the leader failed or expired; try to lead
+
+    try:
+        result = run()
+    except BaseException:
+        _abandon(key, owner)
+        raise
+    try:
+        _publish(key, owner, result)
+    except Exception as e:
+        # The caller still has its result; followers take over once the lease ends
+        logger.warning("Could not publish the %s scan of %s to waiting requests: %s", profile, url, e)
+    return result
+
+
+async def acoalesce(key: str, run: Callable[[], Awaitable[Any]], url: str = '', profile: str = '',
+                    lease: Optional[float] = None, decode: Optional[Callable[[Any], Any]] = None,
+                    reuse_finished: bool = True) -> Any:
+    """coalesce() for coroutines: followers wait on the event loop instead of a thread"""
+    if not get_setting('ENABLED'):
+        return await run()
+    lease = lease or get_setting('LEASE')
+    owner = _owner()
+    attached = False
+    while True:
+        if await sync_to_async(_lead)(key, owner, url, profile, lease):
+            break
+        state, result = await sync_to_async(_poll)(key)
+        if state == 'finished':
+            if reuse_finished:
+                return _decode(result, decode)
+            await sync_to_async(_discard_finished)(key)
+        if state == 'running':
+            if not attached:
+                await sync_to_async(_attach)(key)
+                attached = True
+                print(f"🔗 Attached to the {profile} scan of {url} already in progress")
+            check_deadline()
+            await asyncio.sleep(get_setting('POLL_INTERVAL'))
+
+    try:
+        result = await run()
+    except BaseException:
+        await sync_to_async(_abandon)(key, owner)
+        raise
+    try:
+        await sync_to_async(_publish)(key, owner, result)
+    except Exception as e:
+        logger.warning("Could not publish the %s scan of %s to waiting requests: %s", profile, url, e)
+    return result
@@ -13,6 +13,7 @@ from .enhanced_vulnerability_validator import VulnerabilityValidator, ValidatedV
 from .permission_verification import PermissionVerificationSystem, ScanningEthicsEnforcer
 from .legal_compliance import LegalComplianceSystem, DataRetentionManager
 from .modern_vulnerability_detector import ModernVulnerabilityDetector, ModernVulnerability
+from . import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +59,13 @@ class IntegratedSecuritySystem:
             (success, scan_result)
         """
         
+        # Permission checks and every detector share one memo of identical
+        # idempotent requests (robots.txt, security.txt, the homepage, ...)
+        with http_client.scan_scope() as request_memo:
+            return self._process_scan_request(scan_request, request_memo)
+    
+    def _process_scan_request(self, scan_request: ScanRequest,
+                              request_memo: http_client.RequestMemo) -> Tuple[bool, ScanResult]:
         scan_id = self._generate_scan_id(scan_request)
         
         try:
@@ -153,7 +161,8 @@ class IntegratedSecuritySystem:
                 scan_metadata={
                     'scan_duration': 0,  # Would be calculated
                     'total_checks': len(raw_vulnerabilities),
-                    'validation_method': 'enhanced_validation'
+                    'validation_method': 'enhanced_validation',
+                    'shared_requests': request_memo.stats()['shared']
                 },
                 recommendations=recommendations
             )
@@ -0,0 +1,242 @@
+"""
+Database-Backed Scan Job Queue
+Views enqueue scans as AdvancedSecurityScan rows in the 'queued' state and
+return at once; `manage.py scan_worker` processes claim them. A claim is a
+conditional UPDATE, so two workers never run the same job, and it leases the
+job for a visibility timeout: a job whose worker died goes back to the queue
+once the lease runs out. Failed jobs are retried with backoff up to
+MAX_ATTEMPTS times. A scan enqueued while an identical one (same target,
+type and options) is queued or running joins that job instead of adding one,
+and one completed within the scan_results cache TTL is served as it is
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .deadline import DEFAULT_SCAN_TIMEOUT
+from .inflight import scan_key
+from .performance_optimizations import CacheManager
+from .models import AdvancedSecurityScan
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 30,  # seconds, doubled per attempt
+    'VISIBILITY_GRACE': 120,  # seconds past the scan deadline before a running job is presumed lost
+    'POLL_INTERVAL': 2.0,  # seconds an idle worker waits between claims
+    'RUN_INLINE': False,  # run jobs inside the enqueuing request (development without a worker)
+}
+
+
+def get_setting(name: str) -> Any:
+    from django.conf import settings
+    return getattr(settings, 'SCAN_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+class ScanJobError(Exception):
+    """A job ran but its scan failed; the job is retried while attempts remain"""
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:6]}"
+
+
+def enqueue(url: str, scan_type: str = 'advanced', force_refresh: bool = False, **options) -> AdvancedSecurityScan:
+    """Queue a scan of url and return its record; its id is the job id
+
+    When an identical job is already queued or running, that job is
+    returned instead and its result serves both requests. Unless
+    force_refresh is set, so is an identical scan completed within the
+    scan_results cache TTL. The returned record's cache_status says which.
+    """
+    dedupe_key = scan_key(url, scan_type, options)
+    if not force_refresh:
+        recent = fresh_scan(dedupe_key)
+        if recent is not None:
+            return recent
+
+    options = dict(options, force_refresh=True) if force_refresh else options
+    while True:
+        try:
+            with transaction.atomic():
+                scan = AdvancedSecurityScan.objects.create(
+                    url=url,
+                    domain=url.split('/')[2] if '://' in url else url,
+                    scan_type=scan_type,
+                    job_options=options,
+                    status='queued',
+                    dedupe_key=dedupe_key,
+                )
+            break
+        except IntegrityError:
+            existing = AdvancedSecurityScan.objects.filter(
+                dedupe_key=dedupe_key, status__in=('queued', 'running')
+            ).first()
+            # None: the job finished between the insert and the lookup
+            if existing is not None:
+                logger.info("Scan of %s joined pending job %s", url, existing.id)
+                existing.cache_status = CacheManager.cache_status('joined', scan_results_ttl())
+                return existing
+
+    scan.cache_status = CacheManager.cache_status('refresh' if force_refresh else 'miss', scan_results_ttl())
+    if get_setting('RUN_INLINE'):
+        run_job(scan, worker_name())
+        scan.refresh_from_db()
+    return scan
+
+
+def scan_results_ttl() -> int:
+    return CacheManager.CACHE_TIMEOUTS['scan_results']
+
+
+def fresh_scan(dedupe_key: str) -> Optional[AdvancedSecurityScan]:
+    """Latest completed scan for dedupe_key younger than the scan_results TTL, if any"""
+    scan = (
+        AdvancedSecurityScan.objects
+        .filter(dedupe_key=dedupe_key, status='completed',
+                scan_date__gte=timezone.now() - timedelta(seconds=scan_results_ttl()))
+        .order_by('-scan_date')
+        .first()
+    )
+    if scan is not None:
+        scan.cache_status = CacheManager.cache_status('hit', scan_results_ttl(), scan.scan_date.timestamp())
+    return scan
+
+
+def visibility_timeout(scan: AdvancedSecurityScan) -> timedelta:
+    """How long a claim lasts: the scan's own deadline plus a grace period"""
+    from .advanced_views import get_scan_configuration, get_scan_timeout
+    configuration = get_scan_configuration(scan.job_options.get('configuration_id'))
+    seconds = get_scan_timeout(configuration) if configuration else DEFAULT_SCAN_TIMEOUT
+    return timedelta(seconds=seconds + get_setting('VISIBILITY_GRACE'))
+
+
+def requeue_expired() -> int:
+    """Put running jobs whose lease ran out back in the queue (or fail them); returns how many"""
+    now = timezone.now()
+    expired = AdvancedSecurityScan.objects.filter(status='running', locked_until__lt=now)
+    failed = expired.filter(attempts__gte=get_setting('MAX_ATTEMPTS')).update(
+        status='failed', locked_by='', locked_until=None,
+        last_error='Worker lost: visibility timeout expired'
+    )
+    requeued = expired.update(status='queued', locked_by='', locked_until=None, available_at=now)
+    if failed or requeued:
+        logger.warning("Recovered %s expired scan jobs (%s failed for good)", failed + requeued, failed)
+    return failed + requeued
+
+
+def claim(worker: str) -> Optional[AdvancedSecurityScan]:
+    """Lease the next due job to worker, or None when the queue is empty"""
+    requeue_expired()
+    while True:
+        now = timezone.now()
+        candidate = (
+            AdvancedSecurityScan.objects
+            .filter(status='queued', available_at__lte=now)
+            .order_by('available_at', 'id')
+            .first()
+        )
+        if candidate is None:
+            return None
+
+        # Compare-and-set: only one worker's UPDATE matches a still-queued row
+        claimed = AdvancedSecurityScan.objects.filter(id=candidate.id, status='queued').update(
+            status='running',
+            locked_by=worker,
+            locked_until=now + visibility_timeout(candidate),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            candidate.refresh_from_db()
+            return candidate
+
+
+def finish(scan: AdvancedSecurityScan, worker: str, status: str):
+    """Release the lease; a worker that lost its lease leaves the row alone"""
+    AdvancedSecurityScan.objects.filter(id=scan.id, locked_by=worker).update(
+        status=status, locked_by='', locked_until=None
+    )
+
+
+def fail(scan: AdvancedSecurityScan, worker: str, error: str):
+    """Retry with backoff while attempts remain, else mark the job failed"""
+    mine = AdvancedSecurityScan.objects.filter(id=scan.id, locked_by=worker)
+    if scan.attempts < get_setting('MAX_ATTEMPTS'):
+        delay = get_setting('RETRY_BACKOFF') * 2 ** (scan.attempts - 1)
+        mine.update(status='queued', locked_by='', locked_until=None, last_error=error,
+                    available_at=timezone.now() + timedelta(seconds=delay))
+        logger.warning("Scan job %s failed (attempt %s), retrying in %ss: %s", scan.id, scan.attempts, delay, error)
+    else:
+        mine.update(status='failed', locked_by='', locked_until=None, last_error=error)
+        logger.error("Scan job %s failed after %s attempts: %s", scan.id, scan.attempts, error)
+
+
+def run_advanced_scan(scan: AdvancedSecurityScan) -> str:
+    from .advanced_views import get_scan_configuration, perform_advanced_scan
+    options = scan.job_options
+    results = perform_advanced_scan(
+        scan.url, scan.id,
+        get_scan_configuration(options.get('configuration_id')),
+        incremental=bool(options.get('incremental')),
+        force_refresh=bool(options.get('force_refresh')),
+    )
+    if 'error' in results:
+        raise ScanJobError(results['error'])
+    return 'incomplete' if results.get('scan_incomplete') else 'completed'
+
+
+def run_budget_scan(scan: AdvancedSecurityScan) -> str:
+    """Budget scan whose results (as the budget scanner page shows them) are kept in webapp_scan_results"""
+    from .advanced_views import get_scan_timeout
+    from .budget_scanner import run_budget_scan as budget_scan
+
+    scan.webapp_scan_results = budget_scan(scan.url, scan.job_options.get('scan_types'), get_scan_timeout())
+    scan.total_findings = scan.webapp_scan_results['total_findings']
+    scan.save(update_fields=['webapp_scan_results', 'total_findings'])
+    return 'incomplete' if scan.webapp_scan_results['scan_incomplete'] else 'completed'
+
+
+RUNNERS: Dict[str, Callable[[AdvancedSecurityScan], str]] = {
+    'advanced': run_advanced_scan,
+    'budget': run_budget_scan,
+}
+
+
+def run_job(scan: AdvancedSecurityScan, worker: str):
+    """Run a job (claimed by worker, or freshly enqueued) and record how it ended"""
+    if scan.status == 'queued':
+        scan.status, scan.locked_by, scan.attempts = 'running', worker, scan.attempts + 1
+        scan.save(update_fields=['status', 'locked_by', 'attempts'])
+    if scan.attempts > 1:
+        scan.findings.all().delete()  # left over from the failed attempt
+
+    try:
+        runner = RUNNERS.get(scan.scan_type)
+        if runner is None:
+            raise ScanJobError(f"Unknown scan type '{scan.scan_type}'")
+        status = runner(scan)
+    except Exception as e:
+        fail(scan, worker, str(e))
+    else:
+        finish(scan, worker, status)
+    finally:
+        close_old_connections()
+
+
+def pending_jobs() -> Dict[str, int]:
+    """Queue depth by state, for the worker's status line"""
+    counts = {'queued': 0, 'running': 0}
+    for status in counts:
+        counts[status] = AdvancedSecurityScan.objects.filter(status=status).count()
+    counts['due'] = AdvancedSecurityScan.objects.filter(status='queued', available_at__lte=timezone.now()).count()
+    return counts
@@ -16,6 +16,8 @@ from django.core.cache import cache
 from django.conf import settings
 import requests
 
+from . import http_client
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -340,7 +342,7 @@ class LegalComplianceSystem:
             for path in consent_paths:
                 consent_url = target_url.rstrip('/') + path
                 try:
-                    response = requests.get(consent_url, timeout=5, verify=False)
+                    response = http_client.get(consent_url, timeout=5, verify=False)
                     if response.status_code == 200:
                         content = response.text.lower()
                         consent_indicators = [
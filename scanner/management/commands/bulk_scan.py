@@ -0,0 +1,69 @@
+import contextlib
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.bulk_scan import (
+    DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, MAX_URLS, SCANNERS, BulkScanner, ndjson, normalize_urls
+)
+
+
+class Command(BaseCommand):
+    help = 'Scan a list of URLs with bounded concurrency, writing one NDJSON result per URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="File with one URL per line ('-' for stdin)")
+        parser.add_argument('--scan-type', default='basic', choices=sorted(SCANNERS))
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Scans running at the same time')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                            help='Scans running at the same time against one host')
+        parser.add_argument('--output', '-o', default='-', help="NDJSON output file ('-' for stdout)")
+        parser.add_argument('--no-save', action='store_true', help='Do not store the results in the database')
+        parser.add_argument('--force-refresh', action='store_true', help='Rescan targets that have cached results')
+
+    def handle(self, *args, **options):
+        try:
+            source = sys.stdin if options['input'] == '-' else open(options['input'], encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['input']}: {e}")
+        with source:
+            urls, invalid = normalize_urls(source)
+        if not urls:
+            raise CommandError('No URLs to scan')
+        if len(urls) > MAX_URLS:
+            raise CommandError(f'At most {MAX_URLS} URLs per run ({len(urls)} given)')
+
+        scanner = BulkScanner(
+            scan_type=options['scan_type'],
+            concurrency=options['concurrency'],
+            per_host=options['per_host'],
+            save=not options['no_save'],
+            force_refresh=options['force_refresh'],
+        )
+        self.stderr.write(
+            f"Scanning {len(urls)} URLs ({options['scan_type']}, "
+            f"{scanner.concurrency} at a time, {scanner.per_host} per host)"
+        )
+
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        started = time.time()
+        counts = {'ok': 0, 'error': len(invalid)}
+        try:
+            for line in ndjson(invalid):
+                output.write(line)
+            # The scanners print progress; keep it out of the NDJSON stream
+            with contextlib.redirect_stdout(sys.stderr):
+                for record in scanner.run(urls):
+                    counts[record['status']] += 1
+                    output.write(next(ndjson([record])))
+                    output.flush()
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Done in {time.time() - started:.1f}s: {counts['ok']} scanned, {counts['error']} failed, "
+            f"{scanner.saved} saved"
+        ))
@@ -0,0 +1,66 @@
+import glob
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.vulnerability_db import HAS_IJSON, NVD_IMPORT_BATCH_SIZE, CVERepository
+
+# Year feeds first so the 'modified' and 'recent' feeds are applied on top
+INCREMENTAL_FEEDS = ('modified', 'recent')
+
+
+def feed_order(path):
+    name = os.path.basename(path)
+    return (any(feed in name for feed in INCREMENTAL_FEEDS), name)
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load NVD 2.0 JSON feed files (nvdcve-2.0-*.json[.gz]) into the CVE store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='Feed files, or directories holding nvdcve-2.0-*.json.gz feeds')
+        parser.add_argument('--batch-size', type=int, default=NVD_IMPORT_BATCH_SIZE,
+                            help='CVE records per bulk upsert (one bulk_create with update_conflicts), each committed on its own')
+        parser.add_argument('--force', action='store_true',
+                            help='Reload every record, not only those newer than the cached copy '
+                                 '(rebuilds the CPE index of earlier imports)')
+
+    def handle(self, *args, **options):
+        feeds = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                feeds.extend(glob.glob(os.path.join(path, 'nvdcve-2.0-*.json.gz')))
+                feeds.extend(glob.glob(os.path.join(path, 'nvdcve-2.0-*.json')))
+            elif os.path.isfile(path):
+                feeds.append(path)
+            else:
+                raise CommandError(f'No such feed file or directory: {path}')
+        if not feeds:
+            raise CommandError('No NVD feed files found')
+
+        if not HAS_IJSON:
+            self.stderr.write('ijson not installed - using the built-in (slower) streaming parser')
+
+        repository = CVERepository()
+        started = time.time()
+        totals = {'processed': 0, 'upserted': 0, 'rejected': 0, 'skipped': 0}
+        for path in sorted(set(feeds), key=feed_order):
+            feed_started = time.time()
+            try:
+                stats = repository.import_nvd_feed(path, batch_size=max(1, options['batch_size']), force=options['force'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Failed to import {path}: {e}')
+            for key in totals:
+                totals[key] += stats[key]
+            self.stdout.write(
+                f"{stats['feed']}: {stats['processed']} CVEs, {stats['upserted']} updated, "
+                f"{stats['skipped']} unchanged, {stats['rejected']} rejected "
+                f"({time.time() - feed_started:.1f}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(set(feeds))} feeds into the CVE store in {time.time() - started:.1f}s: "
+            f"{totals['processed']} CVEs, {totals['upserted']} updated, {totals['rejected']} rejected"
+        ))
@@ -0,0 +1,71 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from scanner import job_queue
+
+
+class Command(BaseCommand):
+    help = 'Process queued scans (advanced and budget) from the database job queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help='Scans to run at the same time (one thread each)')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to wait between claims while the queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for new jobs')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        poll_interval = options['poll_interval'] or job_queue.get_setting('POLL_INTERVAL')
+
+        # Finish the scans in hand, then exit; a second signal is not caught again
+        def stop(signum, frame):
+            self.stdout.write(self.style.WARNING('Stopping after the running scans finish...'))
+            self.stopping.set()
+            signal.signal(signum, signal.SIG_DFL)
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        counts = job_queue.pending_jobs()
+        self.stdout.write(
+            f"Scan worker started with {options['concurrency']} slots "
+            f"({counts['queued']} queued, {counts['running']} running)"
+        )
+
+        threads = [
+            threading.Thread(target=self.work, args=(poll_interval, options['burst']), daemon=True)
+            for _ in range(max(1, options['concurrency']))
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS('Scan worker stopped'))
+
+    def work(self, poll_interval, burst):
+        worker = job_queue.worker_name()
+        try:
+            while not self.stopping.is_set():
+                scan = job_queue.claim(worker)
+                if scan is None:
+                    if burst:
+                        return
+                    self.stopping.wait(poll_interval)
+                    continue
+
+                self.stdout.write(f"▶️ Job {scan.id}: {scan.scan_type} scan of {scan.url} (attempt {scan.attempts})")
+                started = time.time()
+                job_queue.run_job(scan, worker)
+                scan.refresh_from_db()
+                style = self.style.SUCCESS if scan.status in ('completed', 'incomplete') else self.style.WARNING
+                self.stdout.write(style(f"Job {scan.id}: {scan.status} in {time.time() - started:.1f}s"))
+        finally:
+            close_old_connections()
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_alter_securityfinding_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='scan_fingerprint',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='securityfinding',
+            name='phase',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.25 on 2026-10-17 04:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def mark_existing_scans_completed(apps, schema_editor):
+    # Scans from before the queue ran in the request and are already done
+    AdvancedSecurityScan = apps.get_model('scanner', 'AdvancedSecurityScan')
+    AdvancedSecurityScan.objects.update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0004_advancedsecurityscan_scan_fingerprint_securityfinding_phase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='job_options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='locked_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='scan_type',
+            field=models.CharField(choices=[('advanced', 'Advanced Scan'), ('budget', 'Budget Scan')], default='advanced', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('incomplete', 'Incomplete'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='advancedsecurityscan',
+            index=models.Index(fields=['status', 'available_at'], name='scanner_adv_status_43b4f1_idx'),
+        ),
+        migrations.RunPython(mark_existing_scans_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.25 on 2026-10-17 04:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_scan_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InFlightScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('profile', models.CharField(max_length=50)),
+                ('owner', models.CharField(max_length=100)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.TextField(blank=True)),
+                ('waiters', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='advancedsecurityscan',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='advancedsecurityscan',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running']), models.Q(('dedupe_key', ''), _negated=True)), fields=('dedupe_key',), name='unique_pending_scan_job'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    # FTS5 tables and triggers on SQLite, tsvector columns on PostgreSQL
+    from scanner.search import install_search_indexes
+    install_search_indexes(schema_editor.connection)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from scanner.search import drop_search_indexes
+    drop_search_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0006_scan_coalescing'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
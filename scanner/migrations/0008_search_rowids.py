@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def replace_cve_search_triggers(apps, schema_editor):
+    # The CVE triggers now find FTS rows through a rowids table instead of
+    # a full-text query; drop the old ones and let the repair rebuild them
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from scanner.search import INDEXES, install_search_indexes
+    # SQLite keeps each trigger's SQL without its IF NOT EXISTS
+    triggers = {
+        name: sql.replace('CREATE TRIGGER IF NOT EXISTS', 'CREATE TRIGGER', 1)
+        for name, sql in INDEXES['scanner.VulnerabilityDatabase'].sqlite_triggers().items()
+    }
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+        stale = [name for name, sql in cursor.fetchall() if name in triggers and sql != triggers[name]]
+    if not stale:
+        return
+    for trigger in triggers:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}', params=None)
+    install_search_indexes(schema_editor.connection, only_existing=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0007_full_text_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_cve_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.25 on 2026-10-17 04:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0008_search_rowids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CPEMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part', models.CharField(blank=True, max_length=1)),
+                ('vendor', models.CharField(max_length=255)),
+                ('product', models.CharField(max_length=255)),
+                ('version', models.CharField(blank=True, max_length=100)),
+                ('version_start_including', models.CharField(blank=True, max_length=100)),
+                ('version_start_excluding', models.CharField(blank=True, max_length=100)),
+                ('version_end_including', models.CharField(blank=True, max_length=100)),
+                ('version_end_excluding', models.CharField(blank=True, max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NVDFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=100, unique=True)),
+                ('feed_timestamp', models.CharField(blank=True, max_length=40)),
+                ('imported_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cve_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vulnerabilitydatabase',
+            index=models.Index(fields=['cvss_score'], name='scanner_vul_cvss_sc_b3cf91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vulnerabilitydatabase',
+            index=models.Index(fields=['published_date'], name='scanner_vul_publish_b06cd0_idx'),
+        ),
+        migrations.AddField(
+            model_name='cpematch',
+            name='vulnerability',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cpe_matches', to='scanner.vulnerabilitydatabase'),
+        ),
+        migrations.AddIndex(
+            model_name='cpematch',
+            index=models.Index(fields=['product', 'vendor', 'version'], name='scanner_cpe_product_2316f5_idx'),
+        ),
+    ]
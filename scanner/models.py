@@ -40,9 +40,38 @@ class SecurityScan(models.Model):
     advanced_scan_data = models.JSONField(default=dict, blank=True)
     risk_level = models.CharField(max_length=20, default='unknown')
     
+    @classmethod
+    def from_results(cls, url, results):
+        """Unsaved record for a SecurityScanner.scan_all() result"""
+        return cls(
+            url=url,
+            ssl_valid=results.get('ssl_valid', False),
+            ssl_issuer=results.get('ssl_issuer', ''),
+            ssl_expiry=results.get('ssl_expiry'),
+            ssl_grade=results.get('ssl_grade', 'F'),
+            has_hsts=results.get('has_hsts', False),
+            has_csp=results.get('has_csp', False),
+            has_xframe=results.get('has_xframe', False),
+            has_xss_protection=results.get('has_xss_protection', False),
+            has_content_type=results.get('has_content_type', False),
+            cms_detected=results.get('cms_detected', ''),
+            cms_version=results.get('cms_version', ''),
+            response_time=results.get('response_time'),
+            status_code=results.get('status_code'),
+            security_score=results.get('security_score', 0),
+            grade=results.get('grade', 'F'),
+            server_info=results.get('server_info', ''),
+        )
+    
     def __str__(self):
         return f"{self.url} - {self.grade} ({self.security_score}/100)"
 
+class AdvancedSecurityScanQuerySet(models.QuerySet):
+    def advanced(self):
+        """Advanced scans only; budget scan jobs share the table (see job_queue.py)"""
+        return self.filter(scan_type='advanced')
+
+
 class AdvancedSecurityScan(models.Model):
     """Enhanced security scan with comprehensive analysis"""
     RISK_LEVELS = [
@@ -52,6 +81,19 @@ class AdvancedSecurityScan(models.Model):
         ('critical', 'Critical Risk'),
     ]
     
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('incomplete', 'Incomplete'),  # stopped at the scan deadline
+        ('failed', 'Failed'),
+    ]
+    
+    SCAN_TYPES = [
+        ('advanced', 'Advanced Scan'),
+        ('budget', 'Budget Scan'),
+    ]
+    
     url = models.URLField(max_length=500)
     domain = models.CharField(max_length=255)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -73,6 +115,9 @@ class AdvancedSecurityScan(models.Model):
     security_headers = models.JSONField(default=dict, blank=True)
     threat_intelligence = models.JSONField(default=dict, blank=True)
     
+    # Change-detection fingerprints for incremental rescans (see incremental.py)
+    scan_fingerprint = models.JSONField(default=dict, blank=True)
+    
     # Findings Summary
     total_findings = models.IntegerField(default=0)
     critical_findings = models.IntegerField(default=0)
@@ -81,8 +126,36 @@ class AdvancedSecurityScan(models.Model):
     low_findings = models.IntegerField(default=0)
     info_findings = models.IntegerField(default=0)
     
+    # Background job state (see job_queue.py)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    scan_type = models.CharField(max_length=20, choices=SCAN_TYPES, default='advanced')
+    job_options = models.JSONField(default=dict, blank=True)
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # queued jobs wait until then (retry backoff)
+    locked_by = models.CharField(max_length=100, blank=True)  # worker running the job
+    locked_until = models.DateTimeField(null=True, blank=True)  # visibility timeout of a running job
+    last_error = models.TextField(blank=True)
+    # Target and profile hash; one queued/running job per key (see inflight.py)
+    dedupe_key = models.CharField(max_length=64, blank=True)
+    
+    objects = AdvancedSecurityScanQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-scan_date']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']) & ~models.Q(dedupe_key=''),
+                name='unique_pending_scan_job',
+            ),
+        ]
+    
+    @property
+    def is_pending(self):
+        return self.status in ('queued', 'running')
     
     def __str__(self):
         return f"Advanced Scan: {self.url} - {self.risk_level} ({self.security_score}/100)"
@@ -123,6 +196,7 @@ class SecurityFinding(models.Model):
     affected_component = models.CharField(max_length=200, blank=True)
     proof_of_concept = models.TextField(blank=True)
     references = models.JSONField(default=list, blank=True)
+    phase = models.CharField(max_length=50, blank=True)  # scan phase that raised it
     
     created_date = models.DateTimeField(default=timezone.now)
     
@@ -133,7 +207,7 @@ class SecurityFinding(models.Model):
         return f"{self.severity.upper()}: {self.title}"
 
 class VulnerabilityDatabase(models.Model):
-    """Local vulnerability database cache"""
+    """Local vulnerability database: the CVE store behind vulnerability_db.CVERepository"""
     cve_id = models.CharField(max_length=20, unique=True, primary_key=True)
     cvss_score = models.FloatField()
     severity = models.CharField(max_length=20)
@@ -146,10 +220,44 @@ class VulnerabilityDatabase(models.Model):
     
     class Meta:
         ordering = ['-cvss_score', '-published_date']
+        indexes = [
+            models.Index(fields=['cvss_score']),
+            models.Index(fields=['published_date']),
+        ]
     
     def __str__(self):
         return f"{self.cve_id} - CVSS: {self.cvss_score}"
 
+class CPEMatch(models.Model):
+    """One vulnerable CPE configuration of a CVE, with its version range"""
+    vulnerability = models.ForeignKey(VulnerabilityDatabase, on_delete=models.CASCADE, related_name='cpe_matches')
+    part = models.CharField(max_length=1, blank=True)  # a(pplication), o(perating system), h(ardware)
+    vendor = models.CharField(max_length=255)
+    product = models.CharField(max_length=255)
+    version = models.CharField(max_length=100, blank=True)
+    version_start_including = models.CharField(max_length=100, blank=True)
+    version_start_excluding = models.CharField(max_length=100, blank=True)
+    version_end_including = models.CharField(max_length=100, blank=True)
+    version_end_excluding = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'vendor', 'version']),
+        ]
+    
+    def __str__(self):
+        return f"{self.vulnerability_id}: {self.vendor}:{self.product}:{self.version or '*'}"
+
+class NVDFeed(models.Model):
+    """NVD feed file loaded by `manage.py import_nvd`"""
+    feed = models.CharField(max_length=100, unique=True)
+    feed_timestamp = models.CharField(max_length=40, blank=True)  # generation time from the feed header
+    imported_date = models.DateTimeField(default=timezone.now)
+    cve_count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.feed} ({self.cve_count} CVEs, imported {self.imported_date:%Y-%m-%d %H:%M})"
+
 class ThreatIntelligence(models.Model):
     """Threat intelligence data"""
     INDICATOR_TYPES = [
@@ -231,3 +339,23 @@ class ScanConfiguration(models.Model):
     
     def __str__(self):
         return self.name
+
+class InFlightScan(models.Model):
+    """Registry of synchronous scans in progress, shared by all worker processes
+
+    The process that inserts the row for a key runs the scan; identical
+    requests arriving meanwhile wait for its result (see inflight.py).
+    """
+    key = models.CharField(max_length=64, unique=True)  # normalized target + scan profile
+    url = models.URLField(max_length=500)
+    profile = models.CharField(max_length=50)
+    owner = models.CharField(max_length=100)
+    started_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)  # lease while running, linger once finished
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.TextField(blank=True)  # JSON, set when finished
+    waiters = models.IntegerField(default=0)  # requests that attached to this scan
+    
+    def __str__(self):
+        state = 'finished' if self.finished_at else 'running'
+        return f"{self.profile} scan of {self.url} ({state}, {self.waiters} waiting)"
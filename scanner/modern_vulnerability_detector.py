@@ -18,6 +18,9 @@ from bs4 import BeautifulSoup
 import ssl
 import socket
 
+from .http_client import create_client
+from .tls_probe import probe_tls
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -45,10 +48,7 @@ class ModernVulnerabilityDetector:
         self.target_url = target_url
         self.parsed_url = urlparse(target_url)
         self.domain = self.parsed_url.netloc
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ZtionSec-ModernScanner/2.0 (Security Research)'
-        })
+        self.session = create_client(user_agent='ZtionSec-ModernScanner/2.0 (Security Research)')
         self.vulnerabilities = []
         self.owasp_2021_categories = self._load_owasp_2021_mappings()
         
@@ -528,33 +528,31 @@ class ModernVulnerabilityDetector:
         issues = []
         
         try:
-            # Get SSL certificate info
-            context = ssl.create_default_context()
-            with socket.create_connection((self.domain, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Check certificate expiry
-                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    if not_after < datetime.now() + timedelta(days=30):
-                        issues.append({
-                            'title': 'SSL Certificate Expiring Soon',
-                            'description': f'Certificate expires on {not_after}',
-                            'severity': 'medium',
-                            'remediation': 'Renew SSL certificate before expiration',
-                            'evidence': f'Expires: {not_after}'
-                        })
-                    
-                    # Check for weak signature algorithm
-                    if 'sha1' in cert.get('signature_algorithm', '').lower():
-                        issues.append({
-                            'title': 'Weak SSL Certificate Signature',
-                            'description': 'Certificate uses weak SHA-1 signature algorithm',
-                            'severity': 'high',
-                            'remediation': 'Replace certificate with SHA-256 or stronger signature',
-                            'evidence': f'Signature: {cert.get("signature_algorithm")}'
-                        })
-        
+            # Get SSL certificate info from the shared TLS cache
+            tls = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443).require_verified()
+            cert = tls.peer_cert
+            
+            # Check certificate expiry
+            not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            if not_after < datetime.now() + timedelta(days=30):
+                issues.append({
+                    'title': 'SSL Certificate Expiring Soon',
+                    'description': f'Certificate expires on {not_after}',
+                    'severity': 'medium',
+                    'remediation': 'Renew SSL certificate before expiration',
+                    'evidence': f'Expires: {not_after}'
+                })
+            
+            # Check for weak signature algorithm
+            if 'sha1' in tls.signature_algorithm.lower():
+                issues.append({
+                    'title': 'Weak SSL Certificate Signature',
+                    'description': 'Certificate uses weak SHA-1 signature algorithm',
+                    'severity': 'high',
+                    'remediation': 'Replace certificate with SHA-256 or stronger signature',
+                    'evidence': f'Signature: {tls.signature_algorithm}'
+                })
+
         except Exception as e:
             logger.warning(f"SSL analysis failed: {str(e)}")
         
@@ -12,36 +12,97 @@ from urllib.parse import urlparse, urljoin
 import hashlib
 import time
 from datetime import datetime
+import concurrent.futures
+
+from .deadline import scan_deadline, submit
+from .http_client import create_client
+from .tls_probe import probe_tls
+from . import signatures
+from .probe_engine import EXISTS, Probe, fetch_probe
 
 class P4SecurityScanner:
-    def __init__(self, target_url):
+    # (results key, scan method, display label)
+    CATEGORIES = [
+        ('ai_security', 'scan_ai_application_security', 'AI Application Security'),
+        ('automotive', 'scan_automotive_security', 'Automotive Security'),
+        ('broken_access', 'scan_broken_access_control', 'Broken Access Control'),
+        ('auth_session', 'scan_authentication_session', 'Authentication & Session'),
+        ('cloud_security', 'scan_cloud_security', 'Cloud Security'),
+        ('xss', 'scan_cross_site_scripting', 'Cross-Site Scripting'),
+        ('crypto', 'scan_cryptographic_weakness', 'Cryptographic Weakness'),
+        ('data_storage', 'scan_insecure_data_storage', 'Insecure Data Storage'),
+        ('data_transport', 'scan_insecure_data_transport', 'Insecure Data Transport'),
+        ('security_config', 'scan_security_configuration', 'Security Configuration'),
+        ('privacy', 'scan_privacy_concerns', 'Privacy Concerns'),
+        ('data_exposure', 'scan_sensitive_data_exposure', 'Sensitive Data Exposure'),
+        ('server_config', 'scan_server_misconfiguration', 'Server Misconfiguration'),
+        ('injection', 'scan_server_side_injection', 'Server-Side Injection'),
+        ('smart_contract', 'scan_smart_contract', 'Smart Contract'),
+        ('redirects', 'scan_unvalidated_redirects', 'Unvalidated Redirects'),
+    ]
+    
+    def __init__(self, target_url, max_workers=8, scan_deadline=90):
         self.target_url = target_url
         self.parsed_url = urlparse(target_url)
         self.base_domain = f"{self.parsed_url.scheme}://{self.parsed_url.netloc}"
         self.vulnerabilities = []
+        self.max_workers = max_workers
+        self.scan_deadline = scan_deadline  # seconds for the whole scan
+        self.category_timings = {}
+        self.scan_incomplete = False
+        
+        # Shared keep-alive pool; the client caps concurrent requests per host
+        self.session = create_client()
         
     def scan_all_p4_categories(self):
-        """Run comprehensive P4 security scan"""
-        results = {
-            'ai_security': self.scan_ai_application_security(),
-            'automotive': self.scan_automotive_security(),
-            'broken_access': self.scan_broken_access_control(),
-            'auth_session': self.scan_authentication_session(),
-            'cloud_security': self.scan_cloud_security(),
-            'xss': self.scan_cross_site_scripting(),
-            'crypto': self.scan_cryptographic_weakness(),
-            'data_storage': self.scan_insecure_data_storage(),
-            'data_transport': self.scan_insecure_data_transport(),
-            'security_config': self.scan_security_configuration(),
-            'privacy': self.scan_privacy_concerns(),
-            'data_exposure': self.scan_sensitive_data_exposure(),
-            'server_config': self.scan_server_misconfiguration(),
-            'injection': self.scan_server_side_injection(),
-            'smart_contract': self.scan_smart_contract(),
-            'redirects': self.scan_unvalidated_redirects()
+        """Run comprehensive P4 security scan
+        
+        Categories run concurrently. Any still running at the deadline are
+        reported with no issues and status 'timed_out' in category_timings;
+        their remaining requests fail fast against the expired deadline.
+        """
+        results = {key: [] for key, _, _ in self.CATEGORIES}
+        self.category_timings = {
+            key: {'label': label, 'duration': None, 'status': 'timed_out', 'issues': 0}
+            for key, _, label in self.CATEGORIES
         }
+        
+        with scan_deadline(self.scan_deadline) as deadline:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            futures = {
+                submit(executor, self._run_category, getattr(self, method)): key
+                for key, method, _ in self.CATEGORIES
+            }
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=deadline.remaining() if deadline else None):
+                key = futures[future]
+                findings, duration, error = future.result()
+                results[key] = findings
+                self.category_timings[key].update({
+                    'duration': round(duration, 2),
+                    'status': 'failed' if error else 'completed',
+                    'issues': len(findings),
+                })
+                if error:
+                    self.category_timings[key]['error'] = error
+        except concurrent.futures.TimeoutError:
+            self.scan_incomplete = True
+        finally:
+            # Don't wait for stragglers still blocked on a request
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.session.close()
+        
         return results
     
+    def _run_category(self, scan_method):
+        start_time = time.time()
+        try:
+            findings = scan_method() or []
+            error = None
+        except Exception as e:
+            findings, error = [], str(e)
+        return findings, time.time() - start_time, error
+    
     def scan_ai_application_security(self):
         """P4: AI Application Security checks"""
         findings = []
@@ -53,7 +114,7 @@ class P4SecurityScanner:
                 test_url = urljoin(self.base_domain, endpoint)
                 
                 payload = {"input": "<!--adversarial--> DROP TABLE users; --"}
-                response = requests.post(test_url, json=payload, timeout=10)
+                response = self.session.post(test_url, json=payload, timeout=10)
                 if response.status_code == 200:
                     findings.append({
                         'type': 'AI Misclassification Attack',
@@ -67,7 +128,7 @@ class P4SecurityScanner:
       
         try:
             large_query = "A" * 10000
-            response = requests.post(self.target_url, data={'query': large_query}, timeout=5)
+            response = self.session.post(self.target_url, data={'query': large_query}, timeout=5)
             if response.status_code == 500:
                 findings.append({
                     'type': 'AI DoS - Query Flooding',
@@ -88,7 +149,7 @@ class P4SecurityScanner:
         for endpoint in auto_endpoints:
             try:
                 test_url = urljoin(self.base_domain, endpoint)
-                response = requests.get(test_url, timeout=10)
+                response = self.session.get(test_url, timeout=10)
                 if response.status_code == 200:
                     # Check for default credentials
                     if 'admin:admin' in response.text or 'root:root' in response.text:
@@ -117,7 +178,7 @@ class P4SecurityScanner:
         for pattern in guid_patterns:
             try:
                 test_url = urljoin(self.base_domain, pattern)
-                response = requests.get(test_url, timeout=10)
+                response = self.session.get(test_url, timeout=10)
                 if response.status_code == 200:
                     findings.append({
                         'type': 'IDOR with Complex Object Identifiers',
@@ -132,7 +193,7 @@ class P4SecurityScanner:
         try:
             test_users = ['admin', 'test', 'user', 'demo']
             for user in test_users:
-                response = requests.post(urljoin(self.base_domain, '/login'), 
+                response = self.session.post(urljoin(self.base_domain, '/login'), 
                                        data={'username': user, 'password': 'wrong'}, timeout=10)
                 if 'user not found' in response.text.lower():
                     findings.append({
@@ -151,7 +212,7 @@ class P4SecurityScanner:
         findings = []
         
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.session.get(self.target_url, timeout=10)
             
             
             if 'set-cookie' in response.headers:
@@ -169,7 +230,7 @@ class P4SecurityScanner:
                 for endpoint in login_endpoints:
                     test_url = urljoin(self.base_domain, endpoint)
                     try:
-                        resp = requests.get(test_url, timeout=10)
+                        resp = self.session.get(test_url, timeout=10)
                         if resp.status_code == 200 and 'password' in resp.text.lower():
                             findings.append({
                                 'type': 'Weak Login Function Over HTTP',
@@ -194,7 +255,7 @@ class P4SecurityScanner:
         for endpoint in api_endpoints:
             try:
                 test_url = urljoin(self.base_domain, endpoint)
-                response = requests.get(test_url, timeout=10)
+                response = self.session.get(test_url, timeout=10)
                 if response.status_code == 200 and 'api' in response.text.lower():
                     findings.append({
                         'type': 'Insecure API Endpoints',
@@ -214,7 +275,7 @@ class P4SecurityScanner:
        
         try:
             headers = {'Referer': '<script>alert("XSS")</script>'}
-            response = requests.get(self.target_url, headers=headers, timeout=10)
+            response = self.session.get(self.target_url, headers=headers, timeout=10)
             if '<script>alert("XSS")</script>' in response.text:
                 findings.append({
                     'type': 'Referer XSS',
@@ -227,7 +288,7 @@ class P4SecurityScanner:
 
         try:
             data_uri = 'data:text/html,<script>alert("XSS")</script>'
-            response = requests.get(self.target_url, params={'url': data_uri}, timeout=10)
+            response = self.session.get(self.target_url, params={'url': data_uri}, timeout=10)
             if 'alert("XSS")' in response.text:
                 findings.append({
                     'type': 'Data URI XSS',
@@ -245,28 +306,26 @@ class P4SecurityScanner:
         
         try:
             
-            context = ssl.create_default_context()
-            with socket.create_connection((self.parsed_url.hostname, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=self.parsed_url.hostname) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    
-                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    if not_after < datetime.now():
-                        findings.append({
-                            'type': 'Expired Cryptographic Certificate',
-                            'severity': 'P4',
-                            'description': f'SSL certificate expired on {not_after}'
-                        })
-                        
-                    
-                    cipher = ssock.cipher()
-                    if cipher and ('RC4' in cipher[0] or 'DES' in cipher[0]):
-                        findings.append({
-                            'type': 'Vulnerable Cryptographic Library',
-                            'severity': 'P4',
-                            'description': f'Weak cipher suite in use: {cipher[0]}'
-                        })
+            tls = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443).require_verified()
+            cert = tls.peer_cert
+            
+            
+            not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            if not_after < datetime.now():
+                findings.append({
+                    'type': 'Expired Cryptographic Certificate',
+                    'severity': 'P4',
+                    'description': f'SSL certificate expired on {not_after}'
+                })
+                
+            
+            cipher = tls.cipher
+            if cipher and ('RC4' in cipher[0] or 'DES' in cipher[0]):
+                findings.append({
+                    'type': 'Vulnerable Cryptographic Library',
+                    'severity': 'P4',
+                    'description': f'Weak cipher suite in use: {cipher[0]}'
+                })
         except:
             pass
             
@@ -281,8 +340,9 @@ class P4SecurityScanner:
         for file_path in backup_files:
             try:
                 test_url = urljoin(self.base_domain, file_path)
-                response = requests.get(test_url, timeout=10)
-                if response.status_code == 200:
+                # Existence check only: HEAD or a ranged GET, never the whole dump
+                result = fetch_probe(self.session, Probe(test_url, timeout=10, method=EXISTS))
+                if result.ok and result.response.status_code in (200, 206):
                     findings.append({
                         'type': 'Sensitive Data Stored Unencrypted',
                         'severity': 'P4',
@@ -300,13 +360,13 @@ class P4SecurityScanner:
         
         # Check for executable downloads without integrity check
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.session.get(self.target_url, timeout=10)
             if 'download' in response.text.lower():
                 # Look for download links
                 download_links = re.findall(r'href=["\']([^"\']*\.(exe|msi|dmg|pkg))["\']', response.text, re.IGNORECASE)
                 for link, ext in download_links:
                     full_url = urljoin(self.base_domain, link)
-                    dl_response = requests.head(full_url, timeout=10)
+                    dl_response = self.session.head(full_url, timeout=10)
                     if 'content-md5' not in dl_response.headers and 'etag' not in dl_response.headers:
                         findings.append({
                             'type': 'Executable Download Without Integrity Check',
@@ -328,13 +388,13 @@ class P4SecurityScanner:
             register_endpoints = ['/register', '/signup', '/create-account']
             for endpoint in register_endpoints:
                 test_url = urljoin(self.base_domain, endpoint)
-                response = requests.get(test_url, timeout=10)
+                response = self.session.get(test_url, timeout=10)
                 if response.status_code == 200 and 'password' in response.text.lower():
                     # Test weak password acceptance
                     weak_passwords = ['123', 'password', 'admin']
                     for pwd in weak_passwords:
                         test_data = {'username': 'test', 'password': pwd}
-                        reg_response = requests.post(test_url, data=test_data, timeout=10)
+                        reg_response = self.session.post(test_url, data=test_data, timeout=10)
                         if 'success' in reg_response.text.lower() or reg_response.status_code == 201:
                             findings.append({
                                 'type': 'No Password Policy',
@@ -354,7 +414,7 @@ class P4SecurityScanner:
         
         # Check for unnecessary data collection
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.session.get(self.target_url, timeout=10)
             if 'wifi' in response.text.lower() and 'password' in response.text.lower():
                 findings.append({
                     'type': 'Unnecessary Data Collection - WiFi Credentials',
@@ -371,7 +431,7 @@ class P4SecurityScanner:
         findings = []
         
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.session.get(self.target_url, timeout=10)
             
             # Check for tokens in URL
             if 'token=' in self.target_url or 'key=' in self.target_url:
@@ -382,8 +442,8 @@ class P4SecurityScanner:
                 })
                 
             # Check for detailed error pages
-            error_response = requests.get(urljoin(self.base_domain, '/nonexistent'), timeout=10)
-            if 'apache' in error_response.text.lower() or 'nginx' in error_response.text.lower():
+            error_response = self.session.get(urljoin(self.base_domain, '/nonexistent'), timeout=10)
+            if signatures.indicator('server_banner').search(error_response.text):
                 findings.append({
                     'type': 'Detailed Server Configuration Exposure',
                     'severity': 'P4',
@@ -400,7 +460,7 @@ class P4SecurityScanner:
         findings = []
         
         try:
-            response = requests.get(self.target_url, timeout=10)
+            response = self.session.get(self.target_url, timeout=10)
             headers = response.headers
             
             # Check for missing security headers
@@ -434,7 +494,7 @@ class P4SecurityScanner:
         ssti_payloads = ['{{7*7}}', '${7*7}', '#{7*7}']
         for payload in ssti_payloads:
             try:
-                response = requests.post(self.target_url, data={'input': payload}, timeout=10)
+                response = self.session.post(self.target_url, data={'input': payload}, timeout=10)
                 if '49' in response.text:
                     findings.append({
                         'type': 'Server-Side Template Injection (SSTI)',
@@ -456,7 +516,7 @@ class P4SecurityScanner:
         for endpoint in blockchain_endpoints:
             try:
                 test_url = urljoin(self.base_domain, endpoint)
-                response = requests.get(test_url, timeout=10)
+                response = self.session.get(test_url, timeout=10)
                 if response.status_code == 200:
                     findings.append({
                         'type': 'Smart Contract Interface Detected',
@@ -478,7 +538,7 @@ class P4SecurityScanner:
         for param in redirect_params:
             try:
                 test_url = f"{self.target_url}?{param}=http://evil.com"
-                response = requests.get(test_url, timeout=10, allow_redirects=False)
+                response = self.session.get(test_url, timeout=10, allow_redirects=False)
                 if response.status_code in [301, 302, 303, 307, 308]:
                     location = response.headers.get('Location', '')
                     if 'evil.com' in location:
@@ -8,8 +8,9 @@ from django.core.cache import cache
 from django.conf import settings
 import hashlib
 import json
+import time
 from functools import wraps
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone
 
 class CacheManager:
@@ -55,6 +56,49 @@ class CacheManager:
         """Invalidate specific cache"""
         cache_key = cls.generate_cache_key(cache_type, *args, **kwargs)
         cache.delete(cache_key)
+    
+    @classmethod
+    def get_or_compute(cls, cache_type, compute, *args, force_refresh=False, cacheable=None, **kwargs):
+        """Cached result, or compute() stored for its cache type's TTL
+        
+        Returns (result, cache status). force_refresh skips the lookup but
+        still stores the fresh result; results cacheable() rejects (errors,
+        incomplete scans) are returned without being stored.
+        """
+        if not force_refresh:
+            hit = cls.lookup(cache_type, *args, **kwargs)
+            if hit is not None:
+                return hit
+        result = compute()
+        return result, cls.store(cache_type, result, *args, force_refresh=force_refresh, cacheable=cacheable, **kwargs)
+    
+    @classmethod
+    def lookup(cls, cache_type, *args, **kwargs):
+        """(result, cache status) when cached, else None"""
+        entry = cls.get_cached_result(cache_type, *args, **kwargs)
+        if entry is None:
+            return None
+        return entry['result'], cls.cache_status('hit', cls.CACHE_TIMEOUTS.get(cache_type, 3600), entry['cached_at'])
+    
+    @classmethod
+    def store(cls, cache_type, result, *args, force_refresh=False, cacheable=None, **kwargs):
+        """Cache a freshly computed result; returns its cache status"""
+        status = 'refresh' if force_refresh else 'miss'
+        timeout = cls.CACHE_TIMEOUTS.get(cache_type, 3600)
+        if cacheable is not None and not cacheable(result):
+            return cls.cache_status(status, timeout)
+        cached_at = time.time()
+        cls.set_cached_result(cache_type, {'result': result, 'cached_at': cached_at}, *args, **kwargs)
+        return cls.cache_status(status, timeout, cached_at)
+    
+    @staticmethod
+    def cache_status(status, ttl, cached_at=None):
+        """Cache fields reported with a result: hit, miss or refresh, and its age"""
+        info = {'status': status, 'ttl': ttl, 'cached_at': None, 'age': None}
+        if cached_at is not None:
+            info['cached_at'] = datetime.fromtimestamp(cached_at, tz=dt_timezone.utc).isoformat()
+            info['age'] = max(0, int(time.time() - cached_at))
+        return info
 
 def cache_result(cache_type, timeout=None):
     """Decorator for caching function results"""
@@ -128,9 +172,9 @@ class DatabaseOptimizations:
         
         # Prefetch related data to avoid N+1 queries
         def get_scans_with_findings():
-            return AdvancedSecurityScan.objects.select_related().prefetch_related(
+            return AdvancedSecurityScan.objects.advanced().select_related().prefetch_related(
                 'findings', 'reports'
-            ).all()
+            )
         
         def get_recent_scans_optimized(limit=10):
             return SecurityScan.objects.select_related().only(
@@ -214,7 +258,7 @@ class QueryOptimizer:
         from django.db.models import Count, Avg
         
         # Use aggregation instead of individual queries
-        stats = AdvancedSecurityScan.objects.aggregate(
+        stats = AdvancedSecurityScan.objects.advanced().aggregate(
             total_scans=Count('id'),
             avg_security_score=Avg('security_score'),
             critical_findings=Count('findings', filter=models.Q(findings__severity='critical')),
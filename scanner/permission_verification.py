@@ -4,7 +4,6 @@ Ensures ethical scanning by verifying domain ownership and consent
 """
 
 import requests
-import dns.resolver
 import whois
 import socket
 import re
@@ -17,6 +16,8 @@ from dataclasses import dataclass
 import logging
 import json
 
+from . import dns_resolver, http_client
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -227,7 +228,7 @@ class PermissionVerificationSystem:
             for path in consent_paths:
                 consent_url = urljoin(target_url, path)
                 try:
-                    response = requests.get(consent_url, timeout=10, verify=False)
+                    response = http_client.get(consent_url, timeout=10, verify=False)
                     if response.status_code == 200:
                         content = response.text.lower()
                         
@@ -315,7 +316,7 @@ class PermissionVerificationSystem:
             
             # Method 3: DNS TXT record verification (for advanced users)
             try:
-                txt_records = dns.resolver.resolve(domain, 'TXT')
+                txt_records = dns_resolver.resolve(domain, 'TXT')
                 for record in txt_records:
                     record_text = str(record).strip('"')
                     if f'ztionsec-verify={user_email}' in record_text:
@@ -345,7 +346,7 @@ class PermissionVerificationSystem:
         
         try:
             robots_url = urljoin(target_url, '/robots.txt')
-            response = requests.get(robots_url, timeout=10)
+            response = http_client.get(robots_url, timeout=10)
             
             if response.status_code == 200:
                 robots_content = response.text.lower()
@@ -402,7 +403,7 @@ class PermissionVerificationSystem:
             for path in security_txt_paths:
                 security_url = urljoin(target_url, path)
                 try:
-                    response = requests.get(security_url, timeout=10)
+                    response = http_client.get(security_url, timeout=10)
                     if response.status_code == 200:
                         content = response.text
                         
@@ -432,7 +433,7 @@ class PermissionVerificationSystem:
         # Allow very limited scanning for public websites
         try:
             # Check if it's a public website
-            response = requests.head(target_url, timeout=10)
+            response = http_client.head(target_url, timeout=10)
             if response.status_code == 200:
                 return PermissionResult(
                     domain=domain,
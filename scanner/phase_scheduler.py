@@ -0,0 +1,136 @@
+"""
+Dependency-Aware Phase Scheduler
+Runs scan phases as a DAG: a phase starts once every phase it requires has
+finished, and independent phases run in parallel. Under a scan deadline the
+scheduler returns when time runs out and reports unfinished phases as timed out
+"""
+
+import contextvars
+import time
+import concurrent.futures
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .deadline import Deadline, current_deadline, submit
+
+
+_current_phase: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('scan_phase', default=None)
+
+
+def current_phase() -> Optional[str]:
+    """Name of the phase running in this thread, e.g. to attribute findings to it"""
+    return _current_phase.get()
+
+
+@dataclass
+class Phase:
+    name: str
+    func: Callable[[], Any]
+    requires: Tuple[str, ...] = ()
+
+
+@dataclass
+class PhaseOutcome:
+    name: str
+    result: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0  # in seconds
+    started: float = field(default=0.0, repr=False)
+    timed_out: bool = False  # still running (or never started) at the scan deadline
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class PhaseScheduler:
+    """Executes phases in dependency order on a thread pool
+
+    A failed phase still releases the phases that depend on it, so a
+    dependent can fall back (e.g. ports scans the hostname when DNS failed)
+    instead of being skipped.
+    """
+
+    def __init__(self, phases: List[Phase], max_workers: int = 4):
+        self.phases = {phase.name: phase for phase in phases}
+        self.max_workers = max_workers
+        self._validate()
+
+    def _validate(self):
+        for phase in self.phases.values():
+            for dependency in phase.requires:
+                if dependency not in self.phases:
+                    raise ValueError(f"Phase '{phase.name}' requires unknown phase '{dependency}'")
+
+        # Kahn's algorithm: anything left over sits on a cycle
+        remaining = {name: set(phase.requires) for name, phase in self.phases.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Phase dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def run(self, on_complete: Optional[Callable[[PhaseOutcome], None]] = None,
+            deadline: Optional[Deadline] = None) -> Dict[str, PhaseOutcome]:
+        """Run every phase once and return outcomes keyed by phase name
+
+        on_complete is called from the scheduling thread as each phase
+        finishes, so callers can record results without extra locking.
+        deadline defaults to the current scan deadline; phases carry it
+        into their own I/O.
+        """
+        deadline = deadline or current_deadline()
+        outcomes: Dict[str, PhaseOutcome] = {}
+        pending = {name: set(phase.requires) for name, phase in self.phases.items()}
+        running: Dict[concurrent.futures.Future, str] = {}
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def submit_ready():
+            if deadline is not None and deadline.expired:
+                return
+            for name in [n for n, deps in pending.items() if not deps]:
+                del pending[name]
+                running[submit(executor, self._execute, self.phases[name])] = name
+
+        def finish(outcome: PhaseOutcome):
+            outcomes[outcome.name] = outcome
+            if on_complete:
+                on_complete(outcome)
+
+        try:
+            submit_ready()
+            while running:
+                timeout = deadline.remaining() if deadline is not None else None
+                done, _ = concurrent.futures.wait(running, timeout=timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    break  # out of time
+                for future in done:
+                    name = running.pop(future)
+                    finish(future.result())
+                    for deps in pending.values():
+                        deps.discard(name)
+                submit_ready()
+        finally:
+            # Do not wait for phases that overran: their next I/O fails fast
+            # against the expired deadline and the worker is released now
+            executor.shutdown(wait=not running, cancel_futures=True)
+
+        now = time.time()
+        for name in list(running.values()) + list(pending):
+            finish(PhaseOutcome(name=name, error='Scan deadline exceeded', started=now, timed_out=True))
+
+        return outcomes
+
+    def _execute(self, phase: Phase) -> PhaseOutcome:
+        outcome = PhaseOutcome(name=phase.name, started=time.time())
+        _current_phase.set(phase.name)  # the worker runs in a copied context
+        try:
+            outcome.result = phase.func()
+        except Exception as e:
+            outcome.error = str(e)
+        outcome.duration = time.time() - outcome.started
+        return outcome
@@ -0,0 +1,309 @@
+"""
+Concurrent Path Probe Engine
+Fetches the candidate URLs of path-based checks in one deduplicated batch
+with bounded per-host concurrency. Bodies are streamed and read only up to
+a byte cap (or until the checks can decide); existence-only probes use HEAD
+or a one-chunk Range request. Responses that look like the host's
+"not found" page (soft 404) are dropped before any check sees them
+"""
+
+import hashlib
+import posixpath
+import re
+import threading
+import time
+import uuid
+import concurrent.futures
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+import requests
+
+from .deadline import submit
+from .http_client import get_setting, read_body
+
+GET = 'GET'
+EXISTS = 'EXISTS'  # only status and size matter: HEAD, falling back to a ranged GET
+
+EXISTS_READ_BYTES = 1024  # read when the server ignores HEAD/Range and sends the body anyway
+
+_CONTENT_RANGE_TOTAL = re.compile(r'/\s*(\d+)\s*$')
+
+# Soft-404 baselines: random paths requested per host and extension class
+BASELINE_SAMPLES = 2
+SIMHASH_PREFIX_BYTES = 4096  # fingerprint the start of the body; early-stopped reads still cover it
+SIMHASH_MAX_DISTANCE = 8  # of 64 bits
+LENGTH_TOLERANCE = 0.1  # relative, on top of a fixed 64 bytes
+
+EXTENSION_CLASSES = {
+    'script': ('.php', '.asp', '.aspx', '.jsp', '.cgi', '.pl'),
+    'page': ('.html', '.htm', '.txt'),
+    'data': ('.json', '.xml', '.yml', '.yaml', '.config', '.ini', '.env', '.lock', '.py', '.sql'),
+    'backup': ('.bak', '.backup', '.old', '.orig', '.copy', '.tmp', '.save', '~', '.swp', '.swo',
+               '.zip', '.gz', '.tgz', '.tar', '.rar', '.7z'),
+}
+
+_TOKEN = re.compile(r'\w+')
+
+
+@dataclass
+class Probe:
+    url: str
+    timeout: Optional[float] = None  # falls back to the engine default
+    method: str = GET  # GET or EXISTS
+    max_bytes: Optional[int] = None  # falls back to the engine default
+    until: Optional[Callable[[str], Any]] = None  # stop reading once this is truthy for the text so far
+    baseline: bool = True  # drop the response when it matches the host's soft-404 page
+
+
+@dataclass
+class ProbeResult:
+    url: str
+    response: Optional[requests.Response] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0  # in seconds
+    size: Optional[int] = None  # full body size when known, else the bytes read
+    soft_404: bool = False  # matched the not-found baseline; response dropped
+
+    @property
+    def ok(self) -> bool:
+        return self.response is not None
+
+
+@dataclass
+class Baseline:
+    """What a missing path on one host and extension class looks like"""
+    status: int
+    min_size: int
+    max_size: int
+    simhash: Optional[int] = None
+
+    def matches(self, status: int, size: Optional[int], simhash: Optional[int]) -> bool:
+        if status != self.status or size is None:
+            return False
+        tolerance = 64 + int(self.max_size * LENGTH_TOLERANCE)
+        if not self.min_size - tolerance <= size <= self.max_size + tolerance:
+            return False
+        if self.simhash is not None and simhash is not None:
+            return _hamming(self.simhash, simhash) <= SIMHASH_MAX_DISTANCE
+        return True
+
+
+def _simhash(content: bytes) -> Optional[int]:
+    """64-bit similarity hash of the start of a body; near-identical pages differ in few bits"""
+    tokens = _TOKEN.findall(content[:SIMHASH_PREFIX_BYTES].decode('utf-8', errors='replace').lower())
+    if not tokens:
+        return None
+    weights = [0] * 64
+    for token in tokens:
+        value = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _build_baseline(samples: List[ProbeResult]) -> Optional[Baseline]:
+    """Baseline from random-path samples, or None when they disagree (no catch-all page)"""
+    if not samples or not all(sample.ok for sample in samples):
+        return None
+    if len({sample.response.status_code for sample in samples}) != 1:
+        return None
+    hashes = [_simhash(sample.response.content) for sample in samples]
+    if None not in hashes and any(_hamming(hashes[0], other) > SIMHASH_MAX_DISTANCE for other in hashes[1:]):
+        return None
+    sizes = [sample.size or 0 for sample in samples]
+    return Baseline(
+        status=samples[0].response.status_code,
+        min_size=min(sizes),
+        max_size=max(sizes),
+        simhash=hashes[0],
+    )
+
+
+def extension_class(path: str) -> Tuple[str, str]:
+    """(class, representative suffix) for a probe path, e.g. ('script', '.php')"""
+    if not path or path.endswith('/'):
+        return 'dir', '/'
+    name = posixpath.basename(path).lower()
+    for cls, suffixes in EXTENSION_CLASSES.items():
+        for suffix in suffixes:
+            if name.endswith(suffix):
+                return cls, suffix
+    if name.startswith('.'):
+        return 'dotfile', ''
+    return 'none', ''
+
+
+def _all_decided(checks: List[Callable[[str], Any]]) -> Callable[[str], bool]:
+    return lambda text: all(check(text) for check in checks)
+
+
+def _merge(existing: Probe, probe: Probe) -> Probe:
+    """One probe that satisfies every check asking for the same URL"""
+    timeouts = [t for t in (existing.timeout, probe.timeout) if t]
+    caps = [b for b in (existing.max_bytes, probe.max_bytes) if b]
+    method = GET if GET in (existing.method, probe.method) else EXISTS
+
+    # Reading may stop early only once every body check has decided
+    body_checks = [p for p in (existing, probe) if p.method == GET]
+    if any(p.until is None for p in body_checks):
+        until = None
+    else:
+        until = _all_decided([p.until for p in body_checks])
+
+    return Probe(
+        url=existing.url,
+        # Same URL requested by several checks: honour the most patient one
+        timeout=max(timeouts) if timeouts else None,
+        method=method,
+        max_bytes=max(caps) if len(caps) == 2 else None,
+        until=until,
+        baseline=existing.baseline and probe.baseline,
+    )
+
+
+def _declared_size(response: requests.Response) -> Optional[int]:
+    content_range = response.headers.get('Content-Range')
+    if content_range:
+        found = _CONTENT_RANGE_TOTAL.search(content_range)
+        if found:
+            return int(found.group(1))
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and response.status_code != 206:
+        return int(length)
+    return None
+
+
+def fetch_probe(session: requests.Session, probe: Probe, timeout: float = 5,
+                max_bytes: Optional[int] = None) -> ProbeResult:
+    """Run one probe on session and return its (possibly partial) response"""
+    result = ProbeResult(url=probe.url)
+    timeout = probe.timeout or timeout
+    max_bytes = probe.max_bytes or max_bytes or get_setting('PROBE_MAX_BYTES')
+    start_time = time.perf_counter()
+    try:
+        if probe.method == EXISTS:
+            response = session.head(probe.url, timeout=timeout, allow_redirects=True)
+            result.size = _declared_size(response)
+            if response.status_code in (405, 501) or (response.status_code == 200 and result.size is None):
+                # No usable HEAD: ask for the first bytes only
+                response = session.get(
+                    probe.url, timeout=timeout, stream=True,
+                    headers={'Range': f"bytes=0-{EXISTS_READ_BYTES - 1}"}
+                )
+                read_body(response, EXISTS_READ_BYTES)
+                result.size = _declared_size(response) or len(response.content)
+        else:
+            response = session.get(probe.url, timeout=timeout, stream=True)
+            read_body(response, max_bytes, until=probe.until)
+            result.size = _declared_size(response) or len(response.content)
+        result.response = response
+    except Exception as e:
+        result.error = str(e)
+    result.elapsed = time.perf_counter() - start_time
+    return result
+
+
+class ProbeEngine:
+    """Runs probes concurrently, never more than per_host_limit at a time per host
+
+    Pooling comes from the session, normally a scanner/http_client client.
+    """
+
+    def __init__(self, session: requests.Session, max_workers: int = 16,
+                 per_host_limit: int = 6, timeout: float = 5, max_bytes: Optional[int] = None):
+        self.session = session
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_bytes = max_bytes or get_setting('PROBE_MAX_BYTES')
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._baselines: Dict[Tuple[str, str, str], Optional[Baseline]] = {}  # None: no stable baseline
+        self._lock = threading.Lock()
+
+    def run(self, probes: Iterable[Probe]) -> Dict[str, ProbeResult]:
+        """Fetch every distinct probe URL once and return results keyed by URL"""
+        unique: Dict[str, Probe] = {}
+        for probe in probes:
+            existing = unique.get(probe.url)
+            unique[probe.url] = probe if existing is None else _merge(existing, probe)
+
+        results: Dict[str, ProbeResult] = {}
+        if not unique:
+            return results
+
+        workers = min(self.max_workers, len(unique))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            self._ensure_baselines(executor, unique.values())
+            futures = [submit(executor, self._fetch, probe) for probe in unique.values()]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results[result.url] = result
+
+        return results
+
+    def _baseline_key(self, probe: Probe) -> Optional[Tuple[Tuple[str, str, str], str]]:
+        """((scheme, host, class), suffix) for probes compared against a soft-404 baseline"""
+        parsed = urlparse(probe.url)
+        if not probe.baseline or parsed.query or parsed.path in ('', '/'):
+            return None
+        cls, suffix = extension_class(parsed.path)
+        return (parsed.scheme, parsed.netloc, cls), suffix
+
+    def _ensure_baselines(self, executor: concurrent.futures.Executor, probes: Iterable[Probe]):
+        """Request a few random missing paths per new host and extension class"""
+        wanted: Dict[Tuple[str, str, str], str] = {}
+        for probe in probes:
+            found = self._baseline_key(probe)
+            if found is not None and found[0] not in self._baselines:
+                wanted.setdefault(found[0], found[1])
+        if not wanted:
+            return
+
+        samples: Dict[Tuple[str, str, str], List[concurrent.futures.Future]] = {}
+        for key, suffix in wanted.items():
+            scheme, netloc, cls = key
+            for _ in range(BASELINE_SAMPLES):
+                name = uuid.uuid4().hex[:16]
+                path = f"/{name}/" if cls == 'dir' else f"/.{name}" if cls == 'dotfile' else f"/{name}{suffix}"
+                url = urlunparse((scheme, netloc, path, '', '', ''))
+                samples.setdefault(key, []).append(
+                    submit(executor, self._fetch, Probe(url, timeout=self.timeout, baseline=False))
+                )
+
+        for key, futures in samples.items():
+            baseline = _build_baseline([future.result() for future in futures])
+            with self._lock:
+                self._baselines[key] = baseline
+
+    def _apply_baseline(self, probe: Probe, result: ProbeResult) -> ProbeResult:
+        found = self._baseline_key(probe)
+        baseline = self._baselines.get(found[0]) if found is not None else None
+        if baseline is None or not result.ok:
+            return result
+
+        simhash = _simhash(result.response.content) if probe.method == GET else None
+        if baseline.matches(result.response.status_code, result.size, simhash):
+            # Same page as a random missing path: nothing for the checks to look at
+            result.soft_404 = True
+            result.response = None
+        return result
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _fetch(self, probe: Probe) -> ProbeResult:
+        with self._host_slot(probe.url):
+            result = fetch_probe(self.session, probe, timeout=self.timeout, max_bytes=self.max_bytes)
+        return self._apply_baseline(probe, result)
@@ -0,0 +1,276 @@
+"""
+Full-Text Search
+Ranked, prefix-matching search over CVE descriptions, finding titles and
+descriptions, and scan URLs and domains.
+
+On SQLite every searchable table has an FTS5 table beside it, kept current
+by triggers; on PostgreSQL it has a stored tsvector column behind a GIN
+index. A search reads that index instead of running LIKE over every row.
+Backends with neither (or SQLite builds without FTS5) keep the icontains
+filters the views used before.
+"""
+
+import logging
+import re
+from typing import Dict, List
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Letters and digits; anything else separates words, as FTS5's unicode61
+# tokenizer does, so 'example.com' and 'CVE-2024-1234' search as phrases
+WORD_RE = re.compile(r'[^\W_]+')
+MAX_TERMS = 16
+
+
+class SearchIndex:
+    """Full-text index over some text columns of one table
+
+    Tables with an integer id get an FTS5 external content table, which
+    indexes the rows without storing a second copy of the text. Other
+    tables (the CVE table is keyed by cve_id) store their key in the FTS5
+    table alongside the text, and a rowids table maps each key to its FTS5
+    row so the triggers can update it without a full-text query (which
+    would flush FTS5's pending writes on every row of a bulk upsert).
+    """
+
+    def __init__(self, table: str, columns: List[str], weights: List[float], vector: str,
+                 key: str = 'id', config: str = 'english'):
+        self.table = table
+        self.columns = columns
+        self.weights = weights  # bm25() weight of each column, higher ranks matches there first
+        self.vector = vector  # PostgreSQL tsvector expression
+        self.key = key
+        self.config = config  # PostgreSQL text search configuration for queries
+        self.fts_table = f'{table}_fts'
+        self.rowids_table = f'{table}_fts_rowids'
+
+    @property
+    def external(self) -> bool:
+        return self.key == 'id'
+
+    def sqlite_tables(self) -> Dict[str, str]:
+        content = f", content='{self.table}', content_rowid='id'" if self.external else ''
+        tables = {self.fts_table: (f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} "
+                                   f"USING fts5({', '.join(self.columns)}{content}, prefix='2 3')")}
+        if not self.external:
+            tables[self.rowids_table] = (f"CREATE TABLE IF NOT EXISTS {self.rowids_table} "
+                                         f"({self.key} TEXT PRIMARY KEY, fts_rowid INTEGER NOT NULL)")
+        return tables
+
+    def sqlite_triggers(self) -> Dict[str, str]:
+        fts, columns = self.fts_table, ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        if self.external:
+            insert = f"INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new});"
+            delete = f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        else:
+            rowids, key = self.rowids_table, self.key
+            insert = (f"INSERT INTO {fts} ({columns}) VALUES ({new}); "
+                      f"INSERT OR REPLACE INTO {rowids} ({key}, fts_rowid) VALUES (new.{key}, last_insert_rowid());")
+            delete = (f"DELETE FROM {fts} WHERE rowid = (SELECT fts_rowid FROM {rowids} WHERE {key} = old.{key}); "
+                      f"DELETE FROM {rowids} WHERE {key} = old.{key};")
+        return {
+            f'{fts}_ai': f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {self.table} BEGIN {insert} END",
+            f'{fts}_ad': f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {self.table} BEGIN {delete} END",
+            f'{fts}_au': (f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {self.table} "
+                          f"BEGIN {delete} {insert} END"),
+        }
+
+    def sqlite_rebuild(self) -> List[str]:
+        if self.external:
+            return [f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('rebuild')"]
+        columns = ', '.join(self.columns)
+        return [
+            f"DELETE FROM {self.fts_table}",
+            f"DELETE FROM {self.rowids_table}",
+            f"INSERT INTO {self.fts_table} ({columns}) SELECT {columns} FROM {self.table}",
+            f"INSERT INTO {self.rowids_table} ({self.key}, fts_rowid) SELECT {self.key}, rowid FROM {self.fts_table}",
+        ]
+
+    def postgres_schema(self) -> List[str]:
+        return [
+            f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({self.vector}) STORED",
+            f"CREATE INDEX IF NOT EXISTS {self.table}_search_idx ON {self.table} USING GIN (search_vector)",
+        ]
+
+
+# URL punctuation becomes spaces in the PostgreSQL vectors so hosts and
+# paths split into words the same way the SQLite tokenizer splits them
+INDEXES = {
+    'scanner.VulnerabilityDatabase': SearchIndex(
+        'scanner_vulnerabilitydatabase', ['cve_id', 'description'], [10.0, 1.0],
+        "setweight(to_tsvector('simple', translate(cve_id, '-', ' ')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+        key='cve_id',
+    ),
+    'scanner.SecurityFinding': SearchIndex(
+        'scanner_securityfinding', ['title', 'description'], [5.0, 1.0],
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+    ),
+    'scanner.AdvancedSecurityScan': SearchIndex(
+        'scanner_advancedsecurityscan', ['url', 'domain'], [1.0, 5.0],
+        "setweight(to_tsvector('simple', translate(domain, '.-', '  ')), 'A') || "
+        "setweight(to_tsvector('simple', translate(url, './:-_?=&#', '         ')), 'B')",
+        config='simple',
+    ),
+}
+
+_indexed: Dict[tuple, bool] = {}
+
+
+def sqlite_has_fts5(connection) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Builds that load FTS5 as an extension do not report the compile option
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.scanner_fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp.scanner_fts5_probe')
+        except Exception:
+            return False
+    return True
+
+
+def _sqlite_objects(connection) -> set:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def install_search_indexes(connection, only_existing: bool = False):
+    """Create the full-text indexes, filling them from the current rows
+
+    only_existing=True repairs indexes already installed: SQLite migrations
+    that rebuild a table drop its triggers, which are recreated here and
+    the index reloaded. Safe to run repeatedly.
+    """
+    _indexed.clear()
+    if connection.vendor == 'postgresql' and not only_existing:
+        with connection.cursor() as cursor:
+            for index in INDEXES.values():
+                for statement in index.postgres_schema():
+                    cursor.execute(statement)
+        return
+    if connection.vendor != 'sqlite' or not sqlite_has_fts5(connection):
+        return
+
+    existing = _sqlite_objects(connection)
+    with connection.cursor() as cursor:
+        for index in INDEXES.values():
+            if index.table not in existing or (only_existing and index.fts_table not in existing):
+                continue
+            tables, triggers = index.sqlite_tables(), index.sqlite_triggers()
+            if existing.issuperset(tables) and existing.issuperset(triggers):
+                continue
+            for statement in tables.values():
+                cursor.execute(statement)
+            for statement in triggers.values():
+                cursor.execute(statement)
+            for statement in index.sqlite_rebuild():
+                cursor.execute(statement)
+            if only_existing:
+                logger.warning("Rebuilt the full-text index %s after its triggers were dropped", index.fts_table)
+
+
+def drop_search_indexes(connection):
+    _indexed.clear()
+    with connection.cursor() as cursor:
+        for index in INDEXES.values():
+            if connection.vendor == 'sqlite':
+                for trigger in index.sqlite_triggers():
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+                for table in index.sqlite_tables():
+                    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'ALTER TABLE {index.table} DROP COLUMN IF EXISTS search_vector')
+
+
+def repair_search_indexes(sender, using='default', **kwargs):
+    """post_migrate handler: restore triggers dropped by table rebuilds"""
+    install_search_indexes(connections[using], only_existing=True)
+
+
+def is_indexed(index: SearchIndex, connection) -> bool:
+    key = (connection.alias, index.table)
+    if key not in _indexed:
+        if connection.vendor == 'sqlite':
+            _indexed[key] = index.fts_table in _sqlite_objects(connection)
+        elif connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = connection.introspection.get_table_description(cursor, index.table)
+            _indexed[key] = any(column.name == 'search_vector' for column in columns)
+        else:
+            _indexed[key] = False
+    return _indexed[key]
+
+
+def search_terms(query: str) -> List[List[str]]:
+    """Whitespace-separated words of query, each split into its tokens"""
+    terms = [WORD_RE.findall(word) for word in (query or '').split()]
+    return [tokens for tokens in terms if tokens][:MAX_TERMS]
+
+
+def fts5_query(terms: List[List[str]]) -> str:
+    """FTS5 MATCH expression: every word must appear, each as a prefix"""
+    return ' '.join('"{}"*'.format(' '.join(tokens)) for tokens in terms)
+
+
+def tsquery(terms: List[List[str]]) -> str:
+    """to_tsquery() expression equivalent to fts5_query()"""
+    return ' & '.join(' <-> '.join(tokens[:-1] + [tokens[-1] + ':*']) for tokens in terms)
+
+
+def _fallback(index: SearchIndex, query: str) -> Q:
+    condition = Q()
+    for column in index.columns:
+        condition |= Q(**{f'{column}__icontains': query.strip()})
+    return condition
+
+
+def search(queryset: QuerySet, query: str, ranked: bool = True) -> QuerySet:
+    """Filter queryset to rows matching query, best matches first if ranked
+
+    Every word of the query must match the start of a word in one of the
+    indexed columns. Ranked results carry a search_rank attribute.
+    """
+    index = INDEXES[queryset.model._meta.label]
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    connection = connections[queryset.db]
+    if not is_indexed(index, connection):
+        return queryset.filter(_fallback(index, query))
+
+    if connection.vendor == 'sqlite':
+        fts, match = index.fts_table, fts5_query(terms)
+        if not ranked:
+            key = 'rowid' if index.external else index.key
+            return queryset.filter(pk__in=RawSQL(f'SELECT {key} FROM {fts} WHERE {fts} MATCH %s', [match]))
+        join = f'{fts}.rowid = {index.table}.id' if index.external else f'{fts}.{index.key} = {index.table}.{index.key}'
+        weights = ', '.join(str(weight) for weight in index.weights)
+        queryset = queryset.extra(
+            tables=[fts],
+            where=[join, f'{fts} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-bm25({fts}, {weights})'},  # bm25 scores better matches lower
+        )
+    else:
+        match = tsquery(terms)
+        condition = f"{index.table}.search_vector @@ to_tsquery('{index.config}', %s)"
+        if not ranked:
+            return queryset.extra(where=[condition], params=[match])
+        queryset = queryset.extra(
+            where=[condition],
+            params=[match],
+            select={'search_rank': f"ts_rank_cd({index.table}.search_vector, to_tsquery('{index.config}', %s))"},
+            select_params=[match],
+        )
+    return queryset.order_by('-search_rank', *(queryset.query.order_by or queryset.model._meta.ordering))
@@ -0,0 +1,187 @@
+"""
+Compiled Signature Engine
+Technology/CMS fingerprints and indicator lists are loaded from
+data/fingerprints.json and compiled once at import: every body literal goes
+into a single case-insensitive regex that finds all (overlapping) matches in
+one pass over the body, and header signatures are checked in one pass over
+the response headers
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+FINGERPRINTS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'fingerprints.json')
+
+
+def _literal_regex(literals: Iterable[str]) -> Optional['re.Pattern']:
+    """One alternation over all literals, longest first so the longest wins at each position"""
+    ordered = sorted(set(literals), key=len, reverse=True)
+    if not ordered:
+        return None
+    return re.compile('|'.join(re.escape(literal) for literal in ordered), re.IGNORECASE)
+
+
+class IndicatorSet:
+    """A compiled keyword list; replaces any(word in text.lower() for word in words)"""
+
+    def __init__(self, literals: Iterable[str]):
+        self.literals = [literal.lower() for literal in literals]
+        self._regex = _literal_regex(self.literals)
+
+    def search(self, text: str) -> Optional[str]:
+        """First indicator found in text (lowercased), or None"""
+        if self._regex is None or not text:
+            return None
+        match = self._regex.search(text)
+        return match.group(0).lower() if match else None
+
+    def __contains__(self, text: str) -> bool:
+        return self.search(text) is not None
+
+
+@dataclass
+class SignatureMatches:
+    # technology name -> evidence strings, in fingerprint file order
+    technologies: Dict[str, List[str]] = field(default_factory=dict)
+    versions: Dict[str, str] = field(default_factory=dict)
+    categories: Dict[str, List[str]] = field(default_factory=dict)  # category -> technology names
+
+    def names(self, *categories: str) -> List[str]:
+        """Detected technology names, optionally limited to the given categories"""
+        if not categories:
+            return list(self.technologies)
+        return [
+            name for name in self.technologies
+            if any(name in self.categories.get(category, ()) for category in categories)
+        ]
+
+    def first(self, category: str) -> Optional[str]:
+        names = self.categories.get(category)
+        return names[0] if names else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.technologies
+
+
+class SignatureEngine:
+    def __init__(self, fingerprints: Mapping):
+        technologies = fingerprints.get('technologies', {})
+        self._order = list(technologies)
+        self._categories = {name: spec.get('categories', []) for name, spec in technologies.items()}
+
+        # literal (lowercased) -> technologies it identifies
+        self._body_owners: Dict[str, Set[str]] = {}
+        for name, spec in technologies.items():
+            for literal in spec.get('body', []):
+                self._body_owners.setdefault(literal.lower(), set()).add(name)
+
+        # Overlapping matches: the combined regex reports the longest literal at
+        # each position, so also credit every shorter literal that is its prefix
+        self._prefix_credit: Dict[str, Set[str]] = {}
+        for literal in self._body_owners:
+            credited = set()
+            for other in self._body_owners:
+                if literal.startswith(other):
+                    credited.add(other)
+            self._prefix_credit[literal] = credited
+
+        ordered = sorted(self._body_owners, key=len, reverse=True)
+        self._body_regex = (
+            re.compile('(?=(' + '|'.join(re.escape(literal) for literal in ordered) + '))', re.IGNORECASE)
+            if ordered else None
+        )
+
+        # header name -> [(literal, technology)]; an empty literal means "header present"
+        self._header_rules: Dict[str, List[Tuple[str, str]]] = {}
+        for name, spec in technologies.items():
+            for header, literals in spec.get('headers', {}).items():
+                for literal in literals:
+                    self._header_rules.setdefault(header.lower(), []).append((literal.lower(), name))
+
+        self._version_patterns = {
+            name: [re.compile(pattern, re.IGNORECASE) for pattern in spec.get('version', [])]
+            for name, spec in technologies.items()
+        }
+
+        self.indicators = {
+            group: IndicatorSet(literals)
+            for group, literals in fingerprints.get('indicators', {}).items()
+        }
+
+    def match(self, body: str = '', headers: Optional[Mapping[str, str]] = None) -> SignatureMatches:
+        """Every technology whose body or header signatures appear, with versions where known"""
+        evidence: Dict[str, List[str]] = {}
+
+        if self._body_regex is not None and body:
+            seen: Set[str] = set()
+            for found in self._body_regex.finditer(body):
+                literal = found.group(1).lower()
+                if literal in seen:
+                    continue
+                for credited in self._prefix_credit[literal]:
+                    if credited in seen:
+                        continue
+                    seen.add(credited)
+                    for name in self._body_owners[credited]:
+                        evidence.setdefault(name, []).append(credited)
+
+        header_lines = []
+        for header, value in (headers or {}).items():
+            value = str(value)
+            header_lines.append(f"{header}: {value}")
+            lowered = value.lower()
+            for literal, name in self._header_rules.get(header.lower(), []):
+                if literal in lowered:
+                    evidence.setdefault(name, []).append(f"{header}: {literal}" if literal else header)
+
+        result = SignatureMatches()
+        header_text = '\n'.join(header_lines)
+        for name in self._order:
+            if name not in evidence:
+                continue
+            result.technologies[name] = evidence[name]
+            for category in self._categories[name]:
+                result.categories.setdefault(category, []).append(name)
+            for pattern in self._version_patterns[name]:
+                found = pattern.search(header_text) or (pattern.search(body) if body else None)
+                if found:
+                    result.versions[name] = found.group(1)
+                    break
+        return result
+
+    def indicator(self, group: str) -> IndicatorSet:
+        return self.indicators[group]
+
+
+def load_engine(path: str = FINGERPRINTS_PATH) -> SignatureEngine:
+    with open(path, encoding='utf-8') as f:
+        return SignatureEngine(json.load(f))
+
+
+# Compiled once at import and shared by every scanner
+ENGINE = load_engine()
+
+GENERATOR_META = re.compile(
+    r'<meta\s[^>]*name=["\']generator["\'][^>]*content=["\']([^"\']*)["\']'
+    r'|<meta\s[^>]*content=["\']([^"\']*)["\'][^>]*name=["\']generator["\']',
+    re.IGNORECASE
+)
+
+
+def match(body: str = '', headers: Optional[Mapping[str, str]] = None) -> SignatureMatches:
+    return ENGINE.match(body, headers)
+
+
+def indicator(group: str) -> IndicatorSet:
+    return ENGINE.indicator(group)
+
+
+def generator_meta(body: str) -> Optional[str]:
+    """Content of the <meta name="generator"> tag, if any"""
+    found = GENERATOR_META.search(body or '')
+    if not found:
+        return None
+    return found.group(1) if found.group(1) is not None else found.group(2)
@@ -0,0 +1,120 @@
+import collections
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+from urllib.parse import urlparse
+
+from django.test import SimpleTestCase
+
+from scanner import bulk_scan
+from scanner.bulk_scan import BulkScanner, normalize_urls, request_scan_timeout, scan_rounds
+from scanner.deadline import current_deadline
+
+
+class FakeScans:
+    """Stands in for a scan type, recording how many scans of each host overlap"""
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.active = collections.Counter()
+        self.peak = collections.Counter()
+        self.order = []
+        self.timeouts = []
+
+    def __call__(self, url, force_refresh):
+        host = urlparse(url).netloc
+        with self.lock:
+            self.active[host] += 1
+            self.peak[host] = max(self.peak[host], self.active[host])
+            self.order.append(host)
+            self.timeouts.append(current_deadline().seconds)
+        time.sleep(self.duration)
+        with self.lock:
+            self.active[host] -= 1
+        return {'url': url}, None
+
+
+class NormalizeUrlsTests(unittest.TestCase):
+    def test_adds_scheme_and_drops_duplicates_and_comments(self):
+        urls, errors = normalize_urls(['example.com', '# note', '', 'https://example.com', 'http://[bad'])
+        self.assertEqual(urls, ['https://example.com'])
+        self.assertEqual([error['url'] for error in errors], ['http://[bad'])
+
+
+class SchedulingTests(unittest.TestCase):
+    def run_scans(self, urls, fake=None, **options):
+        fake = fake or FakeScans()
+        with mock.patch.dict(bulk_scan.SCANNERS, {'basic': fake}):
+            records = list(BulkScanner(save=False, **options).run(urls))
+        return fake, records
+
+    def test_per_host_limit_and_round_robin(self):
+        urls = [f"https://busy.example.com/{n}" for n in range(6)] + \
+               ['https://a.example.org/', 'https://b.example.net/']
+        fake, records = self.run_scans(urls, concurrency=4, per_host=2)
+
+        self.assertEqual(len(records), 8)
+        self.assertTrue(all(record['status'] == 'ok' for record in records))
+        self.assertEqual(fake.peak['busy.example.com'], 2)
+        # the other hosts do not wait behind the busy one
+        self.assertLess(fake.order.index('b.example.net'), 4)
+
+    def test_per_host_is_bounded(self):
+        self.assertEqual(BulkScanner(per_host=1000).per_host, bulk_scan.MAX_PER_HOST)
+        self.assertEqual(BulkScanner(per_host=0).per_host, 1)
+        self.assertEqual(BulkScanner(concurrency=1000).concurrency, bulk_scan.MAX_CONCURRENCY)
+
+    def test_scan_error_becomes_record(self):
+        def failing(url, force_refresh):
+            raise ConnectionError('refused')
+
+        _, records = self.run_scans(['https://example.com/'], fake=failing)
+        self.assertEqual(records[0]['status'], 'error')
+        self.assertEqual(records[0]['error'], 'refused')
+
+    def test_time_budget_stops_starting_scans(self):
+        urls = [f"https://example.com/{n}" for n in range(4)]
+        fake, records = self.run_scans(urls, fake=FakeScans(duration=0.3), concurrency=1,
+                                       scan_timeout=60, time_budget=0.5)
+        statuses = collections.Counter(record['status'] for record in records)
+        self.assertEqual(statuses, {'ok': 2, 'error': 2})
+        self.assertLessEqual(max(fake.timeouts), 0.5)
+
+
+class RequestBudgetTests(unittest.TestCase):
+    def test_rounds_follow_concurrency_and_per_host(self):
+        spread = [f"https://host{n}.example.com/" for n in range(50)]
+        same_host = [f"https://example.com/{n}" for n in range(50)]
+        self.assertEqual(scan_rounds(spread, 16, 2), 4)
+        self.assertEqual(scan_rounds(same_host, 16, 2), 25)
+        self.assertEqual(scan_rounds([], 16, 2), 0)
+
+    def test_scan_timeout_fits_budget(self):
+        spread = [f"https://host{n}.example.com/" for n in range(50)]
+        self.assertEqual(request_scan_timeout(spread, 16, 2, budget=240), 60)
+        self.assertEqual(request_scan_timeout(spread[:10], 16, 2, budget=240), 240)
+        with self.assertRaises(ValueError):
+            request_scan_timeout([f"https://example.com/{n}" for n in range(50)], 16, 2, budget=240)
+
+
+class BulkScanApiTests(SimpleTestCase):
+    def post(self, payload):
+        return self.client.post('/api/v1/scan/bulk/', json.dumps(payload), content_type='application/json',
+                                secure=True)
+
+    def test_batch_too_slow_for_one_request_is_refused(self):
+        response = self.post({'urls': [f"https://example.com/{n}" for n in range(20)], 'per_host': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bulk_scan command', response.json()['error'])
+
+    def test_stream_runs_under_request_budget(self):
+        fake = FakeScans(duration=0)
+        with mock.patch.dict(bulk_scan.SCANNERS, {'basic': fake}):
+            response = self.post({'urls': ['example.com', 'example.org'], 'per_host': 500})
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual(sorted(line['url'] for line in lines), ['https://example.com', 'https://example.org'])
+        self.assertTrue(all(timeout <= bulk_scan.REQUEST_TIME_BUDGET for timeout in fake.timeouts))
@@ -0,0 +1,203 @@
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+from scanner import http_client
+from scanner.deadline import scan_deadline
+from scanner.http_client import HostHealth, HostUnresponsive, RequestMemo, ScannerHTTPClient
+
+URL = 'https://example.com/'
+
+
+def make_response(body=b'ok', truncated=False):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = URL
+    response._content = body
+    response.truncated = truncated
+    return response
+
+
+class RequestMemoKeyTests(unittest.TestCase):
+    def setUp(self):
+        self.memo = RequestMemo()
+        self.session = requests.Session()
+
+    def key(self, method='GET', url=URL, session=None, **kwargs):
+        return self.memo.key(session or self.session, method, url, kwargs)
+
+    def test_user_agent_is_ignored(self):
+        other = requests.Session()
+        other.headers['User-Agent'] = 'another-scanner/1.0'
+        self.assertEqual(self.key(), self.key(session=other))
+        self.assertEqual(self.key(), self.key(headers={'user-agent': 'x'}))
+
+    def test_method_is_case_insensitive(self):
+        self.assertEqual(self.key('get'), self.key('GET'))
+
+    def test_request_settings_split_keys(self):
+        base = self.key()
+        self.assertNotEqual(base, self.key('HEAD'))
+        self.assertNotEqual(base, self.key(url=URL + 'admin'))
+        self.assertNotEqual(base, self.key(params={'q': '1'}))
+        self.assertNotEqual(base, self.key(allow_redirects=False))
+        self.assertNotEqual(base, self.key(headers={'Range': 'bytes=0-99'}))
+
+    def test_tls_and_proxy_settings_split_keys(self):
+        base = self.key()
+        self.assertNotEqual(base, self.key(verify=False))
+        self.assertNotEqual(base, self.key(cert='/tmp/client.pem'))
+        self.assertNotEqual(base, self.key(proxies={'https': 'http://proxy:3128'}))
+
+        proxied = requests.Session()
+        proxied.proxies['https'] = 'http://proxy:3128'
+        self.assertEqual(self.key(session=proxied), self.key(proxies={'https': 'http://proxy:3128'}))
+
+    def test_credentials_split_keys(self):
+        base = self.key()
+        self.assertNotEqual(base, self.key(auth=('admin', 'secret')))
+        self.assertNotEqual(base, self.key(cookies={'sessionid': 'abc'}))
+        self.assertNotEqual(base, self.key(headers={'Cookie': 'sessionid=abc'}))
+
+        logged_in = requests.Session()
+        logged_in.cookies.set('sessionid', 'abc', domain='example.com')
+        self.assertNotEqual(base, self.key(session=logged_in))
+        self.assertEqual(self.key(session=logged_in), self.key(cookies={'sessionid': 'abc'}))
+        # cookies for other sites are not sent, so they do not split the key
+        elsewhere = requests.Session()
+        elsewhere.cookies.set('sessionid', 'abc', domain='other.example.org')
+        self.assertEqual(base, self.key(session=elsewhere))
+
+        authenticated = requests.Session()
+        authenticated.auth = ('admin', 'secret')
+        self.assertEqual(self.key(session=authenticated), self.key(auth=('admin', 'secret')))
+        self.assertIsNone(self.key(auth=requests.auth.HTTPDigestAuth('admin', 'secret')))
+
+    def test_unsafe_or_body_requests_are_not_memoised(self):
+        self.assertIsNone(self.key('POST'))
+        self.assertIsNone(self.key('DELETE'))
+        self.assertIsNone(self.key(data={'a': 1}))
+        self.assertIsNone(self.key(json={'a': 1}))
+        self.assertIsNotNone(self.key(data=None))
+
+
+class RequestMemoTests(unittest.TestCase):
+    def test_do_sends_once_per_key(self):
+        memo = RequestMemo()
+        send = mock.Mock(return_value=make_response())
+        first = memo.do('key', send)
+        second = memo.do('key', send)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(second.content, b'ok')
+        self.assertIsNot(first, second)
+        self.assertEqual(memo.stats(), {'entries': 1, 'shared': 1})
+
+    def test_concurrent_identical_requests_share_one_send(self):
+        memo = RequestMemo()
+        release = threading.Event()
+        calls = []
+
+        def send():
+            calls.append(1)
+            release.wait(5)
+            return make_response()
+
+        threads = [threading.Thread(target=memo.do, args=('key', send)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_truncated_response_is_not_stored(self):
+        memo = RequestMemo()
+        memo.store('key', make_response(truncated=True))
+        self.assertIsNone(memo.get('key'))
+
+    def test_entries_expire_after_ttl(self):
+        memo = RequestMemo(ttl=60)
+        with mock.patch('scanner.ttl_cache.time.monotonic', return_value=1000.0):
+            memo.store('key', make_response())
+        with mock.patch('scanner.ttl_cache.time.monotonic', return_value=1059.0):
+            self.assertIsNotNone(memo.get('key'))
+        with mock.patch('scanner.ttl_cache.time.monotonic', return_value=1061.0):
+            self.assertIsNone(memo.get('key'))
+
+        send = mock.Mock(return_value=make_response(b'fresh'))
+        with mock.patch('scanner.ttl_cache.time.monotonic', return_value=1061.0):
+            self.assertEqual(memo.do('key', send).content, b'fresh')
+        send.assert_called_once()
+
+
+class HostHealthTests(unittest.TestCase):
+    def setUp(self):
+        self.health = HostHealth()
+
+    def test_timeouts_adapt_to_measured_rtt(self):
+        self.assertEqual(self.health.before_request('example.com', 10), 10)
+        for _ in range(3):
+            self.health.record_response('example.com', 0.1)
+        connect, read = self.health.before_request('example.com', 10)
+        self.assertEqual(connect, 2.0)  # MIN_ADAPTIVE_TIMEOUT
+        self.assertEqual(read, 4.0)
+
+        for _ in range(3):
+            self.health.record_response('slow.example.com', 2.0)
+        self.assertEqual(self.health.before_request('slow.example.com', (5, None)), (5, 34.0))
+
+    def test_breaker_opens_after_consecutive_timeouts(self):
+        for _ in range(4):
+            self.health.record_timeout('example.com')
+        self.assertEqual(self.health.status('example.com'), 'ok')
+        self.health.record_timeout('example.com')
+        self.assertEqual(self.health.status('example.com'), 'unresponsive')
+        with self.assertRaises(HostUnresponsive):
+            self.health.before_request('example.com', 10)
+
+    def test_answer_resets_timeout_count(self):
+        for _ in range(4):
+            self.health.record_timeout('example.com')
+        self.health.record_response('example.com', 0.1)
+        self.health.record_timeout('example.com')
+        self.assertEqual(self.health.status('example.com'), 'ok')
+
+    def test_single_trial_after_cooldown(self):
+        with mock.patch('scanner.http_client.time.monotonic', return_value=1000.0):
+            for _ in range(5):
+                self.health.record_timeout('example.com')
+        with mock.patch('scanner.http_client.time.monotonic', return_value=1061.0):
+            self.health.before_request('example.com', 10)
+            with self.assertRaises(HostUnresponsive):
+                self.health.before_request('example.com', 10)
+            self.health.record_response('example.com', 0.1)
+            self.assertEqual(self.health.status('example.com'), 'ok')
+
+
+@mock.patch.object(requests.Session, 'request', side_effect=requests.exceptions.ReadTimeout('read timed out'))
+class ClientTimeoutTests(unittest.TestCase):
+    host = 'breaker.example.com'
+
+    def setUp(self):
+        http_client._host_health.reset(self.host)
+        self.addCleanup(http_client._host_health.reset, self.host)
+        self.client = ScannerHTTPClient()
+
+    def get(self):
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.get(f"https://{self.host}/", timeout=10)
+
+    def test_own_timeouts_trip_breaker(self, send):
+        for _ in range(5):
+            self.get()
+        self.assertEqual(http_client.host_status(self.host), 'unresponsive')
+
+    def test_deadline_clamped_timeouts_do_not_trip_breaker(self, send):
+        with scan_deadline(5):
+            for _ in range(6):
+                self.get()
+        self.assertLess(send.call_args.kwargs['timeout'], 10)
+        self.assertEqual(http_client.host_status(self.host), 'ok')
+        self.assertEqual(http_client.get_metrics()['host_health'][self.host]['consecutive_timeouts'], 0)
@@ -0,0 +1,106 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlparse
+
+from scanner import incremental
+from scanner.incremental import PHASE_INPUTS, PreviousScan, RescanPlan
+
+DNS = {'a': ['192.0.2.10']}
+TLS = {'cert_sha256': 'ab' * 32, 'serial_number': '01', 'verified': True, 'protocol': 'TLSv1.3', 'cipher': 'X'}
+HTTP = {'status': 200, 'url': 'https://example.com/', 'etag': '"v1"', 'last_modified': None, 'body_sha256': 'cd' * 32}
+PORTS = {'range': '1-1000', 'open': [22, 443]}
+
+
+def make_scanner():
+    return SimpleNamespace(target_url='https://example.com/', parsed_url=urlparse('https://example.com/'),
+                           domain='example.com', port_scan_range='1-1000', session=mock.Mock(), homepage=None)
+
+
+def make_previous(ran_ago=timedelta(days=1), **overrides):
+    ran_at = datetime.now(timezone.utc) - ran_ago
+    previous = PreviousScan(
+        scan_id=1, scan_date=datetime.now(timezone.utc),
+        fingerprints={'dns': DNS, 'tls': TLS, 'http': HTTP, 'ports': PORTS},
+        results={phase: {'status': 'completed'} for phase in PHASE_INPUTS},
+        phase_ran_at={phase: ran_at for phase in PHASE_INPUTS if phase != 'homepage'},
+    )
+    previous.phase_ran_at.update(overrides)
+    return previous
+
+
+class RescanPlanTests(unittest.TestCase):
+    def prepare(self, previous, dns=DNS, tls=TLS, http=HTTP, ports=PORTS):
+        plan = RescanPlan(make_scanner(), previous)
+        with mock.patch.object(incremental, 'dns_fingerprint', return_value=dns), \
+                mock.patch.object(incremental, 'tls_fingerprint', return_value=tls), \
+                mock.patch.object(RescanPlan, '_conditional_get', return_value=http), \
+                mock.patch.object(RescanPlan, '_recheck_ports', return_value=ports) as recheck:
+            plan.prepare()
+        self.recheck = recheck
+        return plan
+
+    def test_unchanged_target_reuses_every_phase(self):
+        plan = self.prepare(make_previous())
+        self.assertEqual(plan.reuse, set(PHASE_INPUTS))
+        self.assertEqual(plan.changed, set())
+
+    def test_changed_homepage_reruns_http_phases(self):
+        plan = self.prepare(make_previous(), http=dict(HTTP, body_sha256='ef' * 32))
+        self.assertEqual(plan.changed, {'http'})
+        self.assertEqual(plan.reuse, {'dns', 'ssl', 'ports', 'subdomains'})
+
+    def test_changed_dns_rescans_ports(self):
+        plan = self.prepare(make_previous(), dns={'a': ['192.0.2.99']})
+        self.assertIn('ports', plan.changed)
+        self.assertNotIn('ports', plan.reuse)
+        self.recheck.assert_not_called()
+
+    def test_newly_closed_port_rescans_ports(self):
+        plan = self.prepare(make_previous(), ports={'range': '1-1000', 'open': [443]})
+        self.assertNotIn('ports', plan.reuse)
+
+    def test_failed_phase_is_not_reused(self):
+        previous = make_previous()
+        previous.results['headers'] = {'error': 'connection reset'}
+        plan = self.prepare(previous)
+        self.assertNotIn('headers', plan.reuse)
+        # headers needs the homepage fetched
+        self.assertNotIn('homepage', plan.reuse)
+        self.assertIn('webapp', plan.reuse)
+
+    def test_phase_expires_after_max_age_since_it_last_ran(self):
+        stale = datetime.now(timezone.utc) - timedelta(seconds=incremental.INCREMENTAL_MAX_AGE + 60)
+        plan = self.prepare(make_previous(webapp=stale))
+        self.assertNotIn('webapp', plan.reuse)
+        self.assertNotIn('homepage', plan.reuse)
+        self.assertIn('vulns', plan.reuse)
+
+    def test_stale_port_sweep_is_not_rechecked(self):
+        stale = datetime.now(timezone.utc) - timedelta(seconds=incremental.INCREMENTAL_MAX_AGE + 60)
+        plan = self.prepare(make_previous(ports=stale))
+        self.recheck.assert_not_called()
+        self.assertNotIn('ports', plan.reuse)
+
+    def test_baseline_without_run_times_reruns_everything(self):
+        previous = make_previous()
+        previous.phase_ran_at = {}
+        self.assertEqual(self.prepare(previous).reuse, set())
+
+    def test_reused_phases_keep_their_run_time(self):
+        previous = make_previous(ran_ago=timedelta(days=3))
+        plan = self.prepare(previous, http=dict(HTTP, etag='"v2"'))
+        results = {phase: {'status': 'completed'} for phase in PHASE_INPUTS}
+        results['owasp'] = {'error': 'timed out'}
+        ran_at = plan.phase_ran_at(results)
+
+        self.assertEqual(ran_at['dns'], previous.phase_ran_at['dns'].isoformat())
+        self.assertEqual(ran_at['webapp'], plan.started.isoformat())
+        self.assertNotIn('owasp', ran_at)
+        self.assertNotIn('homepage', ran_at)
+
+    def test_incomplete_port_sweep_has_no_run_time(self):
+        plan = RescanPlan(make_scanner())
+        ran_at = plan.phase_ran_at({'ports': {'open_ports': [], 'incomplete': True}, 'dns': {'a': 1}})
+        self.assertEqual(set(ran_at), {'dns'})
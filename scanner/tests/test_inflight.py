@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from scanner import inflight
+from scanner.deadline import DeadlineExceeded, scan_deadline
+from scanner.models import InFlightScan
+
+
+class ScanKeyTests(SimpleTestCase):
+    def test_equivalent_urls_share_a_key(self):
+        key = inflight.scan_key('https://example.com/', 'advanced')
+        self.assertEqual(inflight.scan_key('HTTPS://Example.COM:443/', 'advanced'), key)
+        self.assertEqual(inflight.scan_key('https://example.com/#top', 'advanced'), key)
+
+    def test_target_profile_and_options_split_keys(self):
+        key = inflight.scan_key('https://example.com/', 'advanced')
+        self.assertNotEqual(inflight.scan_key('http://example.com/', 'advanced'), key)
+        self.assertNotEqual(inflight.scan_key('https://example.com:8443/', 'advanced'), key)
+        self.assertNotEqual(inflight.scan_key('https://example.com/', 'budget'), key)
+        self.assertNotEqual(inflight.scan_key('https://example.com/', 'advanced', {'incremental': True}), key)
+
+
+@override_settings(SCAN_COALESCING={'POLL_INTERVAL': 0.01})
+class CoalesceTests(TestCase):
+    key = inflight.scan_key('https://example.com/', 'advanced')
+
+    def hold_key(self, owner='other-worker', lease=60):
+        now = timezone.now()
+        return InFlightScan.objects.create(key=self.key, url='https://example.com/', profile='advanced',
+                                           owner=owner, started_at=now, expires_at=now + timedelta(seconds=lease))
+
+    def coalesce(self, run, **kwargs):
+        return inflight.coalesce(self.key, run, url='https://example.com/', profile='advanced', **kwargs)
+
+    def test_leader_runs_and_publishes(self):
+        run = mock.Mock(return_value={'score': 90})
+        self.assertEqual(self.coalesce(run), {'score': 90})
+        row = InFlightScan.objects.get(key=self.key)
+        self.assertIsNotNone(row.finished_at)
+        self.assertEqual(json.loads(row.result), {'score': 90})
+
+        # a request arriving while the result lingers gets it without scanning
+        self.assertEqual(self.coalesce(mock.Mock(side_effect=AssertionError)), {'score': 90})
+        run.assert_called_once()
+
+    def test_refresh_does_not_reuse_lingering_result(self):
+        self.coalesce(mock.Mock(return_value={'score': 90}))
+        self.assertEqual(self.coalesce(mock.Mock(return_value={'score': 50}), reuse_finished=False), {'score': 50})
+
+    def test_follower_receives_leaders_result(self):
+        row = self.hold_key()
+
+        def leader_finishes(seconds):
+            inflight._publish(self.key, row.owner, {'score': 75})
+
+        run = mock.Mock()
+        with mock.patch.object(inflight.time, 'sleep', side_effect=leader_finishes):
+            result = self.coalesce(run, decode=lambda value: dict(value, decoded=True))
+        self.assertEqual(result, {'score': 75, 'decoded': True})
+        run.assert_not_called()
+        self.assertEqual(InFlightScan.objects.get(key=self.key).waiters, 1)
+
+    def test_follower_waits_no_longer_than_its_deadline(self):
+        self.hold_key()
+        run = mock.Mock()
+        with scan_deadline(0.1), self.assertRaises(DeadlineExceeded):
+            self.coalesce(run)
+        run.assert_not_called()
+
+    def test_expired_leader_is_taken_over(self):
+        self.hold_key(lease=-1)
+        self.assertEqual(self.coalesce(lambda: {'score': 60}), {'score': 60})
+
+    def test_failed_scan_frees_key(self):
+        with self.assertRaises(ConnectionError):
+            self.coalesce(mock.Mock(side_effect=ConnectionError('refused')))
+        self.assertFalse(InFlightScan.objects.filter(key=self.key).exists())
+        self.assertEqual(self.coalesce(lambda: {'score': 80}), {'score': 80})
+
+    def test_async_follower_waits_no_longer_than_its_deadline(self):
+        async def follow():
+            with scan_deadline(0.1):
+                return await inflight.acoalesce(self.key, run, url='https://example.com/', profile='advanced')
+
+        run = mock.AsyncMock()
+        # Another process holds the key and never finishes
+        with mock.patch.object(inflight, '_lead', return_value=False), \
+                mock.patch.object(inflight, '_poll', return_value=('running', None)), \
+                mock.patch.object(inflight, '_attach'), \
+                self.assertRaises(DeadlineExceeded):
+            asyncio.run(follow())
+        run.assert_not_called()
+
+    @override_settings(SCAN_COALESCING={'ENABLED': False})
+    def test_disabled_always_runs(self):
+        self.hold_key()
+        self.assertEqual(self.coalesce(lambda: {'score': 10}), {'score': 10})
+
+
+class InProcessTests(SimpleTestCase):
+    def test_concurrent_threads_run_once(self):
+        calls = []
+        release = threading.Event()
+        results = []
+
+        def run():
+            calls.append(1)
+            release.wait(5)
+            return {'score': 1}
+
+        key = inflight.scan_key('https://example.com/', 'budget')
+        with mock.patch.object(inflight, '_coalesce', lambda key, run, *args: run()):
+            threads = [threading.Thread(target=lambda: results.append(inflight.coalesce(key, run)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.1)  # let every thread attach to the first one's call
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'score': 1}] * 4)
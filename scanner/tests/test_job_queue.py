@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from scanner import job_queue
+from scanner.models import AdvancedSecurityScan
+
+
+@override_settings(SCAN_QUEUE={'RUN_INLINE': False, 'MAX_ATTEMPTS': 2, 'RETRY_BACKOFF': 30})
+class JobQueueTests(TestCase):
+    def test_enqueue_joins_identical_pending_job(self):
+        first = job_queue.enqueue('https://example.com', incremental=False)
+        second = job_queue.enqueue('https://example.com', incremental=False)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(second.cache_status['status'], 'joined')
+        self.assertEqual(AdvancedSecurityScan.objects.count(), 1)
+
+    def test_enqueue_separates_other_options_and_types(self):
+        advanced = job_queue.enqueue('https://example.com')
+        incremental = job_queue.enqueue('https://example.com', incremental=True)
+        budget = job_queue.enqueue('https://example.com', scan_type='budget')
+        self.assertEqual(len({advanced.id, incremental.id, budget.id}), 3)
+
+    def test_enqueue_serves_recent_completed_scan(self):
+        scan = job_queue.enqueue('https://example.com')
+        AdvancedSecurityScan.objects.filter(id=scan.id).update(status='completed')
+        again = job_queue.enqueue('https://example.com')
+        self.assertEqual(again.id, scan.id)
+        self.assertEqual(again.cache_status['status'], 'hit')
+
+        refreshed = job_queue.enqueue('https://example.com', force_refresh=True)
+        self.assertNotEqual(refreshed.id, scan.id)
+        self.assertEqual(refreshed.status, 'queued')
+
+    def test_claim_leases_job_once(self):
+        scan = job_queue.enqueue('https://example.com')
+        claimed = job_queue.claim('worker-1')
+        self.assertEqual(claimed.id, scan.id)
+        self.assertEqual(claimed.status, 'running')
+        self.assertEqual(claimed.locked_by, 'worker-1')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertGreater(claimed.locked_until, timezone.now())
+        self.assertIsNone(job_queue.claim('worker-2'))
+
+    def test_claim_skips_jobs_not_yet_due(self):
+        scan = job_queue.enqueue('https://example.com')
+        AdvancedSecurityScan.objects.filter(id=scan.id).update(available_at=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(job_queue.claim('worker-1'))
+
+    def test_failed_job_is_retried_with_backoff_then_failed(self):
+        job_queue.enqueue('https://example.com')
+        scan = job_queue.claim('worker-1')
+        job_queue.fail(scan, 'worker-1', 'connection refused')
+
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, 'queued')
+        self.assertEqual(scan.last_error, 'connection refused')
+        self.assertGreater(scan.available_at, timezone.now() + timedelta(seconds=25))
+        self.assertIsNone(job_queue.claim('worker-1'))
+
+        AdvancedSecurityScan.objects.filter(id=scan.id).update(available_at=timezone.now())
+        scan = job_queue.claim('worker-1')
+        self.assertEqual(scan.attempts, 2)
+        job_queue.fail(scan, 'worker-1', 'connection refused')
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, 'failed')
+
+    def test_finish_ignores_worker_that_lost_its_lease(self):
+        job_queue.enqueue('https://example.com')
+        scan = job_queue.claim('worker-1')
+        job_queue.finish(scan, 'worker-2', 'completed')
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, 'running')
+
+        job_queue.finish(scan, 'worker-1', 'completed')
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, 'completed')
+        self.assertEqual(scan.locked_by, '')
+
+    def test_expired_lease_goes_back_to_queue(self):
+        job_queue.enqueue('https://example.com')
+        scan = job_queue.claim('worker-1')
+        AdvancedSecurityScan.objects.filter(id=scan.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = job_queue.claim('worker-2')
+        self.assertEqual(reclaimed.id, scan.id)
+        self.assertEqual(reclaimed.locked_by, 'worker-2')
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_expired_lease_on_last_attempt_fails_job(self):
+        job_queue.enqueue('https://example.com')
+        scan = job_queue.claim('worker-1')
+        AdvancedSecurityScan.objects.filter(id=scan.id).update(
+            attempts=2, locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(job_queue.requeue_expired(), 1)
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, 'failed')
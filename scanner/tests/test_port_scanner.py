@@ -0,0 +1,73 @@
+import asyncio
+import socket
+import time
+import unittest
+from unittest import mock
+
+from scanner import advanced_scanner
+from scanner.deadline import scan_deadline
+from scanner.port_scanner import AsyncPortScanner, parse_port_range, scan_ports
+
+
+class ParsePortRangeTests(unittest.TestCase):
+    def test_ranges_and_lists(self):
+        self.assertEqual(parse_port_range('22,80,8000-8002'), [22, 80, 8000, 8001, 8002])
+        self.assertEqual(parse_port_range(' 443, 80 ,443,,'), [80, 443])
+        self.assertEqual(len(parse_port_range('1-65535')), 65535)
+
+    def test_invalid_specs(self):
+        for spec in ('', '0-10', '10-5', '1-65536', 'http', '22-'):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_port_range(spec)
+
+
+class ScanPortsTests(unittest.TestCase):
+    def test_open_and_closed_ports(self):
+        with socket.socket() as listener, socket.socket() as unused:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            unused.bind(('127.0.0.1', 0))
+            open_port, closed_port = listener.getsockname()[1], unused.getsockname()[1]
+            unused.close()
+
+            seen = []
+            result = scan_ports('127.0.0.1', f"{open_port},{closed_port}", on_open=seen.append)
+
+        self.assertEqual([port['port'] for port in result['open_ports']], [open_port])
+        self.assertEqual(seen, result['open_ports'])
+        self.assertEqual(result['closed_count'], 1)
+        self.assertNotIn('incomplete', result)
+
+    def test_deadline_cancels_sweep_and_keeps_open_ports(self):
+        async def probe(scanner, port, timeout):
+            if port == 22:
+                return 'open'
+            await asyncio.sleep(30)
+            return 'filtered'
+
+        start_time = time.monotonic()
+        with mock.patch.object(AsyncPortScanner, '_probe', probe), scan_deadline(0.3):
+            result = scan_ports('192.0.2.1', '20-30', concurrency=4)
+
+        self.assertLess(time.monotonic() - start_time, 5)
+        self.assertTrue(result['incomplete'])
+        self.assertEqual([port['port'] for port in result['open_ports']], [22])
+
+
+class AdvancedPortScanTests(unittest.TestCase):
+    def test_nmap_only_scans_ports_found_open(self):
+        scanner = advanced_scanner.AdvancedSecurityScanner('https://example.com', port_scan_range='1-1000')
+        scanner.ip_address = '192.0.2.1'
+        scanner.nm = mock.Mock()
+        scanner.nm.all_hosts.return_value = []
+        sweep = {'open_ports': [{'port': 22, 'protocol': 'tcp', 'status': 'open', 'service': 'ssh'},
+                                {'port': 443, 'protocol': 'tcp', 'status': 'open', 'service': 'https'}]}
+
+        with mock.patch.object(advanced_scanner, 'NMAP_AVAILABLE', True), \
+                mock.patch.object(advanced_scanner, 'scan_ports', return_value=sweep) as sweep_ports:
+            results = scanner.port_scan()
+
+        sweep_ports.assert_called_once_with('192.0.2.1', '1-1000')
+        scanner.nm.scan.assert_called_once_with('192.0.2.1', '22,443', arguments='-sV --script vuln')
+        self.assertEqual(results['port_range'], '1-1000')
+        self.assertEqual([finding.title for finding in scanner.findings], ['SSH Service Exposed'])
@@ -0,0 +1,88 @@
+import io
+import unittest
+from urllib.parse import urlparse
+
+import requests
+
+from scanner.probe_engine import Probe, ProbeEngine, extension_class
+
+NOT_FOUND_PAGE = b'<html><body><h1>Sorry</h1><p>The page you requested could not be found on this shop.</p></body></html>'
+
+
+def make_response(url, status, body):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers['Content-Length'] = str(len(body))
+    response.raw = io.BytesIO(body)
+    return response
+
+
+class FakeSession:
+    """Serves pages by path; anything else gets missing_status with the not-found page"""
+
+    def __init__(self, pages, missing_status=200):
+        self.pages = pages
+        self.missing_status = missing_status
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        path = urlparse(url).path
+        if path in self.pages:
+            return make_response(url, 200, self.pages[path])
+        return make_response(url, self.missing_status, NOT_FOUND_PAGE)
+
+    def head(self, url, **kwargs):
+        response = self.get(url)
+        response.raw = io.BytesIO(b'')
+        return response
+
+
+class ExtensionClassTests(unittest.TestCase):
+    def test_paths_grouped_by_extension(self):
+        self.assertEqual(extension_class('/admin/login.php')[0], 'script')
+        self.assertEqual(extension_class('/backup.sql')[0], 'data')
+        self.assertEqual(extension_class('/.env'), ('data', '.env'))
+        self.assertEqual(extension_class('/.htpasswd'), ('dotfile', ''))
+        self.assertEqual(extension_class('/admin/'), ('dir', '/'))
+        self.assertEqual(extension_class('/server-status'), ('none', ''))
+
+
+class SoftNotFoundTests(unittest.TestCase):
+    def test_catch_all_page_is_dropped(self):
+        session = FakeSession({'/phpinfo.php': b'<html><title>phpinfo()</title>' + b'PHP Version 8.1 ' * 200 + b'</html>'})
+        results = ProbeEngine(session).run([
+            Probe('https://shop.example.com/config.php'),
+            Probe('https://shop.example.com/phpinfo.php'),
+        ])
+
+        missing = results['https://shop.example.com/config.php']
+        self.assertTrue(missing.soft_404)
+        self.assertIsNone(missing.response)
+        self.assertFalse(missing.ok)
+
+        found = results['https://shop.example.com/phpinfo.php']
+        self.assertFalse(found.soft_404)
+        self.assertEqual(found.response.status_code, 200)
+
+    def test_baseline_sampled_once_per_host_and_class(self):
+        session = FakeSession({})
+        engine = ProbeEngine(session)
+        engine.run([Probe('https://shop.example.com/a.php'), Probe('https://shop.example.com/b.php')])
+        engine.run([Probe('https://shop.example.com/c.asp')])
+        # two random samples for the script class, then the three probes
+        self.assertEqual(len(session.requested), 5)
+
+    def test_real_not_found_leaves_pages_alone(self):
+        session = FakeSession({'/robots.txt': NOT_FOUND_PAGE}, missing_status=404)
+        result = ProbeEngine(session).run([Probe('https://shop.example.com/robots.txt')])['https://shop.example.com/robots.txt']
+        self.assertFalse(result.soft_404)
+        self.assertEqual(result.response.status_code, 200)
+
+    def test_probe_can_opt_out_of_baseline(self):
+        session = FakeSession({})
+        url = 'https://shop.example.com/config.php'
+        result = ProbeEngine(session).run([Probe(url, baseline=False)])[url]
+        self.assertFalse(result.soft_404)
+        self.assertEqual(session.requested, [url])
@@ -0,0 +1,82 @@
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from scanner.models import AdvancedSecurityScan, SecurityFinding, VulnerabilityDatabase
+from scanner.search import INDEXES, fts5_query, is_indexed, search, search_terms, sqlite_has_fts5
+
+
+class SearchTermsTests(unittest.TestCase):
+    def test_words_split_into_tokens(self):
+        self.assertEqual(search_terms('CVE-2024-1234 example.com'), [['CVE', '2024', '1234'], ['example', 'com']])
+        self.assertEqual(search_terms('  -- '), [])
+
+    def test_fts5_query_matches_every_word_as_prefix(self):
+        self.assertEqual(fts5_query([['sql'], ['inject']]), '"sql"* "inject"*')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite' and sqlite_has_fts5(connection), 'needs SQLite with FTS5')
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for cve_id, description, score in [
+            ('CVE-2024-0001', 'Heap overflow in the nginx resolver', 9.8),
+            ('CVE-2024-0002', 'SQL injection in the login form', 7.5),
+            ('CVE-2024-0003', 'Overflow of the overflow counter in overflow handling', 5.0),
+        ]:
+            VulnerabilityDatabase.objects.create(
+                cve_id=cve_id, cvss_score=score, severity='HIGH', description=description,
+                published_date=now, modified_date=now,
+            )
+        self.scan = AdvancedSecurityScan.objects.create(url='https://shop.example.com/cart', domain='shop.example.com')
+
+    def cve_ids(self, query, ranked=False):
+        return sorted(search(VulnerabilityDatabase.objects.all(), query, ranked=ranked).values_list('cve_id', flat=True))
+
+    def test_indexes_installed_by_migrations(self):
+        for label in ('scanner.VulnerabilityDatabase', 'scanner.SecurityFinding', 'scanner.AdvancedSecurityScan'):
+            self.assertTrue(is_indexed(INDEXES[label], connection), label)
+
+    def test_prefix_match_on_every_word(self):
+        self.assertEqual(self.cve_ids('overfl'), ['CVE-2024-0001', 'CVE-2024-0003'])
+        self.assertEqual(self.cve_ids('overflow nginx'), ['CVE-2024-0001'])
+        self.assertEqual(self.cve_ids('CVE-2024-0002'), ['CVE-2024-0002'])
+        self.assertEqual(self.cve_ids(''), [])
+
+    def test_ranked_results_carry_search_rank(self):
+        results = list(search(VulnerabilityDatabase.objects.all(), 'overflow'))
+        self.assertEqual(results[0].cve_id, 'CVE-2024-0003')
+        self.assertGreaterEqual(results[0].search_rank, results[1].search_rank)
+
+    def test_triggers_follow_updates_and_deletes(self):
+        VulnerabilityDatabase.objects.filter(cve_id='CVE-2024-0002').update(description='Path traversal in uploads')
+        self.assertEqual(self.cve_ids('injection'), [])
+        self.assertEqual(self.cve_ids('traversal'), ['CVE-2024-0002'])
+
+        VulnerabilityDatabase.objects.filter(cve_id='CVE-2024-0001').delete()
+        self.assertEqual(self.cve_ids('overflow'), ['CVE-2024-0003'])
+
+    def test_reinserted_key_is_indexed_once(self):
+        VulnerabilityDatabase.objects.filter(cve_id='CVE-2024-0002').delete()
+        now = timezone.now()
+        VulnerabilityDatabase.objects.create(
+            cve_id='CVE-2024-0002', cvss_score=7.5, severity='HIGH', description='SQL injection again',
+            published_date=now, modified_date=now,
+        )
+        self.assertEqual(self.cve_ids('injection'), ['CVE-2024-0002'])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {INDEXES['scanner.VulnerabilityDatabase'].fts_table}")
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+    def test_findings_and_scans(self):
+        finding = SecurityFinding.objects.create(
+            scan=self.scan, severity='high', category='webapp', title='Reflected XSS',
+            description='Search parameter echoed unescaped', recommendation='Encode output',
+        )
+        self.assertEqual(list(search(SecurityFinding.objects.all(), 'xss echoed', ranked=False)), [finding])
+        self.assertEqual(list(search(AdvancedSecurityScan.objects.all(), 'shop.example', ranked=False)), [self.scan])
+
+        self.scan.delete()
+        self.assertEqual(list(search(SecurityFinding.objects.all(), 'xss', ranked=False)), [])
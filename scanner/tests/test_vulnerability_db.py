@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase, TestCase
+
+from scanner.vulnerability_db import CPEIndex, CVERepository, Vulnerability, cpe_rows, version_key
+
+
+class VersionKeyTests(SimpleTestCase):
+    def test_numeric_parts_compare_as_numbers(self):
+        self.assertLess(version_key('1.9'), version_key('1.10'))
+        self.assertLess(version_key('2.4.9'), version_key('2.4.49'))
+
+    def test_trailing_zeros_are_ignored(self):
+        self.assertEqual(version_key('2.0'), version_key('2.0.0'))
+        self.assertEqual(version_key('2'), version_key('2.0'))
+
+    def test_pre_releases_sort_before_release(self):
+        self.assertLess(version_key('2.0rc1'), version_key('2.0'))
+        self.assertLess(version_key('2.0b2'), version_key('2.0rc1'))
+        self.assertLess(version_key('1.9.9'), version_key('2.0a1'))
+
+    def test_letter_suffixes_sort_after_release(self):
+        self.assertLess(version_key('1.1.1'), version_key('1.1.1k'))
+        self.assertLess(version_key('1.1.1k'), version_key('1.1.2'))
+
+
+def row(cve_id, version='*', vendor='nginx', start_incl='', start_excl='', end_incl='', end_excl=''):
+    return (cve_id, vendor, version, start_incl, start_excl, end_incl, end_excl)
+
+
+class CPEIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = CPEIndex([
+            row('CVE-EXACT', version='1.18.0'),
+            row('CVE-INCL', start_incl='1.20.0', end_incl='1.21.0'),
+            row('CVE-EXCL', start_excl='1.20.0', end_excl='1.21.0'),
+            row('CVE-UPTO', end_excl='1.16.0'),
+            row('CVE-OPEN', start_incl='1.25'),
+            row('CVE-OTHER', version='1.18.0', vendor='f5'),
+        ])
+
+    def test_exact_version(self):
+        self.assertEqual(self.index.lookup('1.18.0', 'nginx'), ['CVE-EXACT'])
+        self.assertEqual(self.index.lookup('1.18', 'nginx'), ['CVE-EXACT'])
+
+    def test_range_bounds(self):
+        self.assertEqual(self.index.lookup('1.20.0'), ['CVE-INCL'])
+        self.assertEqual(self.index.lookup('1.20.5'), ['CVE-EXCL', 'CVE-INCL'])
+        self.assertEqual(self.index.lookup('1.21.0'), ['CVE-INCL'])
+        self.assertEqual(self.index.lookup('1.21.1'), [])
+
+    def test_open_ended_ranges(self):
+        self.assertEqual(self.index.lookup('1.2'), ['CVE-UPTO'])
+        self.assertEqual(self.index.lookup('1.16.0'), [])
+        self.assertEqual(self.index.lookup('1.27.3'), ['CVE-OPEN'])
+        self.assertEqual(self.index.lookup('1.25rc1'), [])
+
+    def test_vendor_filter(self):
+        self.assertEqual(self.index.lookup('1.18.0'), ['CVE-EXACT', 'CVE-OTHER'])
+        self.assertEqual(self.index.lookup('1.18.0', 'f5'), ['CVE-OTHER'])
+
+    def test_without_version_every_cve_of_product(self):
+        self.assertEqual(len(self.index.lookup(None, 'nginx')), 5)
+
+
+def vulnerability(cve_id, modified='2024-01-02T00:00:00'):
+    return Vulnerability(cve_id=cve_id, cvss_score=7.5, severity='HIGH', description=f'{cve_id} in nginx',
+                         published_date='2024-01-01T00:00:00', modified_date=modified,
+                         affected_products=[], references=[])
+
+
+class CVERepositoryTests(TestCase):
+    def setUp(self):
+        self.repository = CVERepository()
+        self.repository.store([
+            (vulnerability('CVE-2024-0001'), cpe_rows('CVE-2024-0001', [{
+                'criteria': 'cpe:2.3:a:f5:nginx:*:*:*:*:*:*:*:*',
+                'versionStartIncluding': '1.20.0', 'versionEndExcluding': '1.25.3',
+            }])),
+            (vulnerability('CVE-2024-0002'), cpe_rows('CVE-2024-0002', [{
+                'criteria': 'cpe:2.3:a:f5:nginx:1.18.0:*:*:*:*:*:*:*',
+            }])),
+        ])
+
+    def test_search_resolves_version_through_cpe_index(self):
+        found = self.repository.search_cached_vulnerabilities('nginx', '1.22.1')
+        self.assertEqual([vuln.cve_id for vuln in found], ['CVE-2024-0001'])
+        self.assertEqual(self.repository.search_cached_vulnerabilities('nginx', '1.26.0'), [])
+
+    def test_store_only_replaces_newer_records(self):
+        older = vulnerability('CVE-2024-0002', modified='2023-06-01T00:00:00')
+        older.description = 'stale copy'
+        self.assertEqual(self.repository.store([(older, [])]), 0)
+
+        newer = vulnerability('CVE-2024-0002', modified='2024-06-01T00:00:00')
+        self.assertEqual(self.repository.store([(newer, [])]), 1)
+        self.assertEqual(self.repository.search_cached_vulnerabilities('nginx', '1.18.0'), [])
+
+    def test_get_reads_store_without_fetching(self):
+        self.assertEqual(self.repository.get('cve-2024-0001', fetch=False).cve_id, 'CVE-2024-0001')
+        self.assertIsNone(self.repository.get('CVE-2024-9999', fetch=False))
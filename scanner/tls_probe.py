@@ -0,0 +1,181 @@
+"""
+Shared TLS Probe Service
+One handshake per host:port per scan window: the negotiated protocol,
+cipher and certificate chain are cached and read by every module that
+inspects TLS
+"""
+
+import socket
+import ssl
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+
+from . import dns_resolver
+from .deadline import clamp_timeout
+from .ttl_cache import SingleFlight, TTLCache
+
+TLS_CACHE_TTL = 300  # seconds; one scan window
+TLS_ERROR_TTL = 30  # failed handshakes are retried sooner
+
+
+class TLSProbeError(Exception):
+    """Raised when a verified handshake was required but did not happen"""
+
+
+@dataclass
+class TLSProbeResult:
+    host: str
+    port: int
+    verified: bool = False
+    peer_cert: Dict[str, Any] = field(default_factory=dict)  # ssl getpeercert() format, verified only
+    chain_der: List[bytes] = field(default_factory=list)  # leaf first
+    protocol: Optional[str] = None
+    cipher: Optional[Tuple[str, str, int]] = None
+    error: Optional[str] = None  # connection or verification failure
+    probed_at: datetime = field(default_factory=datetime.now)
+
+    def __post_init__(self):
+        self._x509 = None
+        self._lock = threading.Lock()
+
+    @property
+    def cert_der(self) -> Optional[bytes]:
+        return self.chain_der[0] if self.chain_der else None
+
+    @property
+    def certificate(self) -> Optional[x509.Certificate]:
+        """Leaf certificate parsed with cryptography, parsed once and kept"""
+        if self.cert_der is None:
+            return None
+        with self._lock:
+            if self._x509 is None:
+                self._x509 = x509.load_der_x509_certificate(self.cert_der, default_backend())
+        return self._x509
+
+    @property
+    def not_after(self) -> Optional[datetime]:
+        if self.peer_cert.get('notAfter'):
+            return datetime.strptime(self.peer_cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+        certificate = self.certificate
+        return certificate.not_valid_after if certificate else None
+
+    @property
+    def issuer(self) -> Optional[str]:
+        certificate = self.certificate
+        return certificate.issuer.rfc4514_string() if certificate else None
+
+    @property
+    def signature_algorithm(self) -> str:
+        try:
+            return self.certificate.signature_hash_algorithm.name
+        except Exception:
+            return ''
+
+    def require_verified(self) -> 'TLSProbeResult':
+        """Return self, or raise like a failed verified handshake would"""
+        if not self.verified:
+            raise TLSProbeError(self.error or f"TLS handshake with {self.host}:{self.port} failed")
+        return self
+
+
+class TLSProbe:
+    def __init__(self, ttl: float = TLS_CACHE_TTL, error_ttl: float = TLS_ERROR_TTL):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.cache = TTLCache(max_entries=2048, default_ttl=ttl)
+        self._flights = SingleFlight()
+
+    def probe(self, host: str, port: int = 443, timeout: float = 10) -> TLSProbeResult:
+        key = (host.lower(), port)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._flights.do(key, lambda: self._probe_and_cache(key, host, port, timeout))
+        return result
+
+    def _probe_and_cache(self, key, host: str, port: int, timeout: float) -> TLSProbeResult:
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        result = self._handshake(host, port, clamp_timeout(timeout))
+        self.cache.set(key, result, ttl=self.ttl if result.chain_der else self.error_ttl)
+        return result
+
+    def _connect(self, host: str, port: int, timeout: float) -> socket.socket:
+        try:
+            address = dns_resolver.gethostbyname(host)
+        except socket.gaierror:
+            address = host
+        return socket.create_connection((address, port), timeout=timeout)
+
+    def _handshake(self, host: str, port: int, timeout: float) -> TLSProbeResult:
+        result = TLSProbeResult(host=host, port=port)
+
+        try:
+            context = ssl.create_default_context()
+            with self._connect(host, port, timeout) as sock:
+                with context.wrap_socket(sock, server_hostname=host) as ssock:
+                    self._record(result, ssock)
+                    result.verified = True
+                    result.peer_cert = ssock.getpeercert()
+            return result
+        except ssl.SSLCertVerificationError as e:
+            result.error = str(e)
+        except Exception as e:
+            result.error = str(e)
+            return result
+
+        # Invalid certificate: handshake again without verification so the
+        # chain, protocol and cipher can still be inspected
+        try:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            with self._connect(host, port, timeout) as sock:
+                with context.wrap_socket(sock, server_hostname=host) as ssock:
+                    self._record(result, ssock)
+        except Exception:
+            pass
+        return result
+
+    def _record(self, result: TLSProbeResult, ssock: ssl.SSLSocket):
+        result.protocol = ssock.version()
+        result.cipher = ssock.cipher()
+
+        # Presented chain where the ssl module exposes it (Python 3.13+), else the leaf
+        get_chain = getattr(ssock, 'get_unverified_chain', None)
+        chain = []
+        if get_chain is not None:
+            try:
+                chain = [ssl.PEM_cert_to_DER_cert(cert.public_bytes()) for cert in get_chain() or []]
+            except Exception:
+                chain = []
+        if not chain:
+            leaf = ssock.getpeercert(binary_form=True)
+            chain = [leaf] if leaf else []
+        result.chain_der = chain
+
+    def clear(self):
+        self.cache.clear()
+
+
+_tls_probe: Optional[TLSProbe] = None
+_tls_probe_lock = threading.Lock()
+
+
+def get_tls_probe() -> TLSProbe:
+    """The shared process-wide TLS probe"""
+    global _tls_probe
+    if _tls_probe is None:
+        with _tls_probe_lock:
+            if _tls_probe is None:
+                _tls_probe = TLSProbe()
+    return _tls_probe
+
+
+def probe_tls(host: str, port: int = 443, timeout: float = 10) -> TLSProbeResult:
+    return get_tls_probe().probe(host, port, timeout)
@@ -6,6 +6,7 @@ urlpatterns = [
     path('scan/', views.scan_website, name='scan_website'),
     path('breach/', views.check_breach, name='check_breach'),
     path('api/scan/', views.api_scan, name='api_scan'),
+    path('api/scan/async/', views.api_scan_async, name='api_scan_async'),
     path('generate-report/<int:scan_id>/', views.generate_report, name='generate_report'),
     path('history/', views.scan_history, name='scan_history'),
     path('breach-history/', views.breach_history, name='breach_history'),
@@ -18,6 +19,7 @@ urlpatterns = [
     path('advanced/report/<int:scan_id>/', advanced_views.generate_advanced_report, name='generate_advanced_report'),
     path('advanced/analytics/', advanced_views.security_analytics, name='security_analytics'),
     path('api/advanced-scan/', advanced_views.api_advanced_scan, name='api_advanced_scan'),
+    path('api/scan-jobs/<int:scan_id>/', advanced_views.api_scan_job_status, name='api_scan_job_status'),
     path('api/analytics-data/', advanced_views.analytics_api_data, name='analytics_api_data'),
     
     # Intelligence URLs
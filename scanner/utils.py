@@ -1,18 +1,32 @@
+import asyncio
 import requests
+from requests.structures import CaseInsensitiveDict
 import ssl
 import socket
+import os
+import threading
+import time
 from urllib.parse import urlparse
 from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 import json
-import re
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
 import html
 import urllib.parse
 from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from asgiref.sync import sync_to_async
 import gc
 import logging
 
+from . import http_client
+from . import inflight
+from .http_client import create_client
+from .tls_probe import probe_tls
+from . import signatures
+from .deadline import scan_deadline as deadline_scope
+from .performance_optimizations import CacheManager
+
 # Optional imports with fallbacks
 try:
     import nmap
@@ -35,124 +49,369 @@ except ImportError:
     HAS_WHOIS = False
     logging.warning("python-whois not available - WHOIS lookup will be limited")
 
+@dataclass
+class TargetSnapshot:
+    """Single fetch of the scan target shared by every check in a scan"""
+    url: str
+    final_url: str = ''
+    status_code: int = 0
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    response_time: float = 0  # in milliseconds
+    redirect_chain: List[Dict[str, object]] = field(default_factory=list)
+    body: bytes = b''
+    body_truncated: bool = False
+    encoding: Optional[str] = None
+    ssl_verified: bool = False
+    ssl_error: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def text(self):
+        """Decoded body, capped at the snapshot size limit"""
+        try:
+            return self.body.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+
 class SecurityScanner:
-    def __init__(self, url, timeout=10):
+    # Cap on how much of the target body is kept in memory for the checks
+    MAX_BODY_BYTES = 1024 * 1024
+
+    def __init__(self, url, timeout=10, execution_mode='sync', scan_deadline=None, force_refresh=False):
         self.url = url
         self.parsed_url = urlparse(url)
         self.domain = self.parsed_url.netloc
+        self.timeout = timeout
+        # 'sync' runs the checks in the calling thread, 'asyncio' runs the
+        # network checks concurrently on an event loop under scan_deadline
+        self.execution_mode = execution_mode
+        self.scan_deadline = scan_deadline or timeout * 2
+        # Skip cached scan, DNS and SSL results (they are still refreshed)
+        self.force_refresh = force_refresh
         self.results = {}
-        self.session = requests.Session()
+        self._snapshot = None
+        self._certificate = None
+        self.session = create_client(user_agent='ZtionSec Security Scanner 1.0')
         self.session.timeout = timeout
-        self.session.headers.update({
-            'User-Agent': 'ZtionSec Security Scanner 1.0'
-        })
-        
+        # Worker threads of scan_all_async() still using the session; a
+        # check cut off by the deadline keeps running until it returns
+        self._threads = 0
+        self._threads_lock = threading.Lock()
+        self._released = False
+
+    @property
+    def snapshot(self):
+        """Target snapshot for this scan, fetched on first use"""
+        if self._snapshot is None:
+            self._snapshot = self.fetch_snapshot()
+        return self._snapshot
+
+    def fetch_snapshot(self):
+        """Fetch the target once and record everything the checks need"""
+        snapshot = TargetSnapshot(url=self.url)
+        try:
+            start_time = time.perf_counter()
+            try:
+                response = self._get_target(verify=True)
+                snapshot.ssl_verified = self.parsed_url.scheme == 'https'
+            except requests.exceptions.SSLError as e:
+                # Certificate problems are a finding, not a reason to skip
+                # the header and content checks
+                snapshot.ssl_error = str(e)
+                start_time = time.perf_counter()
+                response = self._get_target(verify=False)
+
+            try:
+                body, truncated = self._read_capped_body(response)
+            finally:
+                response.close()
+            # Timing covers the body transfer, as the old full GET did
+            elapsed = time.perf_counter() - start_time
+
+            snapshot.final_url = response.url
+            snapshot.status_code = response.status_code
+            snapshot.headers = CaseInsensitiveDict(response.headers)
+            snapshot.encoding = response.encoding or 'utf-8'
+            snapshot.body = body
+            snapshot.body_truncated = truncated
+            snapshot.redirect_chain = [
+                {'url': r.url, 'status_code': r.status_code}
+                for r in response.history
+            ]
+            snapshot.response_time = round(elapsed * 1000, 2)
+        except Exception as e:
+            snapshot.error = str(e)
+        return snapshot
+
+    def _get_target(self, verify):
+        return self.session.get(
+            self.url, timeout=self.timeout, verify=verify,
+            allow_redirects=True, stream=True
+        )
+
+    def _read_capped_body(self, response):
+        """Read at most MAX_BODY_BYTES of the response body"""
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=16384):
+            remaining = self.MAX_BODY_BYTES - size
+            if len(chunk) > remaining:
+                chunks.append(chunk[:remaining])
+                truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        return b''.join(chunks), truncated
+
     def scan_all(self):
         """Perform comprehensive security scan with memory optimization"""
+        if self.execution_mode == 'asyncio':
+            # Not asyncio.run(): it would wait for timed-out worker threads
+            # on shutdown and stretch the scan past its deadline
+            loop = asyncio.new_event_loop()
+            try:
+                return loop.run_until_complete(self.scan_all_async())
+            finally:
+                loop.close()
+        
         try:
-            # Initialize results
+            # Initialize results and take the single target snapshot
             self.results = {}
+            self._snapshot = self.fetch_snapshot()
+            return self._collect_results()
             
-            # Perform scans one by one and clean up memory
-            ssl_results = self.check_ssl_certificate()
-            self.results.update(ssl_results)
-            del ssl_results
-            gc.collect()
+        except Exception as e:
+            logging.error(f"Security scan error for {self.url}: {str(e)}")
+            return self._error_results(e)
+        finally:
+            self._release()
+    
+    async def scan_all_async(self, deadline=None):
+        """Perform the scan on the event loop, running network checks concurrently
+        
+        The target fetch and the TLS certificate handshake run in parallel and
+        share one per-scan deadline. Checks that did not finish in time are
+        reported as errors and the result is flagged with scan_incomplete.
+        """
+        deadline = self.scan_deadline if deadline is None else deadline
+        try:
+            self.results = {}
             
-            header_results = self.check_security_headers()
-            self.results.update(header_results)
-            del header_results
-            gc.collect()
+            # The worker threads inherit the deadline, so their requests and
+            # handshakes are cut off with the scan instead of running on
+            with deadline_scope(deadline):
+                tasks = {'snapshot': asyncio.ensure_future(self._to_thread(self.fetch_snapshot))}
+                if self.parsed_url.scheme == 'https':
+                    tasks['certificate'] = asyncio.ensure_future(
+                        self._to_thread(self.fetch_certificate_details)
+                    )
             
-            cms_results = self.detect_cms()
-            self.results.update(cms_results)
-            del cms_results
-            gc.collect()
+            done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+            for task in pending:
+                task.cancel()
             
-            performance_results = self.check_performance()
-            self.results.update(performance_results)
-            del performance_results
-            gc.collect()
+            snapshot_task = tasks['snapshot']
+            if snapshot_task in done and snapshot_task.exception() is None:
+                self._snapshot = snapshot_task.result()
+            else:
+                self._snapshot = TargetSnapshot(url=self.url, error='Scan deadline exceeded')
             
-            # Calculate overall security score
-            self.results['security_score'] = self.calculate_security_score()
-            self.results['grade'] = self.get_security_grade(self.results['security_score'])
+            certificate_task = tasks.get('certificate')
+            if certificate_task is not None:
+                if certificate_task in done and certificate_task.exception() is None:
+                    self._certificate = certificate_task.result()
+                else:
+                    self._certificate = {'ssl_issuer': 'Unknown', 'ssl_expiry': None}
             
-            return self.results
+            # Remaining checks only read the snapshot; keep HTML parsing off the loop
+            results = await self._to_thread(self._collect_results)
+            if pending:
+                results['scan_incomplete'] = True
+                results['scan_deadline'] = deadline
+            return results
             
         except Exception as e:
             logging.error(f"Security scan error for {self.url}: {str(e)}")
-            return {
-                'error': str(e),
-                'security_score': 0,
-                'grade': 'F',
-                'ssl_valid': False,
-                'has_hsts': False,
-                'has_csp': False,
-                'has_xframe': False,
-                'has_xss_protection': False,
-                'has_content_type': False,
-                'cms_detected': 'Unknown',
-                'response_time': 0,
-                'status_code': 0
-            }
+            return self._error_results(e)
         finally:
-            # Clean up session
-            if hasattr(self, 'session'):
-                self.session.close()
-            gc.collect()
+            self._release()
+
+    def scan_all_coalesced(self):
+        """scan_all(), shared with identical scans of this target already in progress"""
+        return inflight.coalesce(
+            inflight.scan_key(self.url, 'basic'), self.scan_all,
+            url=self.url, profile='basic', lease=self.scan_deadline + 60, decode=self.decode_results,
+            reuse_finished=not self.force_refresh,
+        )
+
+    async def scan_all_coalesced_async(self):
+        """scan_all_async(), shared with identical scans of this target already in progress"""
+        return await inflight.acoalesce(
+            inflight.scan_key(self.url, 'basic'), self.scan_all_async,
+            url=self.url, profile='basic', lease=self.scan_deadline + 60, decode=self.decode_results,
+            reuse_finished=not self.force_refresh,
+        )
+
+    def scan_all_cached(self):
+        """Recent results for this target from the scan cache, else a (coalesced) scan
+
+        The results carry a 'cache' entry saying whether they were served
+        from the cache and how old they are.
+        """
+        results, status = CacheManager.get_or_compute(
+            'scan_results', self.scan_all_coalesced, inflight.normalize_target(self.url), 'basic',
+            force_refresh=self.force_refresh, cacheable=self.is_cacheable,
+        )
+        return dict(self.decode_results(results), cache=status)
+
+    async def scan_all_cached_async(self):
+        """scan_all_cached() for the event loop"""
+        key = (inflight.normalize_target(self.url), 'basic')
+        if not self.force_refresh:
+            hit = await sync_to_async(CacheManager.lookup)('scan_results', *key)
+            if hit is not None:
+                results, status = hit
+                return dict(self.decode_results(results), cache=status)
+        results = await self.scan_all_coalesced_async()
+        status = await sync_to_async(CacheManager.store)(
+            'scan_results', results, *key, force_refresh=self.force_refresh, cacheable=self.is_cacheable,
+        )
+        return dict(results, cache=status)
+
+    @staticmethod
+    def is_cacheable(results):
+        """Failed or cut-short scans are not served to later requests"""
+        return 'error' not in results and not results.get('scan_incomplete')
+
+    @staticmethod
+    def decode_results(results):
+        """Restore the certificate expiry of results shared as JSON"""
+        if isinstance(results.get('ssl_expiry'), str):
+            results['ssl_expiry'] = parse_datetime(results['ssl_expiry'])
+        return results
+
+    def _collect_results(self):
+        """Run every check against the current snapshot and score the result"""
+        self.results.update(self.check_ssl_certificate())
+        self.results.update(self.check_security_headers())
+        self.results.update(self.detect_cms())
+        self.results.update(self.check_performance())
+        
+        # Calculate overall security score
+        score, grade = self.calculate_security_score()
+        self.results['security_score'] = score
+        self.results['grade'] = grade
+        
+        return self.results
+    
+    def _error_results(self, error):
+        return {
+            'error': str(error),
+            'security_score': 0,
+            'grade': 'F',
+            'ssl_valid': False,
+            'has_hsts': False,
+            'has_csp': False,
+            'has_xframe': False,
+            'has_xss_protection': False,
+            'has_content_type': False,
+            'cms_detected': 'Unknown',
+            'response_time': 0,
+            'status_code': 0
+        }
+    
+    async def _to_thread(self, func):
+        """asyncio.to_thread(func), keeping the session open until func returns
+
+        Cancelling the awaiting task does not stop the thread, so a check
+        that missed the scan deadline still holds the session; _release()
+        leaves closing it to the last such thread.
+        """
+        def run():
+            try:
+                return func()
+            finally:
+                with self._threads_lock:
+                    self._threads -= 1
+                    close = self._released and not self._threads
+                if close:
+                    self.session.close()
+
+        with self._threads_lock:
+            self._threads += 1
+        return await asyncio.to_thread(run)
+
+    def _release(self):
+        """Clean up session and the snapshot body"""
+        with self._threads_lock:
+            self._released = True
+            close = not self._threads
+        if close:
+            self.session.close()
+        self._snapshot = None
+        self._certificate = None
+        gc.collect()
+    
+    def fetch_certificate_details(self):
+        """Issuer and expiry of the target certificate, cached per host:port for the ssl_check TTL"""
+        details, status = CacheManager.get_or_compute(
+            'ssl_check', self._read_certificate_details,
+            self.parsed_url.hostname, self.parsed_url.port or 443, 'certificate',
+            force_refresh=self.force_refresh, cacheable=lambda d: d['ssl_expiry'] is not None,
+        )
+        return dict(self.decode_results(dict(details)), ssl_cache=status['status'])
+
+    def _read_certificate_details(self):
+        """Fetch issuer and expiry from the target certificate"""
+        details = {'ssl_issuer': 'Unknown', 'ssl_expiry': None}
+        try:
+            # Shared handshake cache: one handshake per host:port per scan window
+            cert = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443, timeout=self.timeout).certificate
+        except Exception:
+            return details
+        if cert is None:
+            return details
+        
+        # Safely extract issuer information
+        try:
+            if cert.issuer:
+                details['ssl_issuer'] = cert.issuer.rfc4514_string()
+        except Exception:
+            pass
+        
+        # Safely extract expiry date
+        try:
+            details['ssl_expiry'] = cert.not_valid_after
+        except Exception:
+            pass
+        
+        return details
     
     def check_ssl_certificate(self):
         """Check SSL certificate validity and details"""
         try:
             if self.parsed_url.scheme == 'https':
-                # Test SSL connection with simple method first
-                try:
-                    response = self.session.get(self.url, verify=True, timeout=10)
-                    ssl_valid = True
-                    ssl_grade = 'A'  # Default good grade for valid SSL
-                except requests.exceptions.SSLError:
-                    ssl_valid = False
-                    ssl_grade = 'F'
-                except:
-                    ssl_valid = False
-                    ssl_grade = 'F'
+                # Certificate verification result comes from the snapshot fetch
+                ssl_valid = self.snapshot.ssl_verified
+                ssl_grade = 'A' if ssl_valid else 'F'
                 
-                # Try to get detailed certificate info
-                try:
-                    cert_pem = ssl.get_server_certificate((self.domain, 443))
-                    cert_der = ssl.PEM_cert_to_DER_cert(cert_pem)
-                    cert = x509.load_der_x509_certificate(cert_der, default_backend())
-                    
-                    # Safely extract issuer information
-                    issuer = 'Unknown'
-                    try:
-                        if cert.issuer:
-                            issuer = cert.issuer.rfc4514_string()
-                    except:
-                        issuer = 'Unknown'
-                    
-                    # Safely extract expiry date
-                    expiry = None
-                    try:
-                        expiry = cert.not_valid_after
-                    except:
-                        expiry = None
-                    
-                    return {
-                        'ssl_valid': ssl_valid,
-                        'ssl_issuer': issuer,
-                        'ssl_expiry': expiry,
-                        'ssl_grade': ssl_grade
-                    }
-                except:
-                    # Fallback to basic SSL check
-                    return {
-                        'ssl_valid': ssl_valid,
-                        'ssl_issuer': 'Unknown',
-                        'ssl_expiry': None,
-                        'ssl_grade': ssl_grade
-                    }
+                # Certificate details may already have been fetched concurrently
+                if self._certificate is None:
+                    self._certificate = self.fetch_certificate_details()
+                
+                return {
+                    'ssl_valid': ssl_valid,
+                    'ssl_issuer': self._certificate['ssl_issuer'],
+                    'ssl_expiry': self._certificate['ssl_expiry'],
+                    'ssl_grade': ssl_grade,
+                    'ssl_cache': self._certificate.get('ssl_cache'),
+                }
             else:
                 return {
                     'ssl_valid': False,
@@ -171,26 +430,26 @@ class SecurityScanner:
     
     def check_security_headers(self):
         """Check HTTP security headers"""
-        try:
-            response = self.session.get(self.url)
-            headers = response.headers
-            
-            return {
-                'has_hsts': 'Strict-Transport-Security' in headers,
-                'has_csp': 'Content-Security-Policy' in headers,
-                'has_xframe': 'X-Frame-Options' in headers,
-                'has_xss_protection': 'X-XSS-Protection' in headers,
-                'has_content_type': 'X-Content-Type-Options' in headers
-            }
-        except Exception as e:
+        snapshot = self.snapshot
+        if not snapshot.ok:
             return {
                 'has_hsts': False,
                 'has_csp': False,
                 'has_xframe': False,
                 'has_xss_protection': False,
                 'has_content_type': False,
-                'headers_error': str(e)
+                'headers_error': snapshot.error
             }
+        
+        headers = snapshot.headers
+        return {
+            'has_hsts': 'Strict-Transport-Security' in headers,
+            'has_csp': 'Content-Security-Policy' in headers,
+            'has_xframe': 'X-Frame-Options' in headers,
+            'has_xss_protection': 'X-XSS-Protection' in headers,
+            'has_content_type': 'X-Content-Type-Options' in headers,
+            'server_info': headers.get('Server', 'Unknown')
+        }
     
     def _calculate_ssl_grade(self, cert):
         """Calculate SSL grade based on certificate"""
@@ -214,34 +473,32 @@ class SecurityScanner:
         """Check SSL certificate validity and details"""
         try:
             if self.parsed_url.scheme == 'https':
-                context = ssl.create_default_context()
-                with socket.create_connection((self.domain, 443), timeout=10) as sock:
-                    with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
-                        cert = ssock.getpeercert()
-                        
-                        self.results['ssl_valid'] = True
-                        issuer_info = cert.get('issuer', [{}])
-                        if issuer_info and len(issuer_info) > 0:
-                            self.results['ssl_issuer'] = issuer_info[0].get('organizationName', 'Unknown')
-                        else:
-                            self.results['ssl_issuer'] = 'Unknown'
-                        
-                        # Parse expiry date
-                        expiry_str = cert.get('notAfter')
-                        if expiry_str:
-                            expiry_date = datetime.strptime(expiry_str, '%b %d %H:%M:%S %Y %Z')
-                            self.results['ssl_expiry'] = expiry_date
-                            
-                            # Calculate days until expiry
-                            days_left = (expiry_date - datetime.now()).days
-                            if days_left > 30:
-                                self.results['ssl_grade'] = 'A'
-                            elif days_left > 7:
-                                self.results['ssl_grade'] = 'B'
-                            else:
-                                self.results['ssl_grade'] = 'C'
-                        else:
-                            self.results['ssl_grade'] = 'F'
+                tls = probe_tls(self.parsed_url.hostname, self.parsed_url.port or 443).require_verified()
+                cert = tls.peer_cert
+                
+                self.results['ssl_valid'] = True
+                issuer_info = cert.get('issuer', [{}])
+                if issuer_info and len(issuer_info) > 0:
+                    self.results['ssl_issuer'] = issuer_info[0].get('organizationName', 'Unknown')
+                else:
+                    self.results['ssl_issuer'] = 'Unknown'
+                
+                # Parse expiry date
+                expiry_str = cert.get('notAfter')
+                if expiry_str:
+                    expiry_date = datetime.strptime(expiry_str, '%b %d %H:%M:%S %Y %Z')
+                    self.results['ssl_expiry'] = expiry_date
+                    
+                    # Calculate days until expiry
+                    days_left = (expiry_date - datetime.now()).days
+                    if days_left > 30:
+                        self.results['ssl_grade'] = 'A'
+                    elif days_left > 7:
+                        self.results['ssl_grade'] = 'B'
+                    else:
+                        self.results['ssl_grade'] = 'C'
+                else:
+                    self.results['ssl_grade'] = 'F'
             else:
                 self.results['ssl_valid'] = False
                 self.results['ssl_grade'] = 'F'
@@ -253,92 +510,61 @@ class SecurityScanner:
     
     def check_headers(self):
         """Check HTTP security headers"""
+        snapshot = self.snapshot
+        if not snapshot.ok:
+            self.results['headers_error'] = snapshot.error
+            return
+        
+        headers = snapshot.headers
+        
+        # Check security headers
+        self.results['has_hsts'] = 'strict-transport-security' in headers
+        self.results['has_csp'] = 'content-security-policy' in headers
+        self.results['has_xframe'] = 'x-frame-options' in headers
+        self.results['has_xss_protection'] = 'x-xss-protection' in headers
+        self.results['has_content_type'] = 'x-content-type-options' in headers
+        
+        # Server information
+        self.results['server_info'] = headers.get('server', 'Unknown')
+    
+    def detect_cms(self):
+        """Detect CMS and technologies"""
+        cms_results = {'cms_detected': 'Unknown'}
         try:
-            response = requests.get(self.url, timeout=10, allow_redirects=True)
-            headers = response.headers
+            snapshot = self.snapshot
+            if not snapshot.ok:
+                cms_results['cms_error'] = snapshot.error
+                return cms_results
             
-            # Check security headers
-            self.results['has_hsts'] = 'strict-transport-security' in headers
-            self.results['has_csp'] = 'content-security-policy' in headers
-            self.results['has_xframe'] = 'x-frame-options' in headers
-            self.results['has_xss_protection'] = 'x-xss-protection' in headers
-            self.results['has_content_type'] = 'x-content-type-options' in headers
+            content = snapshot.text
             
-            # Server information
-            self.results['server_info'] = headers.get('server', 'Unknown')
+            matches = signatures.match(content, snapshot.headers)
+            detected_cms = matches.names('cms')
             
-            # Store response for further analysis
-            self.response = response
+            cms_results['cms_detected'] = ', '.join(detected_cms) if detected_cms else 'Unknown'
+            
+            # Try to detect version from generator meta tag
+            generator = signatures.generator_meta(content)
+            if generator is not None:
+                cms_results['cms_version'] = generator
             
         except Exception as e:
-            self.results['headers_error'] = str(e)
-    
-    def detect_cms(self):
-        """Detect CMS and technologies"""
-        try:
-            if hasattr(self, 'response'):
-                content = self.response.text
-                headers = self.response.headers
-                
-                cms_signatures = {
-                    'WordPress': [
-                        r'wp-content',
-                        r'wp-includes',
-                        r'wordpress',
-                        r'wp-json'
-                    ],
-                    'Drupal': [
-                        r'drupal',
-                        r'sites/default',
-                        r'misc/drupal.js'
-                    ],
-                    'Joomla': [
-                        r'joomla',
-                        r'administrator/index.php',
-                        r'media/system/js'
-                    ],
-                    'Magento': [
-                        r'magento',
-                        r'skin/frontend',
-                        r'js/mage'
-                    ],
-                    'Shopify': [
-                        r'shopify',
-                        r'cdn.shopify.com',
-                        r'assets/shopify'
-                    ]
-                }
-                
-                detected_cms = []
-                for cms, patterns in cms_signatures.items():
-                    for pattern in patterns:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            detected_cms.append(cms)
-                            break
-                
-                self.results['cms_detected'] = ', '.join(detected_cms) if detected_cms else 'Unknown'
-                
-                # Try to detect version from generator meta tag
-                soup = BeautifulSoup(content, 'html.parser')
-                generator = soup.find('meta', {'name': 'generator'})
-                if generator:
-                    self.results['cms_version'] = generator.get('content', '')
-                
-        except Exception as e:
-            self.results['cms_error'] = str(e)
+            cms_results['cms_error'] = str(e)
+        
+        return cms_results
     
     def check_performance(self):
         """Check response time and status"""
-        try:
-            start_time = time.time()
-            response = requests.get(self.url, timeout=10)
-            end_time = time.time()
-            
-            self.results['response_time'] = round((end_time - start_time) * 1000, 2)  # in milliseconds
-            self.results['status_code'] = response.status_code
-            
-        except Exception as e:
-            self.results['performance_error'] = str(e)
+        snapshot = self.snapshot
+        if not snapshot.ok:
+            return {'performance_error': snapshot.error}
+        
+        return {
+            'response_time': snapshot.response_time,
+            'status_code': snapshot.status_code,
+            'final_url': snapshot.final_url,
+            'redirect_chain': snapshot.redirect_chain
+        }
     
     def calculate_security_score(self, results=None):
         """Calculate overall security score with improved algorithm"""
@@ -455,7 +681,7 @@ class HaveIBeenPwnedChecker:
                 'hibp-api-key': api_key
             }
             
-            response = requests.get(f"{self.api_url}{email}", headers=headers, timeout=10)
+            response = http_client.get(f"{self.api_url}{email}", headers=headers, timeout=10)
             
             if response.status_code == 200:
                 breaches = response.json()
@@ -8,7 +8,7 @@ import time
 from datetime import datetime
 import logging
 
-from .models import SecurityScan, DataBreachCheck
+from .models import SecurityScan, DataBreachCheck, AdvancedSecurityScan
 from .utils import SecurityScanner
 try:
     from .utils import HaveIBeenPwnedChecker
@@ -81,31 +81,15 @@ def scan_website(request):
             print(f"DEBUG: Starting scan for URL: {url}")  # Debug logging
             
             # Perform security scan
-            scanner = SecurityScanner(url)
-            results = scanner.scan_all()
+            # Recent results for the same target are served from the scan cache
+            scanner = SecurityScanner(url, force_refresh=request.POST.get('force_refresh') in ('1', 'true', 'on'))
+            results = scanner.scan_all_cached()
             
             print(f"DEBUG: Scan results: {results}")  # Debug logging
             
             # Save to database
-            scan = SecurityScan.objects.create(
-                url=url,
-                ssl_valid=results.get('ssl_valid', False),
-                ssl_issuer=results.get('ssl_issuer', ''),
-                ssl_expiry=results.get('ssl_expiry'),
-                ssl_grade=results.get('ssl_grade', 'F'),
-                has_hsts=results.get('has_hsts', False),
-                has_csp=results.get('has_csp', False),
-                has_xframe=results.get('has_xframe', False),
-                has_xss_protection=results.get('has_xss_protection', False),
-                has_content_type=results.get('has_content_type', False),
-                cms_detected=results.get('cms_detected', ''),
-                cms_version=results.get('cms_version', ''),
-                response_time=results.get('response_time'),
-                status_code=results.get('status_code'),
-                security_score=results.get('security_score', 0),
-                grade=results.get('grade', 'F'),
-                server_info=results.get('server_info', ''),
-            )
+            scan = SecurityScan.from_results(url, results)
+            scan.save()
             
             print(f"DEBUG: Scan saved with ID: {scan.id}")  # Debug logging
             
@@ -135,8 +119,8 @@ def api_scan(request):
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            scanner = SecurityScanner(url)
-            results = scanner.scan_all()
+            scanner = SecurityScanner(url, force_refresh=bool(data.get('force_refresh')))
+            results = scanner.scan_all_cached()
             
             return JsonResponse(results)
             
@@ -145,6 +129,40 @@ def api_scan(request):
     
     return JsonResponse({'error': 'Only POST method allowed'}, status=405)
 
+async def api_scan_async(request):
+    """Async API endpoint for website scanning
+    
+    Under ASGI the scan is awaited on the event loop, so a slow target does
+    not hold a worker thread while its checks run. Served through WSGI (the
+    Procfile's gunicorn Ztionsec.wsgi) Django runs it with async_to_sync in
+    the request's worker, which works but is no more concurrent than
+    api_scan; see DEPLOYMENT.md for serving Ztionsec.asgi.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            url = data.get('url')
+            
+            if not url:
+                return JsonResponse({'error': 'URL is required'}, status=400)
+            
+            # Ensure URL has protocol
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            
+            scanner = SecurityScanner(url, execution_mode='asyncio', force_refresh=bool(data.get('force_refresh')))
+            results = await scanner.scan_all_cached_async()
+            
+            return JsonResponse(results)
+            
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    
+    return JsonResponse({'error': 'Only POST method allowed'}, status=405)
+
+# csrf_exempt only learns to wrap coroutine views in Django 5.0
+api_scan_async.csrf_exempt = True
+
 def check_breach(request):
     """Check email for data breaches"""
     if request.method == 'POST':
@@ -273,6 +291,26 @@ def budget_scanner(request):
     # Get some sample recent scans for display
     recent_scans = []  # Placeholder for now
     
+    # A queued scan's results move into the session once its job has finished
+    budget_job = None
+    job_id = request.session.get('budget_scan_job')
+    if job_id:
+        budget_job = AdvancedSecurityScan.objects.filter(id=job_id, scan_type='budget').first()
+        if budget_job is None or not budget_job.is_pending:
+            del request.session['budget_scan_job']
+        if budget_job is not None and budget_job.status == 'failed':
+            messages.error(request, f'Error during budget scan: {budget_job.last_error}')
+        elif budget_job is not None and not budget_job.is_pending:
+            results = budget_job.webapp_scan_results
+            request.session['budget_scan_results'] = results
+            total = results.get('total_findings', 0)
+            if results.get('host_status') == 'unresponsive':
+                messages.warning(request, f"{results.get('target_url')} stopped responding; the scan was cut short.")
+            elif results.get('scan_incomplete'):
+                messages.warning(request, f'Budget scan reached its time limit; showing the {total} findings collected so far.')
+            else:
+                messages.success(request, f'Budget scan completed! Found {total} potential P4 vulnerabilities.')
+    
     # Check if there are scan results to display
     results = request.session.get('budget_scan_results')
     
@@ -281,11 +319,12 @@ def budget_scanner(request):
     
     return render(request, 'scanner/budget_scanner.html', {
         'recent_scans': recent_scans,
-        'scan_results': results
+        'scan_results': results,
+        'budget_job': budget_job if budget_job is not None and budget_job.is_pending else None
     })
 
 def budget_scan(request):
-    """Perform budget security scan"""
+    """Queue a budget security scan; the budget scanner page shows it when done"""
     if request.method == 'GET':
         # If someone accesses /budget-scan/ directly, redirect to budget scanner
         return redirect('budget_scanner')
@@ -294,8 +333,6 @@ def budget_scan(request):
         target_url = request.POST.get('target_url')
         scan_types = request.POST.getlist('scan_types') or ['info_disclosure']
         
-        print(f"Budget scan request: URL={target_url}, Types={scan_types}")  # Debug
-        
         if not target_url:
             messages.error(request, 'Please provide a valid URL')
             return redirect('budget_scanner')
@@ -309,50 +346,17 @@ def budget_scan(request):
             if 'budget_scan_results' in request.session:
                 del request.session['budget_scan_results']
             
-            print(f"Starting budget scan for: {target_url}")  # Debug
-            
-            # Import the proper budget scanner
-            from .budget_scanner import BudgetSecurityScanner, generate_budget_report
-            
-            # Use the specialized budget scanner for P4 vulnerabilities
-            budget_scanner = BudgetSecurityScanner(target_url)
-            budget_findings = budget_scanner.scan_all_budget_issues()
-            
-            print(f"Budget scanner found {len(budget_findings)} findings")  # Debug
-            
-            # Convert BudgetFinding objects to dictionaries for template rendering
-            findings = []
-            for finding in budget_findings:
-                findings.append({
-                    'severity': finding.severity,
-                    'category': finding.category.replace('_', ' ').title(),
-                    'title': finding.title,
-                    'description': finding.description,
-                    'recommendation': finding.recommendation,
-                    'proof_of_concept': finding.proof_of_concept,
-                    'bounty_potential': finding.bounty_potential,
-                    'difficulty': finding.difficulty
-                })
-            
-            # Generate comprehensive budget report
-            budget_report = generate_budget_report(budget_findings)
-            
-            print(f"Generated {len(findings)} findings with report: {budget_report}")  # Debug
-            
-            # Store results in session for display
-            request.session['budget_scan_results'] = {
-                'target_url': target_url,
-                'findings': findings,
-                'scan_time': datetime.now().isoformat(),
-                'total_findings': len(findings),
-                'scan_types': scan_types,
-                'report': budget_report
-            }
-            
-            print("Results stored in session, redirecting to budget_scanner with results")  # Debug
+            # Run by `manage.py scan_worker`; the page polls until the job is done
+            from .job_queue import enqueue
+            job = enqueue(target_url, scan_type='budget', scan_types=scan_types,
+                          force_refresh=request.POST.get('force_refresh') in ('1', 'true', 'on'))
+            request.session['budget_scan_job'] = job.id
             
-            messages.success(request, f'Budget scan completed! Found {len(findings)} potential P4 vulnerabilities.')
-            # Redirect to budget scanner with results flag
+            if job.cache_status['status'] == 'hit':
+                messages.info(request, f'Showing the budget scan of {target_url} from '
+                                       f"{job.cache_status['age'] // 60} minutes ago.")
+            elif job.is_pending:
+                messages.info(request, f'Budget scan of {target_url} queued (job #{job.id}).')
             return redirect('budget_scanner')
             
         except Exception as e:
@@ -471,12 +475,19 @@ def breach_check_page(request):
 def cve_database(request):
     """CVE database page"""
     from .models import VulnerabilityDatabase
+    from .search import search
     
-    # Get recent CVEs
-    recent_cves = VulnerabilityDatabase.objects.all()[:20]
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        # Best matches first
+        recent_cves = search(VulnerabilityDatabase.objects.all(), search_query)[:20]
+    else:
+        # Get recent CVEs
+        recent_cves = VulnerabilityDatabase.objects.all()[:20]
     
     context = {
         'recent_cves': recent_cves,
+        'search_query': search_query,
         'total_cves': VulnerabilityDatabase.objects.count(),
     }
     return render(request, 'scanner/cve_database.html', context)
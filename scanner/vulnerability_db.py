@@ -6,12 +6,48 @@ Integrates with multiple open-source vulnerability databases for accurate threat
 import requests
 import json
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-import sqlite3
+import codecs
+import gzip
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass
 
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import http_client
+from .models import CPEMatch, NVDFeed, VulnerabilityDatabase
+from .ttl_cache import TTLCache
+
+# Optional: C-accelerated streaming JSON parser for the NVD feeds
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+NVD_IMPORT_BATCH_SIZE = 1000
+FEED_READ_SIZE = 1024 * 1024
+QUERY_CHUNK_SIZE = 500  # ids per IN (...) query
+
+DEFAULTS = {
+    'REFRESH_AFTER': 7 * 24 * 3600,  # seconds before a CVE fetched from the API is fetched again
+    'FETCH_TIMEOUT': 10,  # seconds per NVD API request
+}
+
+
+def get_setting(name: str) -> Any:
+    from django.conf import settings
+    return getattr(settings, 'CVE_STORE', {}).get(name, DEFAULTS[name])
+
+
 @dataclass
 class Vulnerability:
     cve_id: str
@@ -23,197 +59,562 @@ class Vulnerability:
     affected_products: List[str]
     references: List[str]
 
-class VulnerabilityDatabase:
-    def __init__(self):
-        self.db_path = 'vulnerability_cache.db'
-        self.init_database()
-        
-    def init_database(self):
-        """Initialize local vulnerability cache database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vulnerabilities (
-                cve_id TEXT PRIMARY KEY,
-                cvss_score REAL,
-                severity TEXT,
-                description TEXT,
-                published_date TEXT,
-                modified_date TEXT,
-                affected_products TEXT,
-                "references" TEXT,
-                cached_date TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exploit_db (
-                edb_id TEXT PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                date_published TEXT,
-                author TEXT,
-                type TEXT,
-                platform TEXT,
-                port INTEGER,
-                verified BOOLEAN
+def open_feed(path: str):
+    """Open an NVD feed file as bytes, gunzipping .gz files on the fly"""
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def feed_timestamp(path: str) -> str:
+    """The feed's generation timestamp, read from its header"""
+    with open_feed(path) as f:
+        head = f.read(4096).decode('utf-8', errors='replace')
+    match = re.search(r'"timestamp"\s*:\s*"([^"]+)"', head)
+    return match.group(1) if match else ''
+
+
+def iter_nvd_feed(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the 'cve' objects of an NVD 2.0 JSON feed one at a time
+
+    The feed is parsed incrementally (with ijson when installed), so a
+    year feed never has to fit in memory as a whole.
+    """
+    with open_feed(path) as f:
+        if HAS_IJSON:
+            items = ijson.items(f, 'vulnerabilities.item', use_float=True)
+        else:
+            items = _stream_json_array(f, 'vulnerabilities')
+        for item in items:
+            if 'cve' in item:
+                yield item['cve']
+
+
+def _stream_json_array(f, key: str) -> Iterator[Any]:
+    """Minimal incremental parser: the elements of the top-level array under key"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(FEED_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    # Find the opening bracket of the array
+    marker = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = marker.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if eof:
+            return
+        fill()
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                return
+            fill()
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element runs past the buffered text: read on and retry
+            if eof:
+                raise
+            fill()
+            continue
+        pos = end
+        yield item
+
+
+def _cvss(metrics: Dict[str, Any]) -> Tuple[float, str]:
+    """Base score and severity, preferring CVSS v3.1, then v3.0, then v2"""
+    for key in ('cvssMetricV31', 'cvssMetricV30', 'cvssMetricV2'):
+        entries = metrics.get(key) or []
+        # The NVD's own (Primary) score wins over CNA-supplied ones
+        entries = sorted(entries, key=lambda m: m.get('type') != 'Primary')
+        if entries:
+            data = entries[0].get('cvssData', {})
+            score = float(data.get('baseScore', 0.0))
+            severity = data.get('baseSeverity') or entries[0].get('baseSeverity') or ''
+            if not severity:
+                severity = 'high' if score >= 7.0 else 'medium' if score >= 4.0 else 'low'
+            return score, severity.lower()
+    return 0.0, 'unknown'
+
+
+def parse_nvd_cve(cve: Dict[str, Any]) -> Vulnerability:
+    """Vulnerability from an NVD 2.0 'cve' object (API 2.0 and JSON 2.0 feeds)"""
+    description = next(
+        (d.get('value', '') for d in cve.get('descriptions', []) if d.get('lang') == 'en'), ''
+    )
+    cvss_score, severity = _cvss(cve.get('metrics', {}))
+
+    affected_products = []
+    for configuration in cve.get('configurations', []):
+        for node in configuration.get('nodes', []):
+            for cpe_match in node.get('cpeMatch', []):
+                if cpe_match.get('vulnerable') and cpe_match.get('criteria'):
+                    affected_products.append(cpe_match['criteria'])
+
+    return Vulnerability(
+        cve_id=cve.get('id', ''),
+        cvss_score=cvss_score,
+        severity=severity,
+        description=description,
+        published_date=cve.get('published', ''),
+        modified_date=cve.get('lastModified', ''),
+        affected_products=affected_products,
+        references=[ref.get('url', '') for ref in cve.get('references', [])],
+    )
+
+
+# Detected technology name -> (CPE vendor or None for any, CPE product)
+CPE_PRODUCTS = {
+    'apache': ('apache', 'http_server'),
+    'asp.net': ('microsoft', 'asp.net'),
+    'bootstrap': ('getbootstrap', 'bootstrap'),
+    'django': ('djangoproject', 'django'),
+    'drupal': ('drupal', 'drupal'),
+    'flask': ('palletsprojects', 'flask'),
+    'iis': ('microsoft', 'internet_information_services'),
+    'joomla': ('joomla', 'joomla\\!'),
+    'jquery': ('jquery', 'jquery'),
+    'laravel': ('laravel', 'framework'),
+    'magento': (None, 'magento'),
+    'nginx': (None, 'nginx'),
+    'node.js': ('nodejs', 'node.js'),
+    'php': ('php', 'php'),
+    'prestashop': ('prestashop', 'prestashop'),
+    'react': ('facebook', 'react'),
+    'vue.js': ('vuejs', 'vue.js'),
+    'wordpress': ('wordpress', 'wordpress'),
+}
+
+CPE_RANGE_FIELDS = ('versionStartIncluding', 'versionStartExcluding', 'versionEndIncluding', 'versionEndExcluding')
+ANY_VERSION = ('*', '-', '')
+
+
+def cpe_product(name: str) -> Tuple[Optional[str], str]:
+    """(vendor, product) to look a detected technology up under"""
+    name = name.strip().lower()
+    return CPE_PRODUCTS.get(name, (None, name.replace(' ', '_')))
+
+
+def split_cpe(criteria: str) -> List[str]:
+    """Fields of a CPE 2.3 formatted string (colons inside fields are escaped)"""
+    return re.split(r'(?<!\\):', criteria)
+
+
+def cpe_rows(cve_id: str, matches: List[Dict[str, Any]]) -> List[Tuple]:
+    """cpe_match rows for a CVE's vulnerable configurations"""
+    rows = []
+    for match in matches:
+        fields = split_cpe(match.get('criteria', ''))
+        if len(fields) < 6 or fields[0] != 'cpe':
+            continue
+        rows.append((
+            cve_id, fields[2], fields[3].lower(), fields[4].lower(), fields[5],
+            *(match.get(key) or '' for key in CPE_RANGE_FIELDS)
+        ))
+    return rows
+
+
+def nvd_cpe_matches(cve: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Vulnerable cpeMatch entries of an NVD 2.0 'cve' object"""
+    return [
+        cpe_match
+        for configuration in cve.get('configurations', [])
+        for node in configuration.get('nodes', [])
+        for cpe_match in node.get('cpeMatch', [])
+        if cpe_match.get('vulnerable') and cpe_match.get('criteria')
+    ]
+
+
+PRE_RELEASE_TAGS = {'dev', 'a', 'alpha', 'b', 'beta', 'c', 'pre', 'preview', 'rc'}
+RELEASE_END = (1, -1)  # after pre-release tags, before any further number or post-release tag
+
+
+def version_key(version: str) -> Tuple:
+    """Sortable form of a version string
+
+    Numbers compare numerically and trailing zeros are ignored (2.0 == 2.0.0).
+    Pre-release tags sort before the release (2.0rc1 < 2.0) and other
+    letter suffixes after it (1.1.1k > 1.1.1).
+    """
+    key = []
+
+    def strip_zeros():
+        while key and key[-1] == (1, 0):
+            key.pop()
+
+    for part in re.findall(r'\d+|[a-z]+', version.lower()):
+        if part.isdigit():
+            key.append((1, int(part)))
+        else:
+            strip_zeros()
+            key.append((0, part) if part in PRE_RELEASE_TAGS else (2, part))
+    strip_zeros()
+    key.append(RELEASE_END)
+    return tuple(key)
+
+
+class CPEIndex:
+    """In-memory version index over one product's cpe_match rows
+
+    Exact versions are a dict lookup; ranges are kept sorted by their lower
+    bound, so a lookup bisects to the ranges starting at or below the
+    version and only checks their upper bounds.
+    """
+
+    def __init__(self, rows: List[Tuple]):
+        self.size = len(rows)
+        self.exact: Dict[Tuple, List[Tuple[str, str]]] = defaultdict(list)  # version key -> [(cve, vendor)]
+        ranges = []
+        for cve_id, vendor, version, start_incl, start_excl, end_incl, end_excl in rows:
+            if version not in ANY_VERSION:
+                self.exact[version_key(version)].append((cve_id, vendor))
+                continue
+            start = start_incl or start_excl
+            end = end_incl or end_excl
+            ranges.append((
+                version_key(start) if start else (), bool(start_excl),
+                version_key(end) if end else None, bool(end_incl),
+                cve_id, vendor,
+            ))
+        ranges.sort(key=lambda r: r[0])
+        self.ranges = ranges
+        self.starts = [r[0] for r in ranges]
+
+    def lookup(self, version: Optional[str] = None, vendor: Optional[str] = None) -> List[str]:
+        """CVE ids affecting the version (every CVE for the product without one)"""
+        if version is None:
+            hits = [(cve, v) for entries in self.exact.values() for cve, v in entries]
+            hits += [(r[4], r[5]) for r in self.ranges]
+        else:
+            key = version_key(version)
+            hits = list(self.exact.get(key, ()))
+            for start, start_excl, end, end_incl, cve_id, v in self.ranges[:bisect_right(self.starts, key)]:
+                if start_excl and start == key:
+                    continue
+                if end is not None and (key > end or (key == end and not end_incl)):
+                    continue
+                hits.append((cve_id, v))
+        return sorted({cve for cve, v in hits if vendor is None or v == vendor})
+
+
+# product -> CPEIndex; cleared whenever this process writes CVE data
+_cpe_indexes = TTLCache(max_entries=512, default_ttl=3600)
+
+
+@contextmanager
+def write_transaction():
+    """transaction.atomic() that takes SQLite's write lock before anything is read
+
+    CVE writes read the stored lastModified dates first. In WAL mode a
+    transaction that has read cannot start writing once another connection
+    has committed, and fails with 'database is locked' instead of waiting
+    for the lock; a write that does nothing takes the lock up front.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'UPDATE {NVDFeed._meta.db_table} SET id = id WHERE 0')
+        yield
+
+
+def nvd_datetime(value: str) -> Optional[datetime]:
+    """Aware datetime from an NVD timestamp (NVD times are UTC without an offset)"""
+    parsed = parse_datetime(value) if value else None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def fetch_nvd_cves(params: Dict[str, Any], timeout: float = None) -> List[Dict[str, Any]]:
+    """'cve' objects returned by the NVD CVE API 2.0 for the query"""
+    response = http_client.get(NVD_API_URL, params=params, timeout=timeout or get_setting('FETCH_TIMEOUT'))
+    response.raise_for_status()
+    return [item['cve'] for item in response.json().get('vulnerabilities', []) if 'cve' in item]
+
+
+def nvd_record(cve: Dict[str, Any]) -> Tuple[Vulnerability, List[Tuple]]:
+    """(Vulnerability, cpe_match rows) parsed from an NVD 2.0 'cve' object"""
+    vuln = parse_nvd_cve(cve)
+    return vuln, cpe_rows(vuln.cve_id, nvd_cpe_matches(cve))
+
+
+class CVERepository:
+    """The one CVE store, shared by the scanners, the validator and the views
+
+    CVEs live in the VulnerabilityDatabase model and their vulnerable CPE
+    configurations in CPEMatch. Reads go through to the NVD API for CVEs
+    that are missing or stale and store what comes back, so a CVE is
+    fetched and parsed once however many consumers ask for it. Writes are
+    batched and only replace a stored CVE with a newer lastModified.
+    """
+    
+    def get(self, cve_id: str, fetch: bool = True, strict: bool = False) -> Optional[Vulnerability]:
+        """The stored CVE, fetched from the NVD first when missing or stale"""
+        cve_id = cve_id.strip().upper()
+        return self.get_many([cve_id], fetch=fetch, strict=strict).get(cve_id)
+    
+    def get_many(self, cve_ids: List[str], fetch: bool = True, strict: bool = False) -> Dict[str, Vulnerability]:
+        """Stored CVEs by id; missing and stale ones are fetched and stored in one batch
+
+        strict=True raises NVD errors rather than leaving the CVEs out.
+        """
+        cve_ids = list(dict.fromkeys(cve_id.strip().upper() for cve_id in cve_ids if cve_id))
+        stored = {}
+        for i in range(0, len(cve_ids), QUERY_CHUNK_SIZE):
+            stored.update(
+                (obj.cve_id, obj)
+                for obj in VulnerabilityDatabase.objects.filter(cve_id__in=cve_ids[i:i + QUERY_CHUNK_SIZE])
             )
-        ''')
+        found = {cve_id: self._vulnerability(obj) for cve_id, obj in stored.items()}
+        if not fetch:
+            return found
+        
+        fresh_since = self._fresh_since()
+        wanted = [
+            cve_id for cve_id in cve_ids
+            if cve_id not in stored or (fresh_since and stored[cve_id].cached_date < fresh_since)
+        ]
+        if wanted:
+            # A failed refresh leaves the stored copy in place
+            found.update(self.fetch(wanted, strict=strict))
+        return found
+    
+    def fetch(self, cve_ids: List[str], strict: bool = False) -> Dict[str, Vulnerability]:
+        """Fetch CVEs from the NVD API and store them; ids the NVD does not know are left out"""
+        records = []
+        for cve_id in cve_ids:
+            try:
+                records.extend(nvd_record(cve) for cve in fetch_nvd_cves({'cveId': cve_id}))
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    continue  # unknown id, as an empty result
+                if strict:
+                    self.store(records)
+                    raise
+                print(f"Error fetching {cve_id} from NVD: {e}")
+            except (requests.RequestException, ValueError) as e:
+                if strict:
+                    self.store(records)
+                    raise
+                print(f"Error fetching {cve_id} from NVD: {e}")
+        self.store(records)
+        return {vuln.cve_id: vuln for vuln, _ in records}
+    
+    def _fresh_since(self) -> Optional[datetime]:
+        """Records cached before this are refetched; None while a feed import keeps them current"""
+        fresh_since = timezone.now() - timedelta(seconds=get_setting('REFRESH_AFTER'))
+        last_import = NVDFeed.objects.order_by('-imported_date').values_list('imported_date', flat=True).first()
+        if last_import and last_import >= fresh_since:
+            return None
+        return fresh_since
+    
+    def store(self, records: List[Tuple[Vulnerability, List[Tuple]]], force: bool = False,
+              batch_size: int = NVD_IMPORT_BATCH_SIZE) -> int:
+        """Upsert (Vulnerability, cpe_match rows) records; returns how many were written"""
+        written = 0
+        with write_transaction():
+            for i in range(0, len(records), batch_size):
+                written += self._write_records(records[i:i + batch_size], force=force)
+        if written:
+            _cpe_indexes.clear()
+        return written
+    
+    def cache_vulnerability(self, vuln: Vulnerability):
+        """Cache vulnerability data locally"""
+        self.cache_vulnerabilities([vuln])
+    
+    def cache_vulnerabilities(self, vulns: List[Vulnerability]):
+        """Cache several vulnerabilities in one transaction"""
+        self.store([
+            (vuln, cpe_rows(vuln.cve_id, [{'criteria': cpe} for cpe in vuln.affected_products]))
+            for vuln in vulns
+        ])
+    
+    def _write_records(self, records: List[Tuple[Vulnerability, List[Tuple]]], force: bool = False,
+                       cached_date: Optional[datetime] = None) -> int:
+        """Write one batch of records; returns how many were written
+        
+        Records no newer than the stored copy are dropped unless force is set.
+        """
+        cached_date = cached_date or timezone.now()
+        objs = {vuln.cve_id: self._model(vuln, cached_date) for vuln, _ in records}
+        if not force:
+            current = dict(VulnerabilityDatabase.objects.filter(cve_id__in=list(objs)).values_list('cve_id', 'modified_date'))
+            objs = {
+                cve_id: obj for cve_id, obj in objs.items()
+                if cve_id not in current or obj.modified_date > current[cve_id]
+            }
+        if not objs:
+            return 0
+        CPEMatch.objects.filter(vulnerability_id__in=list(objs)).delete()
+        VulnerabilityDatabase.objects.bulk_create(
+            list(objs.values()),
+            update_conflicts=True,
+            unique_fields=['cve_id'],
+            update_fields=['cvss_score', 'severity', 'description', 'published_date', 'modified_date',
+                           'affected_products', 'references', 'cached_date'],
+        )
+        CPEMatch.objects.bulk_create([
+            CPEMatch(vulnerability_id=cve_id, part=part, vendor=vendor, product=product, version=version,
+                     version_start_including=start_incl or '', version_start_excluding=start_excl or '',
+                     version_end_including=end_incl or '', version_end_excluding=end_excl or '')
+            for _, cpes in records
+            for cve_id, part, vendor, product, version, start_incl, start_excl, end_incl, end_excl in cpes
+            if cve_id in objs
+        ])
+        return len(objs)
+    
+    @staticmethod
+    def _model(vuln: Vulnerability, cached_date: datetime) -> VulnerabilityDatabase:
+        return VulnerabilityDatabase(
+            cve_id=vuln.cve_id,
+            cvss_score=vuln.cvss_score or 0.0,
+            severity=vuln.severity,
+            description=vuln.description,
+            published_date=nvd_datetime(vuln.published_date) or cached_date,
+            modified_date=nvd_datetime(vuln.modified_date) or cached_date,
+            affected_products=vuln.affected_products,
+            references=vuln.references,
+            cached_date=cached_date,
+        )
+    
+    @staticmethod
+    def _vulnerability(obj: VulnerabilityDatabase) -> Vulnerability:
+        return Vulnerability(
+            cve_id=obj.cve_id,
+            cvss_score=obj.cvss_score,
+            severity=obj.severity,
+            description=obj.description,
+            published_date=obj.published_date.isoformat(),
+            modified_date=obj.modified_date.isoformat(),
+            affected_products=obj.affected_products or [],
+            references=obj.references or [],
+        )
+    
+    def has_feed_data(self) -> bool:
+        """Whether any NVD feed has been imported into the store"""
+        return NVDFeed.objects.exists()
+    
+    def has_cpe_data(self) -> bool:
+        return CPEMatch.objects.exists()
+    
+    def import_nvd_feed(self, path: str, batch_size: int = NVD_IMPORT_BATCH_SIZE,
+                        force: bool = False) -> Dict[str, Any]:
+        """Load an NVD 2.0 JSON feed (year, 'modified' or 'recent') into the store
+        
+        Each batch is committed on its own, so the database is not locked
+        for the whole file. Records no newer than the stored copy are
+        skipped (unless force is set), so an interrupted import can simply be
+        run again and the 'modified' feed applied repeatedly and in any
+        order; CVEs the feed marks as rejected are removed. The feed is
+        recorded once all of it is in.
+        """
+        stats = {'feed': os.path.basename(path), 'processed': 0, 'upserted': 0, 'rejected': 0}
+        cached_date = timezone.now()
+        
+        records, rejected = [], []
+        
+        def flush():
+            with write_transaction():
+                if records:
+                    stats['upserted'] += self._write_records(records, force=force, cached_date=cached_date)
+                if rejected:
+                    _, deleted = VulnerabilityDatabase.objects.filter(cve_id__in=rejected).delete()
+                    stats['rejected'] += deleted.get(VulnerabilityDatabase._meta.label, 0)
+            records.clear()
+            rejected.clear()
         
-        conn.commit()
-        conn.close()
+        try:
+            for cve in iter_nvd_feed(path):
+                stats['processed'] += 1
+                if cve.get('vulnStatus') == 'Rejected':
+                    rejected.append(cve.get('id', ''))
+                else:
+                    records.append(nvd_record(cve))
+                if len(records) + len(rejected) >= batch_size:
+                    flush()
+            flush()
+        finally:
+            # Batches already committed are visible even if the import failed
+            _cpe_indexes.clear()
+        
+        NVDFeed.objects.update_or_create(feed=stats['feed'], defaults={
+            'feed_timestamp': feed_timestamp(path),
+            'imported_date': cached_date,
+            'cve_count': stats['processed'],
+        })
+        
+        stats['skipped'] = stats['processed'] - stats['upserted'] - stats['rejected']
+        return stats
     
     def search_cve_by_product(self, product: str, version: str = None) -> List[Vulnerability]:
-        """Search CVE database for vulnerabilities affecting specific products"""
-        vulnerabilities = []
+        """Search CVE database for vulnerabilities affecting specific products
+        
+        Once NVD feeds have been imported the search stays local; otherwise
+        the NVD API is searched by keyword and the results are stored.
+        """
+        if self.has_feed_data():
+            return self.search_cached_vulnerabilities(product, version)
         
         try:
-            # NVD API search
-            base_url = "https://services.nvd.nist.gov/rest/json/cves/1.0"
-            params = {
-                'keyword': product,
-                'resultsPerPage': 50
-            }
-            
-            if version:
-                params['keyword'] += f" {version}"
-            
-            response = requests.get(base_url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                for item in data.get('result', {}).get('CVE_Items', []):
-                    cve_data = item.get('cve', {})
-                    impact = item.get('impact', {})
-                    
-                    cve_id = cve_data.get('CVE_data_meta', {}).get('ID', '')
-                    description = ''
-                    
-                    # Extract description
-                    desc_data = cve_data.get('description', {}).get('description_data', [])
-                    if desc_data:
-                        description = desc_data[0].get('value', '')
-                    
-                    # Extract CVSS score
-                    cvss_score = 0.0
-                    severity = 'unknown'
-                    
-                    if 'baseMetricV3' in impact:
-                        cvss_v3 = impact['baseMetricV3']['cvssV3']
-                        cvss_score = cvss_v3.get('baseScore', 0.0)
-                        severity = cvss_v3.get('baseSeverity', 'unknown').lower()
-                    elif 'baseMetricV2' in impact:
-                        cvss_v2 = impact['baseMetricV2']['cvssV2']
-                        cvss_score = cvss_v2.get('baseScore', 0.0)
-                        # Convert CVSS v2 score to severity
-                        if cvss_score >= 7.0:
-                            severity = 'high'
-                        elif cvss_score >= 4.0:
-                            severity = 'medium'
-                        else:
-                            severity = 'low'
-                    
-                    # Extract dates
-                    published_date = item.get('publishedDate', '')
-                    modified_date = item.get('lastModifiedDate', '')
-                    
-                    # Extract affected products
-                    affected_products = []
-                    configurations = item.get('configurations', {}).get('nodes', [])
-                    for config in configurations:
-                        for cpe_match in config.get('cpe_match', []):
-                            cpe_uri = cpe_match.get('cpe23Uri', '')
-                            if cpe_uri:
-                                affected_products.append(cpe_uri)
-                    
-                    # Extract references
-                    references = []
-                    ref_data = cve_data.get('references', {}).get('reference_data', [])
-                    for ref in ref_data:
-                        references.append(ref.get('url', ''))
-                    
-                    vulnerability = Vulnerability(
-                        cve_id=cve_id,
-                        cvss_score=cvss_score,
-                        severity=severity,
-                        description=description,
-                        published_date=published_date,
-                        modified_date=modified_date,
-                        affected_products=affected_products,
-                        references=references
-                    )
-                    
-                    vulnerabilities.append(vulnerability)
-                    
-                    # Cache in local database
-                    self.cache_vulnerability(vulnerability)
-            
+            keyword = f"{product} {version}" if version else product
+            records = [nvd_record(cve) for cve in fetch_nvd_cves({'keywordSearch': keyword, 'resultsPerPage': 50})]
+            # Store the page in one batch
+            self.store(records)
+            return [vuln for vuln, _ in records]
         except Exception as e:
             print(f"Error searching CVE database: {e}")
             # Fallback to cached data
-            vulnerabilities = self.search_cached_vulnerabilities(product, version)
-        
-        return vulnerabilities
+            return self.search_cached_vulnerabilities(product, version)
     
-    def cache_vulnerability(self, vuln: Vulnerability):
-        """Cache vulnerability data locally"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO vulnerabilities 
-            (cve_id, cvss_score, severity, description, published_date, 
-             modified_date, affected_products, "references", cached_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            vuln.cve_id,
-            vuln.cvss_score,
-            vuln.severity,
-            vuln.description,
-            vuln.published_date,
-            vuln.modified_date,
-            json.dumps(vuln.affected_products),
-            json.dumps(vuln.references),
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+    def cpe_index(self, product: str) -> CPEIndex:
+        """Version index over the product's cpe_match rows, built once and kept in memory"""
+        index = _cpe_indexes.get(product)
+        if index is None:
+            index = CPEIndex(list(CPEMatch.objects.filter(product=product).values_list(
+                'vulnerability_id', 'vendor', 'version', 'version_start_including', 'version_start_excluding',
+                'version_end_including', 'version_end_excluding',
+            )))
+            _cpe_indexes.set(product, index)
+        return index
+    
+    def get_vulnerabilities(self, cve_ids: List[str], limit: int = 50) -> List[Vulnerability]:
+        """Stored vulnerabilities by id, highest CVSS score first"""
+        objs = []
+        for i in range(0, len(cve_ids), QUERY_CHUNK_SIZE):
+            objs.extend(VulnerabilityDatabase.objects.filter(cve_id__in=cve_ids[i:i + QUERY_CHUNK_SIZE]))
+        objs.sort(key=lambda obj: obj.cvss_score or 0, reverse=True)
+        return [self._vulnerability(obj) for obj in objs[:limit]]
     
     def search_cached_vulnerabilities(self, product: str, version: str = None) -> List[Vulnerability]:
-        """Search cached vulnerability data"""
-        vulnerabilities = []
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT * FROM vulnerabilities 
-            WHERE affected_products LIKE ? OR description LIKE ?
-            ORDER BY cvss_score DESC
-            LIMIT 50
-        '''
-        
-        search_term = f"%{product}%"
-        cursor.execute(query, (search_term, search_term))
-        
-        for row in cursor.fetchall():
-            vulnerability = Vulnerability(
-                cve_id=row[0],
-                cvss_score=row[1],
-                severity=row[2],
-                description=row[3],
-                published_date=row[4],
-                modified_date=row[5],
-                affected_products=json.loads(row[6]) if row[6] else [],
-                references=json.loads(row[7]) if row[7] else []
-            )
-            vulnerabilities.append(vulnerability)
-        
-        conn.close()
-        return vulnerabilities
+        """Search stored vulnerability data
+        
+        The product is resolved through the CPE match index, so only CVEs
+        whose configurations cover the version are returned. A store without
+        CPE data falls back to a text match.
+        """
+        vendor, name = cpe_product(product)
+        index = self.cpe_index(name)
+        if index.size or self.has_cpe_data():
+            return self.get_vulnerabilities(index.lookup(version, vendor))
+        
+        matches = VulnerabilityDatabase.objects.filter(
+            Q(affected_products__icontains=product) | Q(description__icontains=product)
+        )[:50]
+        return [self._vulnerability(obj) for obj in matches]
     
     def search_exploit_db(self, product: str) -> List[Dict[str, Any]]:
         """Search Exploit Database for available exploits"""
@@ -243,49 +644,23 @@ class VulnerabilityDatabase:
         
         return exploits
     
-    def get_vulnerability_statistics(self) -> Dict[str, Any]:
-        """Get vulnerability statistics from cache"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Total vulnerabilities
-        cursor.execute('SELECT COUNT(*) FROM vulnerabilities')
-        stats['total_vulnerabilities'] = cursor.fetchone()[0]
-        
-        # Severity breakdown
-        cursor.execute('''
-            SELECT severity, COUNT(*) 
-            FROM vulnerabilities 
-            GROUP BY severity
-        ''')
-        
-        severity_counts = {}
-        for row in cursor.fetchall():
-            severity_counts[row[0]] = row[1]
-        
-        stats['severity_breakdown'] = severity_counts
-        
-        # Recent vulnerabilities (last 30 days)
-        thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-        cursor.execute('''
-            SELECT COUNT(*) FROM vulnerabilities 
-            WHERE published_date > ?
-        ''', (thirty_days_ago,))
-        
-        stats['recent_vulnerabilities'] = cursor.fetchone()[0]
-        
-        # High severity vulnerabilities
-        cursor.execute('''
-            SELECT COUNT(*) FROM vulnerabilities 
-            WHERE cvss_score >= 7.0
-        ''')
-        
-        stats['high_severity_count'] = cursor.fetchone()[0]
-        
-        conn.close()
-        return stats
+    def get_vulnerability_statistics(self, recent_days: int = 30) -> Dict[str, Any]:
+        """Vulnerability statistics for the dashboards"""
+        recent_since = timezone.now() - timedelta(days=recent_days)
+        counts = VulnerabilityDatabase.objects.aggregate(
+            total=Count('cve_id'),
+            high=Count('cve_id', filter=Q(cvss_score__gte=7.0)),
+            recent=Count('cve_id', filter=Q(published_date__gte=recent_since)),
+        )
+        severity_breakdown = dict(
+            VulnerabilityDatabase.objects.order_by().values_list('severity').annotate(count=Count('cve_id'))
+        )
+        return {
+            'total_vulnerabilities': counts['total'],
+            'severity_breakdown': severity_breakdown,
+            'recent_vulnerabilities': counts['recent'],
+            'high_severity_count': counts['high'],
+        }
 
 class ThreatIntelligence:
     """Threat Intelligence integration with multiple sources"""
@@ -348,7 +723,7 @@ class ThreatIntelligence:
         """Check IP against AlienVault OTX"""
         try:
             url = f"{self.sources['alienvault_otx']}/indicators/IPv4/{ip_address}/general"
-            response = requests.get(url, timeout=10)
+            response = http_client.get(url, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -365,7 +740,7 @@ class ThreatIntelligence:
             url = f"{self.sources['abuse_ch']}/host/"
             data = {'host': ip_address}
             
-            response = requests.post(url, data=data, timeout=10)
+            response = http_client.post(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -388,7 +763,7 @@ class SecurityIntelligence:
     """Main class for security intelligence gathering"""
     
     def __init__(self):
-        self.vuln_db = VulnerabilityDatabase()
+        self.vuln_db = CVERepository()
         self.threat_intel = ThreatIntelligence()
     
     def comprehensive_threat_assessment(self, target_info: Dict[str, Any]) -> Dict[str, Any]:
@@ -405,12 +780,13 @@ class SecurityIntelligence:
         try:
             # Extract technology information
             technologies = target_info.get('technologies', {})
+            versions = technologies.get('versions') or {}
             
             # Search for vulnerabilities in detected technologies
             for tech_type, tech_list in technologies.items():
                 if isinstance(tech_list, list):
                     for tech in tech_list:
-                        vulns = self.vuln_db.search_cve_by_product(tech)
+                        vulns = self.vuln_db.search_cve_by_product(tech, versions.get(tech))
                         assessment['vulnerabilities'].extend([v.__dict__ for v in vulns])
                         
                         exploits = self.vuln_db.search_exploit_db(tech)